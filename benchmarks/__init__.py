@@ -0,0 +1 @@
+"""Stand-alone benchmarks for the ezbeq integration (run with `make bench`)."""
@@ -0,0 +1,46 @@
+"""Memory held by the cached catalogue: raw JSON dicts vs CatalogueRecord.
+
+Usage: python -m benchmarks.bench_catalogue_memory [entries]
+"""
+from __future__ import annotations
+
+import gc
+import json
+import sys
+import tracemalloc
+
+from custom_components.ezbeq.records import CatalogueRecord
+
+from .synthetic import make_catalogue
+
+
+def _retained(build) -> tuple[int, object]:
+    """Bytes still allocated by build() once its temporaries are collected."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def main(n: int) -> None:
+    body = json.dumps(make_catalogue(n)).encode()
+
+    raw_bytes, raw = _retained(lambda: json.loads(body))
+    del raw
+    rec_bytes, records = _retained(
+        lambda: [CatalogueRecord.from_dict(d) for d in json.loads(body)]
+    )
+
+    print(f"entries:            {n}")
+    print(f"body size:          {len(body) / 1e6:8.2f} MB")
+    print(f"raw dicts:          {raw_bytes / 1e6:8.2f} MB")
+    print(f"CatalogueRecord:    {rec_bytes / 1e6:8.2f} MB")
+    print(f"reduction:          {raw_bytes / max(rec_bytes, 1):8.1f}x")
+    del records
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 15000)
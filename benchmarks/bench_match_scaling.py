@@ -0,0 +1,43 @@
+"""Load-path match latency as the catalogue grows.
+
+Each iteration performs the lookups load_beq_profile does for one request:
+preferred-author match, fallback match and a substitution codec probe.
+
+Usage: python -m benchmarks.bench_match_scaling [lookups]
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+
+from custom_components.ezbeq.index import CatalogueIndex
+from custom_components.ezbeq.records import CatalogueRecord
+
+from .synthetic import make_catalogue
+
+SIZES = (10_000, 50_000, 100_000, 200_000)
+
+
+def main(lookups: int) -> None:
+    print(f"{'entries':>8} {'build ms':>9} {'us/lookup':>10}")
+    for size in SIZES:
+        records = [CatalogueRecord.from_dict(d) for d in make_catalogue(size)]
+        start = time.perf_counter()
+        index = CatalogueIndex(records)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        rng = random.Random(size)
+        queries = [rng.choice(records) for _ in range(lookups)]
+        start = time.perf_counter()
+        for rec in queries:
+            codec = rec.audio_types[0]
+            index.match_preferring_author(rec.tmdb_id, codec, rec.edition, rec.author)
+            index.match(rec.tmdb_id, codec, rec.edition, rec.year, rec.title)
+            index.has_codec(rec.tmdb_id, rec.edition, "TrueHD 7.1")
+        per_lookup_us = (time.perf_counter() - start) / lookups * 1e6
+        print(f"{size:>8} {build_ms:>9.1f} {per_lookup_us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
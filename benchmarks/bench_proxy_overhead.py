@@ -0,0 +1,113 @@
+"""Per-request overhead of HttpxLogProxy's gain handling.
+
+Compares the old recursive walk over every JSON payload with the per-endpoint
+gain transform, and times a whole proxied request (tracing off) against a
+no-op client for realistic ezBEQ payloads.
+
+Usage: python -m benchmarks.bench_proxy_overhead [iterations]
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import logging
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from custom_components.ezbeq._http_log_proxy import HttpxLogProxy
+
+from .synthetic import make_catalogue
+
+BASE = "http://ezbeq:8080"
+OVERRIDE = (0.0, 0.0)
+
+
+def legacy_walk(obj: Any, pair: Tuple[float, float] | None) -> bool:
+    """The previous approach: visit every dict/list looking for gain keys."""
+    changed = False
+    if isinstance(obj, dict):
+        if isinstance(obj.get("gains"), list):
+            new = [pair[0], pair[1]] if pair and len(obj["gains"]) == 2 else obj["gains"]
+            if new != obj["gains"]:
+                obj["gains"] = new
+                changed = True
+        for key, pos in (("gain1", 0), ("gain2", 1)):
+            if key in obj and pair is not None and obj[key] != pair[pos]:
+                obj[key] = pair[pos]
+                changed = True
+        for v in obj.values():
+            if isinstance(v, (dict, list)) and legacy_walk(v, pair):
+                changed = True
+    elif isinstance(obj, list):
+        for v in obj:
+            if isinstance(v, (dict, list)) and legacy_walk(v, pair):
+                changed = True
+    return changed
+
+
+def _load_payload(slots: int) -> Dict[str, Any]:
+    return {
+        "slots": [
+            {"id": str(s), "gains": [-2.5, -2.5], "active": True, "mutes": [False, False], "entry": "0000abcd"}
+            for s in range(1, slots + 1)
+        ]
+    }
+
+
+# (name, method, url, payload factory)
+CASES: List[Tuple[str, str, str, Callable[[], Any]]] = [
+    ("load PATCH (1 slot)", "PATCH", f"{BASE}/api/2/devices/master", lambda: _load_payload(1)),
+    ("load PATCH (4 slots)", "PATCH", f"{BASE}/api/2/devices/master", lambda: _load_payload(4)),
+    ("GET /api/1/devices", "GET", f"{BASE}/api/1/devices", lambda: None),
+    ("POST 50 catalogue entries", "POST", f"{BASE}/api/1/search", lambda: {"entries": make_catalogue(50)}),
+]
+
+
+class _NoopClient:
+    async def request(self, method: str, url: Any, *args: Any, **kwargs: Any) -> Any:
+        return None
+
+
+def _per_call_us(func: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def _proxy_us(proxy: HttpxLogProxy, method: str, url: str, payloads: List[Any]) -> float:
+    start = time.perf_counter()
+    for payload in payloads:
+        await proxy.request(method, url, json=payload)
+    return (time.perf_counter() - start) / len(payloads) * 1e6
+
+
+def main(iterations: int) -> None:
+    logger = logging.getLogger("bench")
+    logger.setLevel(logging.INFO)
+    proxy = HttpxLogProxy(_NoopClient(), logger, override_gains=True, override_gains_values=OVERRIDE)
+
+    print(f"{'payload':<27} {'bytes':>8} {'walk us':>9} {'targeted us':>12} {'request us':>11}")
+    for name, method, url, factory in CASES:
+        template = factory()
+        size = len(json.dumps(template)) if template is not None else 0
+        # fresh copies so both sides see unmodified payloads
+        walk_in = [copy.deepcopy(template) for _ in range(iterations)]
+        walk_iter = iter(walk_in)
+        walk_us = _per_call_us(lambda: legacy_walk(next(walk_iter), OVERRIDE), iterations)
+        new_in = [copy.deepcopy(template) for _ in range(iterations)]
+        new_iter = iter(new_in)
+        targeted_us = _per_call_us(
+            lambda: isinstance(p := next(new_iter), dict) and proxy._transform(method, url, p),
+            iterations,
+        )
+        request_us = asyncio.run(
+            _proxy_us(proxy, method, url, [copy.deepcopy(template) for _ in range(iterations)])
+        )
+        print(f"{name:<27} {size:>8} {walk_us:>9.2f} {targeted_us:>12.2f} {request_us:>11.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000)
@@ -0,0 +1,63 @@
+"""Synthetic BEQ catalogue entries shaped like database.json."""
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, List
+
+CODECS = [
+    "Atmos", "TrueHD 7.1", "TrueHD 5.1", "DD+ Atmos", "DD+", "DTS-HD MA 7.1",
+    "DTS-HD MA 5.1", "DTS-X", "DTS 5.1", "LPCM 5.1", "LPCM 2.0", "AC3 5.1",
+]
+AUTHORS = ["aron7awol", "mobe1969", "halcyon888", "t1g8rsfan"]
+EDITIONS = ["", "", "", "Director's Cut", "Extended", "Theatrical", "IMAX"]
+LANGUAGES = ["English", "English", "Japanese", "French", "German"]
+GENRES = ["Action", "Adventure", "Drama", "Sci-Fi", "Thriller", "Horror", "Comedy"]
+WORDS = [
+    "the", "last", "night", "star", "dark", "city", "war", "lost", "king", "blood",
+    "ghost", "storm", "fire", "iron", "shadow", "river", "dragon", "empire", "red", "moon",
+]
+
+
+def make_entry(i: int, rng: random.Random) -> Dict[str, Any]:
+    title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+    codecs = rng.sample(CODECS, rng.randint(1, 3))
+    return {
+        "id": f"{i:08x}",
+        "title": f"{title} {i}",
+        "sortTitle": f"{title.lower()} {i}",
+        "altTitle": f"{title} Alt {i}" if i % 5 == 0 else "",
+        "year": 1970 + i % 55,
+        "audioTypes": codecs,
+        "content_type": "film" if i % 7 else "TV",
+        "author": rng.choice(AUTHORS),
+        "catalogue_url": f"https://beqcatalogue.readthedocs.io/en/latest/#{i}",
+        "filters": [
+            {"freq": 20 + 5 * f, "gain": rng.uniform(-5, 12), "q": 0.7, "type": "LowShelf"}
+            for f in range(rng.randint(3, 8))
+        ],
+        "images": [f"https://example.invalid/{i}/a.jpg", f"https://example.invalid/{i}/b.jpg"],
+        "warning": "",
+        "season": "",
+        "episode": "",
+        "edition": rng.choice(EDITIONS),
+        "underlying": "",
+        "language": rng.choice(LANGUAGES),
+        "source": "Disc",
+        "overview": "A synthetic overview sentence that is roughly as long as a real one. " * 3,
+        "theMovieDB": str(100000 + i),
+        "rating": "PG-13",
+        "runtime": 90 + i % 60,
+        "genres": rng.sample(GENRES, 2),
+        "note": "",
+        "mv": str(round(rng.uniform(-5, 2), 1)),
+        "avs": f"https://www.avsforum.com/threads/{i}",
+        "digest": f"{i:064x}",
+        "collection": {"id": i // 3, "name": f"{title} Collection"},
+        "created_at": 1600000000 + i,
+        "updated_at": 1700000000 + i,
+    }
+
+
+def make_catalogue(n: int, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [make_entry(i, rng) for i in range(n)]
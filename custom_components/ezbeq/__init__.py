@@ -15,17 +15,32 @@ from homeassistant.core import ServiceCall  # kept import (may be unused)
 
 from .services import async_setup_services, async_unload_services
 from .manual_load import async_setup_manual_load, async_unload_manual_load
-from .devices import async_setup_devices, DEFAULT_REFRESH_INTERVAL_SECS
-from .const import DOMAIN
+from .devices import async_setup_devices
+from .const import (
+    CONF_HTTP_TRACE,
+    CONF_HTTP_TRACE_SAMPLE_RATE,
+    CONF_MEDIA_PLAYER,
+    CONF_PUSH_UPDATES,
+    DOMAIN,
+)
 from .coordinator import EzBEQCoordinator
 
 # Lightweight HTTP proxy to log outbound requests and optionally override gains
-from ._http_log_proxy import HttpxLogProxy  # type: ignore[attr-defined]
+from ._http_log_proxy import (  # type: ignore[attr-defined]
+    DEFAULT_TRACE_SAMPLE_RATE,
+    TRACE_OFF,
+    HttpxLogProxy,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 # Now include the select platform for the native candidate selector
-PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.SWITCH, Platform.SELECT]
+PLATFORMS: list[Platform] = [
+    Platform.SENSOR,
+    Platform.BINARY_SENSOR,
+    Platform.SWITCH,
+    Platform.SELECT,
+]
 
 # Toggle to force all outgoing per-channel gains to a fixed pair.
 # Set OVERRIDE_GAINS to True to always send OVERRIDE_GAINS_VALUES (e.g., (0.0, 0.0)).
@@ -51,18 +66,19 @@ async def async_setup_entry(hass: HomeAssistant, entry: EzBEQConfigEntry) -> boo
     hass.states.async_set("sensor.ezbeq_base_url_debug", base_url, {"source": "init.py"})
 
     client = EzbeqClient(host=host, port=port, logger=_LOGGER)
+    coordinator = EzBEQCoordinator(hass, client)
+    _apply_http_trace(entry, coordinator)
 
-    # Wrap the underlying HTTP client so we log exactly what gets sent to ezBEQ
+    # Wrap the underlying HTTP client so we log/trace what gets sent to ezBEQ
     # and (optionally) override gains with a fixed pair.
     client.client = HttpxLogProxy(
         client.client,
         _LOGGER,
         override_gains=OVERRIDE_GAINS,
         override_gains_values=OVERRIDE_GAINS_VALUES,
+        trace=coordinator.http_trace,
     )
 
-    coordinator = EzBEQCoordinator(hass, client)
-
     # Hard-disable Main Volume (MV) changes from this integration.
     setattr(coordinator, "disable_mv", True)
 
@@ -70,6 +86,13 @@ async def async_setup_entry(hass: HomeAssistant, entry: EzBEQConfigEntry) -> boo
 
     entry.runtime_data = coordinator
 
+    # Warm the BEQ catalogue in the background so a play never waits on it.
+    coordinator.catalogue.async_start()
+
+    # Substitution rules: options flow / YAML file; options changes recompile in place.
+    await coordinator.substitution_rules.async_load(entry)
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
+
     # create a device for the server
     device_registry = dr.async_get(hass)
     device_registry.async_get_or_create(
@@ -80,13 +103,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: EzBEQConfigEntry) -> boo
         sw_version=coordinator.client.version,
     )
 
-    # Start devices sensor + periodic refresh
-    devices_cleanup = await async_setup_devices(
-        hass,
-        coordinator,
-        domain=DOMAIN,
-        update_interval_secs=DEFAULT_REFRESH_INTERVAL_SECS,
-    )
+    # Devices sensor, rendered from the coordinator's polls
+    devices_cleanup = await async_setup_devices(hass, coordinator, domain=DOMAIN)
     hass.data[DOMAIN]["devices_cleanup"] = devices_cleanup
 
     # Forward platforms (includes SELECT now)
@@ -96,6 +114,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: EzBEQConfigEntry) -> boo
     await async_setup_manual_load(hass, coordinator, DOMAIN)
 
     await async_setup_services(hass, coordinator, domain=DOMAIN)
+    _apply_push(entry, coordinator)
+    coordinator.async_follow_media_player(entry.options.get(CONF_MEDIA_PLAYER))
     _LOGGER.debug(
         "Finished setting up ezbeq (override_gains=%s, values=%s, base_url=%s)",
         OVERRIDE_GAINS,
@@ -105,12 +125,38 @@ async def async_setup_entry(hass: HomeAssistant, entry: EzBEQConfigEntry) -> boo
     return True
 
 
+def _apply_http_trace(entry: EzBEQConfigEntry, coordinator: EzBEQCoordinator) -> None:
+    coordinator.http_trace.configure(
+        entry.options.get(CONF_HTTP_TRACE, TRACE_OFF),
+        entry.options.get(CONF_HTTP_TRACE_SAMPLE_RATE, DEFAULT_TRACE_SAMPLE_RATE),
+    )
+
+
+def _apply_push(entry: EzBEQConfigEntry, coordinator: EzBEQCoordinator) -> None:
+    if entry.options.get(CONF_PUSH_UPDATES, True):
+        coordinator.push.async_start()
+    else:
+        entry.async_create_task(coordinator.hass, coordinator.push.async_stop())
+
+
+async def _async_options_updated(hass: HomeAssistant, entry: EzBEQConfigEntry) -> None:
+    """Apply options (substitution rules, HTTP tracing, push, media player) without reloading the entry."""
+    _apply_http_trace(entry, entry.runtime_data)
+    _apply_push(entry, entry.runtime_data)
+    entry.runtime_data.async_follow_media_player(entry.options.get(CONF_MEDIA_PLAYER))
+    await entry.runtime_data.substitution_rules.async_load(entry)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: EzBEQConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.debug("Unloading ezbeq config entry")
+    await entry.runtime_data.push.async_stop()
+    entry.runtime_data.async_follow_media_player(None)
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         coordinator = entry.runtime_data
+        coordinator.catalogue.async_shutdown()
+        coordinator.pre_resolver.async_shutdown()
         await coordinator.client.client.aclose()
 
     await async_unload_services(hass, DOMAIN)
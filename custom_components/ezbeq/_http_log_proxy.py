@@ -1,14 +1,28 @@
 from __future__ import annotations
 
+from collections import deque
+from dataclasses import asdict, dataclass, field
+import itertools
 import json
 import logging
-from typing import Any, List, Optional, Tuple
+import random
+import re
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 
 try:
     from httpx import Response  # type: ignore
 except Exception:  # pragma: no cover
     Response = Any  # fallback typing if httpx import fails during type checking
 
+# Trace levels (options flow); see HttpTrace
+TRACE_OFF = "off"
+TRACE_HEADERS = "headers"
+TRACE_SAMPLED = "sampled"
+TRACE_LEVELS = (TRACE_OFF, TRACE_HEADERS, TRACE_SAMPLED)
+DEFAULT_TRACE_SAMPLE_RATE = 0.1
+TRACE_BUFFER_SIZE = 200
+
 
 def _coerce_number(value: Any, default: float = 0.0) -> float:
     """Return value if it's int/float; otherwise default (used for None)."""
@@ -17,102 +31,143 @@ def _coerce_number(value: Any, default: float = 0.0) -> float:
     return float(default)
 
 
-def _normalize_and_override_gains_inplace(
-    obj: Any,
+def _gain_list(gains: List[Any], override_pair: Optional[Tuple[float, float]]) -> List[float]:
+    """
+    Override (if requested) and normalize one slot's 'gains' list: [g0, g1]
+    for two inputs, otherwise g0 for every input (same length); None or
+    non-numeric entries become 0.0.
+    """
+    if override_pair is not None:
+        return [override_pair[0], override_pair[1]] if len(gains) == 2 else [override_pair[0]] * len(gains)
+    return [_coerce_number(v, 0.0) for v in gains]
+
+
+def _override_slot_gains(
+    payload: Dict[str, Any],
     override_pair: Optional[Tuple[float, float]] = None,
 ) -> bool:
     """
-    Recursively normalize/override the payload in-place.
-
-    - If override_pair is provided (e.g., (0.0, 0.0)):
-        * For any dict with key 'gains' where value is a list:
-            - replace the list with fixed values based on override_pair.
-              If the list length is 2, set exactly [g0, g1].
-              If length is N != 2, set all N entries to g0 to preserve shape.
-        * For dict-style gains ('gain1', 'gain2'), set them to g0/g1 respectively.
-    - Regardless of override:
-        * Coerce None/non-numeric entries in 'gains' to 0.0
-        * Coerce 'gain1'/'gain2' None to 0.0
+    Normalize/override the input gains of a device PATCH payload in-place.
 
+    Only the known gain fields of ezBEQ's slot schema are touched:
+    slots[*].gains (API v2, list) and slots[*].gain1/gain2 (API v1).
     Returns True if any change was made.
     """
+    slots = payload.get("slots")
+    if not isinstance(slots, list):
+        return False
     changed = False
-
-    if isinstance(obj, dict):
-        # List-style gains: "gains": [x, y, ...]
-        if "gains" in obj and isinstance(obj["gains"], list):
-            gains_list = obj["gains"]
-
-            # Apply override first (if requested)
-            if override_pair is not None:
-                g0, g1 = float(override_pair[0]), float(override_pair[1])
-                if len(gains_list) == 2:
-                    new_list = [g0, g1]
-                else:
-                    # Preserve length; fill with first override value
-                    new_list = [g0 for _ in gains_list]
-                if new_list != gains_list:
-                    obj["gains"] = new_list
-                    gains_list = new_list
+    for slot in slots:
+        if not isinstance(slot, dict):
+            continue
+        gains = slot.get("gains")
+        if isinstance(gains, list):
+            new_gains = _gain_list(gains, override_pair)
+            if new_gains != gains:
+                slot["gains"] = new_gains
+                changed = True
+        for pos, key in enumerate(("gain1", "gain2")):
+            if key in slot:
+                value = override_pair[pos] if override_pair is not None else _coerce_number(slot[key], 0.0)
+                if slot[key] != value:
+                    slot[key] = value
                     changed = True
+    return changed
 
-            # Normalize any remaining None/non-number entries to 0.0
-            normalized_list: List[float] = []
-            mutated = False
-            for v in gains_list:
-                if v is None or not isinstance(v, (int, float)):
-                    normalized_list.append(_coerce_number(v, 0.0))
-                    mutated = True
-                else:
-                    normalized_list.append(float(v))
-            if mutated:
-                obj["gains"] = normalized_list
-                changed = True
 
-        # Dict-style gains: {"gain1": x, "gain2": y}
-        g1_present = "gain1" in obj
-        g2_present = "gain2" in obj
-        if g1_present or g2_present:
-            if override_pair is not None:
-                g0, g1 = float(override_pair[0]), float(override_pair[1])
-                if g1_present and obj.get("gain1") != g0:
-                    obj["gain1"] = g0
-                    changed = True
-                if g2_present and obj.get("gain2") != g1:
-                    obj["gain2"] = g1
-                    changed = True
-            # Normalize None to 0.0 (in case override not provided)
-            if g1_present and obj.get("gain1") is None:
-                obj["gain1"] = 0.0
-                changed = True
-            if g2_present and obj.get("gain2") is None:
-                obj["gain2"] = 0.0
-                changed = True
+# ezBEQ endpoints whose JSON payload carries input gains -> their transform.
+# Every other request passes through untouched.
+_GAIN_TRANSFORMS: Tuple[Tuple[str, re.Pattern[str], Callable[..., bool]], ...] = (
+    # PATCH /api/1/devices/{name} (v1 slots) and /api/2/devices/{name} (load)
+    ("PATCH", re.compile(r"/api/[12]/devices/[^/?]+/?(?:\?|$)"), _override_slot_gains),
+)
 
-        # Recurse
-        for _, v in list(obj.items()):
-            if isinstance(v, (dict, list)):
-                if _normalize_and_override_gains_inplace(v, override_pair):
-                    changed = True
 
-    elif isinstance(obj, list):
-        for v in obj:
-            if isinstance(v, (dict, list)):
-                if _normalize_and_override_gains_inplace(v, override_pair):
-                    changed = True
+@dataclass(slots=True)
+class TraceRecord:
+    """One traced request; bodies are only captured for sampled (full) records."""
+
+    id: str
+    at: str
+    method: str
+    url: str
+    full: bool
+    status: int | None = None
+    duration_ms: float | None = None
+    gains_normalized: bool = False
+    request_headers: Dict[str, str] = field(default_factory=dict)
+    response_headers: Dict[str, str] = field(default_factory=dict)
+    request_json: str | None = None
+    response_body: str | None = None
+    error: str | None = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
 
-    return changed
+
+class HttpTrace:
+    """
+    Trace settings and a bounded ring buffer of the latest TraceRecords.
+
+    Levels: TRACE_OFF (nothing recorded, no serialization), TRACE_HEADERS
+    (method, URL, status, headers, timing) and TRACE_SAMPLED (headers for
+    every request, plus JSON payload and body preview for `sample_rate` of
+    them). Each record has a correlation ID that is also in the debug log.
+    """
+
+    def __init__(self, maxlen: int = TRACE_BUFFER_SIZE) -> None:
+        self.level = TRACE_OFF
+        self.sample_rate = DEFAULT_TRACE_SAMPLE_RATE
+        self.records: Deque[TraceRecord] = deque(maxlen=maxlen)
+        self._ids = itertools.count(1)
+
+    def configure(self, level: str, sample_rate: float = DEFAULT_TRACE_SAMPLE_RATE) -> None:
+        self.level = level if level in TRACE_LEVELS else TRACE_OFF
+        self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+
+    @property
+    def enabled(self) -> bool:
+        return self.level != TRACE_OFF
+
+    def start(self, method: str, url: Any) -> TraceRecord:
+        full = self.level == TRACE_SAMPLED and random.random() < self.sample_rate
+        return TraceRecord(
+            id=f"{next(self._ids):06x}",
+            at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            method=method.upper(),
+            url=str(url),
+            full=full,
+        )
+
+    def dump(self, clear: bool = False) -> List[Dict[str, Any]]:
+        """Buffered records, oldest first."""
+        records = [r.as_dict() for r in self.records]
+        if clear:
+            self.records.clear()
+        return records
+
+
+def _headers(resp: Any, sent: bool = False) -> Dict[str, str]:
+    """Response headers, or (sent=True) the headers of the request actually sent."""
+    try:
+        # httpx raises RuntimeError for a response without its request
+        return dict((resp.request if sent else resp).headers)
+    except Exception:
+        return {}
 
 
 class HttpxLogProxy:
     """
     Transparent proxy around an httpx.AsyncClient that:
-      - Logs HTTP method, URL, and JSON payload (if any)
-      - Normalizes payload (coerces None/non-numeric gains -> 0.0)
-      - Optionally overrides all outgoing gains to a fixed pair (e.g., [0.0, 0.0])
-      - Logs response status code and a short preview
+      - Normalizes the gains of pyezbeq's device PATCH payloads (None/non-numeric -> 0.0)
+      - Optionally overrides those gains with a fixed pair (e.g., [0.0, 0.0]);
+        the integration's own writes apply `override_pair` when built
+      - Logs method, URL and status code at debug level
+      - Records requests in an HttpTrace when tracing is enabled
 
-    Behavior aside from normalization/override and logging is unchanged.
+    Payloads are only serialized and response bodies only decoded for
+    sampled trace records; with tracing off the proxy adds no I/O-sized work.
+    Behavior aside from normalization/override is unchanged.
     """
 
     def __init__(
@@ -122,65 +177,83 @@ class HttpxLogProxy:
         max_preview: int = 1000,
         override_gains: bool = False,
         override_gains_values: Tuple[float, float] = (0.0, 0.0),
+        trace: HttpTrace | None = None,
     ) -> None:
         self._inner = inner
         self._logger = logger
         self._max_preview = max_preview
-        self._override_pair: Optional[Tuple[float, float]] = (
+        # Input gains every load sends instead of the entry's MV adjustment
+        self.override_pair: Optional[Tuple[float, float]] = (
             (float(override_gains_values[0]), float(override_gains_values[1]))
             if override_gains
             else None
         )
+        self.trace = trace if trace is not None else HttpTrace()
 
-    async def request(self, method: str, url: Any, *args: Any, **kwargs: Any) -> Response:
-        # Log outgoing JSON payload, normalize, and optionally override gains
+    async def request(
+        self, method: str, url: Any, *args: Any, gains_applied: bool = False, **kwargs: Any
+    ) -> Response:
+        """
+        Send a request. Payloads built by the integration pass gains_applied=True
+        (override pair already in place) and are sent untouched; pyezbeq's own
+        load payloads go through the endpoint gain transform.
+        """
         js = kwargs.get("json", None)
-        if isinstance(js, dict):
-            try:
-                original = json.dumps(js, ensure_ascii=False, sort_keys=True)
-            except Exception:
-                original = "<unserializable JSON dict>"
+        changed = not gains_applied and isinstance(js, dict) and self._transform(method, url, js)
 
-            changed = _normalize_and_override_gains_inplace(js, self._override_pair)
+        if not self.trace.enabled:
+            self._logger.debug("ezBEQ HTTP %s %s (gains normalized: %s)", method, url, changed)
+            resp: Response = await self._inner.request(method, url, *args, **kwargs)
+            self._logger.debug("ezBEQ RESP %s %s -> %s", method, url, getattr(resp, "status_code", "?"))
+            return resp
 
+        record = self.trace.start(method, url)
+        record.gains_normalized = changed
+        if record.full and js is not None:
             try:
-                modified = json.dumps(js, ensure_ascii=False, sort_keys=True)
+                record.request_json = json.dumps(js, ensure_ascii=False)
             except Exception:
-                modified = "<unserializable JSON dict>"
+                record.request_json = "<unserializable JSON payload>"
 
-            if changed:
-                self._logger.debug("ezBEQ HTTP %s %s json (modified): %s", method.upper(), url, modified)
-                self._logger.debug("ezBEQ HTTP %s %s json (original): %s", method.upper(), url, original)
-            else:
-                self._logger.debug("ezBEQ HTTP %s %s json: %s", method.upper(), url, modified)
-        else:
-            if js is not None:
-                self._logger.debug(
-                    "ezBEQ HTTP %s %s (non-dict JSON payload type=%s)",
-                    method.upper(),
-                    url,
-                    type(js).__name__,
-                )
-            else:
-                self._logger.debug("ezBEQ HTTP %s %s", method.upper(), url)
-
-        resp: Response = await self._inner.request(method, url, *args, **kwargs)
-
-        # Log response code and a short preview
+        started = time.monotonic()
         try:
-            text = getattr(resp, "text", "")
-            preview = text[: self._max_preview] if isinstance(text, str) else "<non-text body>"
-        except Exception:
-            preview = "<unavailable>"
-        self._logger.debug(
-            "ezBEQ RESP %s %s -> %s: %s",
-            method.upper(),
-            url,
-            getattr(resp, "status_code", "?"),
-            preview,
-        )
+            resp = await self._inner.request(method, url, *args, **kwargs)
+        except Exception as e:
+            record.error = str(e)
+            raise
+        else:
+            record.status = getattr(resp, "status_code", None)
+            record.request_headers = _headers(resp, sent=True)
+            record.response_headers = _headers(resp)
+            if record.full:
+                try:
+                    text = getattr(resp, "text", "")
+                    record.response_body = (
+                        text[: self._max_preview] if isinstance(text, str) else "<non-text body>"
+                    )
+                except Exception:
+                    record.response_body = "<unavailable>"
+        finally:
+            record.duration_ms = round((time.monotonic() - started) * 1000, 1)
+            self.trace.records.append(record)
+            self._logger.debug(
+                "ezBEQ HTTP [%s] %s %s -> %s (%s ms)",
+                record.id,
+                record.method,
+                record.url,
+                record.status if record.error is None else record.error,
+                record.duration_ms,
+            )
         return resp
 
+    def _transform(self, method: str, url: Any, payload: Dict[str, Any]) -> bool:
+        """Apply the gain transform of the endpoint, if it has one."""
+        method = method.upper()
+        for t_method, pattern, transform in _GAIN_TRANSFORMS:
+            if method == t_method and pattern.search(str(url)):
+                return transform(payload, self.override_pair)
+        return False
+
     # Convenience methods delegate to request (fixed: no bad annotations in calls)
     async def post(self, url: Any, *args: Any, **kwargs: Any) -> Response:
         return await self.request("POST", url, *args, **kwargs)
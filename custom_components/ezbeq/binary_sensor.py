@@ -0,0 +1,101 @@
+"""Binary sensor platform for the ezbeq Profile Loader integration."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorEntity,
+    BinarySensorEntityDescription,
+)
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from . import EzBEQConfigEntry
+from .coordinator import EzBEQCoordinator
+from .entity import EzBEQSlotEntity
+from .snapshot import DeviceState, SlotState
+
+
+@dataclass(frozen=True, kw_only=True)
+class EzBEQSlotBinarySensorEntityDescription(BinarySensorEntityDescription):
+    """Describe a per-slot EzBEQ binary sensor entity."""
+
+    value_fn: Callable[[SlotState], bool | None]
+
+
+SLOT_ACTIVE = EzBEQSlotBinarySensorEntityDescription(
+    key="active",
+    translation_key="slot_active",
+    value_fn=lambda slot: slot.active,
+)
+
+
+def _mute_description(input_id: str) -> EzBEQSlotBinarySensorEntityDescription:
+    return EzBEQSlotBinarySensorEntityDescription(
+        key=f"input{input_id}_mute",
+        translation_key="slot_input_mute",
+        translation_placeholders={"input": input_id},
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda slot: dict(slot.mutes).get(input_id),
+    )
+
+
+def _slot_binary_sensors(
+    coordinator: EzBEQCoordinator, device: DeviceState
+) -> list[EzBEQSlotBinarySensor]:
+    sensors = []
+    for slot in device.slots:
+        descriptions = [SLOT_ACTIVE, *(_mute_description(mid) for mid, _ in slot.mutes)]
+        sensors.extend(
+            EzBEQSlotBinarySensor(coordinator, description, device.name, slot.id)
+            for description in descriptions
+        )
+    return sensors
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: EzBEQConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the binary sensor entities."""
+    coordinator = entry.runtime_data
+    async_add_entities(
+        sensor
+        for device in coordinator.data.devices
+        for sensor in _slot_binary_sensors(coordinator, device)
+    )
+
+
+class EzBEQSlotBinarySensor(EzBEQSlotEntity, BinarySensorEntity):
+    """A flag of one device slot (active, input mutes)."""
+
+    entity_description: EzBEQSlotBinarySensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: EzBEQCoordinator,
+        description: EzBEQSlotBinarySensorEntityDescription,
+        device_name: str,
+        slot_id: str,
+    ) -> None:
+        """Initialize the slot binary sensor."""
+        super().__init__(coordinator, device_name, slot_id, description.key)
+        self.entity_description = description
+        self._attr_translation_placeholders = {
+            "slot": slot_id,
+            **(description.translation_placeholders or {}),
+        }
+
+    @property
+    def is_on(self) -> bool | None:
+        """Return the slot flag."""
+        slot = self.slot
+        return self.entity_description.value_fn(slot) if slot else None
+
+    def _current(self) -> Any:
+        return (self.available, self.is_on)
@@ -0,0 +1,463 @@
+"""BEQ catalogue store: on-disk persistence, conditional revalidation, single-flight."""
+from __future__ import annotations
+
+import asyncio
+import codecs
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Callable, Dict, List
+
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.const import STATE_UNKNOWN
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+from homeassistant.util import dt as dt_util
+
+from .index import CatalogueIndex
+from .records import CatalogueRecord
+
+_LOGGER = logging.getLogger(__name__)
+
+CATALOG_URL = "https://beqcatalogue.readthedocs.io/en/latest/database.json"
+CATALOG_CACHE_TTL = 7 * 24 * 3600  # 1 week
+CATALOG_FETCH_TIMEOUT = 60  # background only; never on the load path
+CATALOG_RETRY_INTERVAL = 15 * 60  # after a failed refresh
+
+CATALOG_SENSOR_ID = "sensor.ezbeq_catalogue"
+CATALOG_FRIENDLY_NAME = "ezBEQ Catalogue"
+# Cache age: a timestamp sensor (fetch time) that the frontend shows as "x ago",
+# so the state only changes when a copy is fetched or revalidated
+CATALOG_AGE_SENSOR_ID = "sensor.ezbeq_catalogue_age"
+CATALOG_AGE_FRIENDLY_NAME = "ezBEQ Catalogue Age"
+
+# Validators (ETag / Last-Modified) live in a regular HA Store; the body itself
+# is kept verbatim next to it so a 304 never has to re-serialize anything.
+CATALOG_STORAGE_VERSION = 1
+CATALOG_STORAGE_KEY = "ezbeq.catalogue"
+CATALOG_BODY_FILE = "ezbeq.catalogue.json"
+
+# Bytes handed to the incremental parser per step (network and disk).
+CATALOG_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+# ---------- small utilities ----------
+def _utc_timestamp(ts: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts))
+
+
+def _items_from_payload(data: Any) -> list[dict] | None:
+    """Accept either a bare list or a {'titles': [...]}/mapping payload."""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return data.get("titles") or list(data.values())
+    return None
+
+
+class _ArrayStreamParser:
+    """
+    Incremental parser for the catalogue body.
+
+    Bytes are fed as they arrive and every complete element of the top-level
+    JSON array is returned as soon as its closing brace is seen, so only the
+    unparsed tail of the stream is buffered. A top-level object (legacy
+    {'titles': [...]} payload) cannot be split this way and is buffered whole.
+    """
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._mode = "start"  # start -> items -> done, or start -> object
+
+    def feed(self, chunk: bytes) -> List[dict]:
+        self._buf += self._utf8.decode(chunk)
+        return self._drain(final=False)
+
+    def finish(self) -> List[dict]:
+        """Flush the stream; raises ValueError if it was not a complete payload."""
+        self._buf += self._utf8.decode(b"", final=True)
+        out = self._drain(final=True)
+        if self._mode == "object":
+            items = _items_from_payload(json.loads(self._buf))
+            if items is None:
+                raise ValueError("Unsupported catalogue payload")
+            return [i for i in items if isinstance(i, dict)]
+        if self._mode != "done":
+            raise ValueError("Truncated catalogue payload")
+        return out
+
+    def _drain(self, final: bool) -> List[dict]:
+        out: List[dict] = []
+        buf = self._buf
+        pos = 0
+        while self._mode in ("start", "items"):
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos >= len(buf):
+                break
+            ch = buf[pos]
+            if self._mode == "start":
+                if ch != "[":
+                    self._mode = "object"
+                    break
+                self._mode = "items"
+                pos += 1
+            elif ch == ",":
+                pos += 1
+            elif ch == "]":
+                self._mode = "done"
+                pos += 1
+            else:
+                try:
+                    obj, end = self._decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break
+                if end >= len(buf) and not final:
+                    break  # a bare scalar could still be growing
+                if isinstance(obj, dict):
+                    out.append(obj)
+                pos = end
+        self._buf = buf[pos:]
+        return out
+
+
+def _read_body(path: str) -> list[CatalogueRecord] | None:
+    """Executor job: stream-parse the persisted body (None if absent/corrupt)."""
+    parser = _ArrayStreamParser()
+    items: list[CatalogueRecord] = []
+    try:
+        with open(path, "rb") as fh:
+            while chunk := fh.read(CATALOG_CHUNK_SIZE):
+                items.extend(map(CatalogueRecord.from_dict, parser.feed(chunk)))
+        items.extend(map(CatalogueRecord.from_dict, parser.finish()))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        _LOGGER.warning("Ignoring unreadable persisted BEQ catalogue %s: %s", path, e)
+        return None
+    return items
+
+
+def _spool_chunk(parser: _ArrayStreamParser, fh: Any, chunk: bytes) -> list[CatalogueRecord]:
+    """Executor job: persist one downloaded chunk and decode the records it completes."""
+    fh.write(chunk)
+    return list(map(CatalogueRecord.from_dict, parser.feed(chunk)))
+
+
+def _finish_records(parser: _ArrayStreamParser) -> list[CatalogueRecord]:
+    """Executor job: decode whatever the parser still holds."""
+    return list(map(CatalogueRecord.from_dict, parser.finish()))
+
+
+def _open_spool(path: str) -> Any:
+    """Executor job: open the temporary file the download is spooled into."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return open(path, "wb")  # noqa: SIM115 - closed by the caller
+
+
+def _discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class CatalogueStore:
+    """
+    Owns the BEQ catalogue for one config entry.
+
+    - Stale-while-revalidate: whatever copy is in memory (or in .storage) is
+      served immediately, even if expired; an expired copy triggers a single
+      background refresh whose result is swapped in atomically.
+    - Refreshes revalidate with If-None-Match / If-Modified-Since.
+    - `version` increments every time the item list is replaced. Decoding,
+      normalization and index construction run in the executor, and the
+      finished immutable CatalogueIndex is published with one reference
+      swap; listeners registered with async_add_listener are called after
+      each replacement.
+    - The fetch time and refresh outcomes are published on
+      sensor.ezbeq_catalogue, the cache age on sensor.ezbeq_catalogue_age.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.version = 0
+        self.fetched_at: float | None = None
+        self.refresh_failures = 0
+        self.consecutive_failures = 0
+        self.last_error: str | None = None
+        self.last_refresh_at: float | None = None
+        self.last_refresh_result: str | None = None
+        self.last_refresh_duration_ms: float | None = None
+        self._index: CatalogueIndex | None = None
+        self._etag: str | None = None
+        self._last_modified: str | None = None
+        self._persisted_task: asyncio.Task[None] | None = None
+        self._refresh_task: asyncio.Task[None] | None = None
+        self._listeners: List[Callable[[], None]] = []
+        self._meta_store: Store[Dict[str, Any]] = Store(
+            hass, CATALOG_STORAGE_VERSION, CATALOG_STORAGE_KEY
+        )
+
+    # ---------- public API ----------
+    @property
+    def index(self) -> CatalogueIndex | None:
+        """Current catalogue without triggering a fetch."""
+        return self._index
+
+    def is_fresh(self) -> bool:
+        return (
+            self._index is not None
+            and self.fetched_at is not None
+            and time.time() - self.fetched_at < CATALOG_CACHE_TTL
+        )
+
+    @callback
+    def async_start(self) -> None:
+        """Warm the cache (disk, then network if expired) in the background."""
+        self.hass.async_create_background_task(self.async_get_index(), "ezbeq catalogue warm-up")
+
+    async def async_get_index(self, wait: bool = False) -> CatalogueIndex | None:
+        """
+        Return the current catalogue without waiting on the network.
+
+        A cold cache is filled from .storage (local disk only). If the copy is
+        missing or expired a background refresh is scheduled; only callers
+        passing wait=True (manual search) join it when there is no copy at all.
+        """
+        if self._index is None:
+            await self._async_ensure_persisted()
+        if not self.is_fresh():
+            self.async_schedule_refresh()
+            if wait and self._index is None and self._refresh_task is not None:
+                await asyncio.shield(self._refresh_task)
+        return self._index
+
+    @callback
+    def async_schedule_refresh(self) -> None:
+        """Start a background refresh unless one is running or recently failed."""
+        if self._refresh_task is not None:
+            return
+        if (
+            self.consecutive_failures
+            and self.last_refresh_at is not None
+            and time.time() - self.last_refresh_at < CATALOG_RETRY_INTERVAL
+        ):
+            return
+        self._refresh_task = self.hass.async_create_background_task(
+            self._async_refresh(), "ezbeq catalogue refresh"
+        )
+        self._refresh_task.add_done_callback(self._clear_refresh_task)
+        self._async_publish_status()
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call update_callback whenever the catalogue is replaced."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def _remove() -> None:
+            if update_callback in self._listeners:
+                self._listeners.remove(update_callback)
+
+        return _remove
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel any background work (config entry unload)."""
+        for task in (self._refresh_task, self._persisted_task):
+            if task is not None and not task.done():
+                task.cancel()
+        self._listeners.clear()
+
+    # ---------- internals ----------
+    @callback
+    def _clear_refresh_task(self, _task: asyncio.Task) -> None:
+        self._refresh_task = None
+        self._async_publish_status()
+
+    @property
+    def _body_path(self) -> str:
+        return self.hass.config.path(STORAGE_DIR, CATALOG_BODY_FILE)
+
+    async def _async_replace(
+        self,
+        items: list[CatalogueRecord],
+        fetched_at: float,
+        etag: str | None,
+        last_modified: str | None,
+    ) -> None:
+        """Build the indexes off the loop, then publish them."""
+        index = await self.hass.async_add_executor_job(CatalogueIndex, items)
+        self._async_publish(index, fetched_at, etag, last_modified)
+
+    @callback
+    def _async_publish(
+        self,
+        index: CatalogueIndex,
+        fetched_at: float,
+        etag: str | None,
+        last_modified: str | None,
+    ) -> None:
+        # The snapshot is complete before it becomes visible: one reference swap.
+        self.version += 1
+        index.version = self.version
+        self._index = index
+        self.fetched_at = fetched_at
+        self._etag = etag
+        self._last_modified = last_modified
+        _LOGGER.debug("BEQ catalogue replaced (version=%s, %d entries)", self.version, len(index))
+        for update_callback in list(self._listeners):
+            update_callback()
+        self._async_publish_status()
+
+    @callback
+    def _async_publish_status(self) -> None:
+        if self._index is None:
+            state = "unavailable"
+        elif self.is_fresh():
+            state = "fresh"
+        else:
+            state = "stale"
+        self.hass.states.async_set(
+            CATALOG_SENSOR_ID,
+            state,
+            {
+                "friendly_name": CATALOG_FRIENDLY_NAME,
+                "version": self.version,
+                "entries": len(self._index) if self._index is not None else 0,
+                "fetched_at": _utc_timestamp(self.fetched_at) if self.fetched_at else None,
+                "refreshing": self._refresh_task is not None,
+                "last_refresh": _utc_timestamp(self.last_refresh_at) if self.last_refresh_at else None,
+                "last_refresh_result": self.last_refresh_result,
+                "last_refresh_duration_ms": self.last_refresh_duration_ms,
+                "refresh_failures": self.refresh_failures,
+                "consecutive_failures": self.consecutive_failures,
+                "last_error": self.last_error,
+            },
+        )
+        self.hass.states.async_set(
+            CATALOG_AGE_SENSOR_ID,
+            dt_util.utc_from_timestamp(self.fetched_at).isoformat() if self.fetched_at else STATE_UNKNOWN,
+            {
+                "friendly_name": CATALOG_AGE_FRIENDLY_NAME,
+                "device_class": SensorDeviceClass.TIMESTAMP,
+            },
+        )
+
+
+    async def _async_ensure_persisted(self) -> None:
+        """Load .storage once; concurrent callers share the same load."""
+        if self._persisted_task is None:
+            self._persisted_task = self.hass.async_create_task(
+                self._async_load_persisted(), "ezbeq catalogue load"
+            )
+        await asyncio.shield(self._persisted_task)
+
+    async def _async_load_persisted(self) -> None:
+        """Populate from .storage (no-op if nothing usable)."""
+        meta = await self._meta_store.async_load()
+        if not meta:
+            return
+        items = await self.hass.async_add_executor_job(_read_body, self._body_path)
+        if items is None:
+            return
+        _LOGGER.debug(
+            "Loaded persisted BEQ catalogue (%d entries, fetched_at=%s)",
+            len(items),
+            meta.get("fetched_at"),
+        )
+        await self._async_replace(
+            items,
+            float(meta.get("fetched_at") or 0.0),
+            meta.get("etag"),
+            meta.get("last_modified"),
+        )
+
+    async def _async_save_meta(self) -> None:
+        await self._meta_store.async_save(
+            {
+                "fetched_at": self.fetched_at,
+                "etag": self._etag,
+                "last_modified": self._last_modified,
+            }
+        )
+
+    async def _async_refresh(self) -> None:
+        """Background job: revalidate/download and record the outcome."""
+        await self._async_ensure_persisted()
+        started = time.monotonic()
+        try:
+            self.last_refresh_result = await self._async_fetch()
+        except Exception as e:  # noqa: BLE001 - any failure keeps the old copy
+            _LOGGER.warning("Could not refresh BEQ catalogue (serving cached copy): %s", e)
+            self.refresh_failures += 1
+            self.consecutive_failures += 1
+            self.last_error = str(e)
+            self.last_refresh_result = "failed"
+        else:
+            self.consecutive_failures = 0
+            self.last_error = None
+        self.last_refresh_at = time.time()
+        self.last_refresh_duration_ms = round((time.monotonic() - started) * 1000, 1)
+
+    async def _async_fetch(self) -> str:
+        """Conditional GET; returns 'modified' or 'not_modified', raises on failure."""
+        headers: Dict[str, str] = {}
+        if self._index is not None:
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                headers["If-Modified-Since"] = self._last_modified
+
+        now = time.time()
+        session = async_get_clientsession(self.hass)
+        async with session.get(CATALOG_URL, headers=headers, timeout=CATALOG_FETCH_TIMEOUT) as resp:
+            if resp.status == 304 and self._index is not None:
+                _LOGGER.debug("BEQ catalogue not modified; keeping cached copy")
+                self.fetched_at = now
+                await self._async_save_meta()
+                return "not_modified"
+            resp.raise_for_status()
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+            items = await self._async_ingest(resp)
+
+        await self._async_replace(items, now, etag, last_modified)
+        await self._async_save_meta()
+        return "modified"
+
+    async def _async_ingest(self, resp: Any) -> list[CatalogueRecord]:
+        """
+        Parse the response record-by-record, straight into compact
+        CatalogueRecords, while spooling the raw bytes to .storage, so peak
+        memory stays close to the size of the parsed list. Decoding and
+        normalization run in the executor; the loop only moves chunks.
+        The persisted body is only replaced once the whole payload parsed.
+        """
+        path = self._body_path
+        tmp_path = f"{path}.tmp"
+        add_job = self.hass.async_add_executor_job
+        parser = _ArrayStreamParser()
+        items: list[CatalogueRecord] = []
+        complete = False
+        fh = await add_job(_open_spool, tmp_path)
+        try:
+            async for chunk in resp.content.iter_chunked(CATALOG_CHUNK_SIZE):
+                items.extend(await add_job(_spool_chunk, parser, fh, chunk))
+            items.extend(await add_job(_finish_records, parser))
+            complete = True
+        finally:
+            await add_job(fh.close)
+            if not complete:
+                await add_job(_discard, tmp_path)
+        await add_job(os.replace, tmp_path, path)
+        return items
@@ -8,10 +8,40 @@ from pyezbeq.consts import DEFAULT_PORT, DISCOVERY_ADDRESS
 from pyezbeq.ezbeq import EzbeqClient
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
 from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.selector import (
+    BooleanSelector,
+    EntitySelector,
+    EntitySelectorConfig,
+    NumberSelector,
+    NumberSelectorConfig,
+    NumberSelectorMode,
+    SelectSelector,
+    SelectSelectorConfig,
+    SelectSelectorMode,
+    TextSelector,
+    TextSelectorConfig,
+)
 
-from .const import DEFAULT_NAME, DOMAIN
+from ._http_log_proxy import DEFAULT_TRACE_SAMPLE_RATE, TRACE_LEVELS, TRACE_OFF
+from .const import (
+    CONF_HTTP_TRACE,
+    CONF_HTTP_TRACE_SAMPLE_RATE,
+    CONF_MEDIA_PLAYER,
+    CONF_PUSH_UPDATES,
+    CONF_SUBSTITUTION_RULES,
+    DEFAULT_NAME,
+    DOMAIN,
+)
+from .substitutions import parse_rules
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,6 +63,12 @@ class EzBEQConfigFlow(ConfigFlow, domain=DOMAIN):
         """Initialize the config flow."""
         self.ezbeq_data: dict[str, Any] = {}
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Create the options flow."""
+        return EzBEQOptionsFlow()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -72,3 +108,62 @@ class EzBEQConfigFlow(ConfigFlow, domain=DOMAIN):
             )
 
         return self.async_create_entry(title=DEFAULT_NAME, data=self.ezbeq_data)
+
+
+class EzBEQOptionsFlow(OptionsFlow):
+    """
+    Edit the codec substitution rules (YAML list; empty uses the file/defaults),
+    the HTTP trace level, websocket push updates and the media player that
+    drives the polling interval.
+    """
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            text = user_input.get(CONF_SUBSTITUTION_RULES, "")
+            try:
+                parse_rules(text)
+            except (HomeAssistantError, vol.Invalid) as e:
+                _LOGGER.error("Invalid substitution rules: %s", e)
+                errors[CONF_SUBSTITUTION_RULES] = "invalid_rules"
+            else:
+                return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_SUBSTITUTION_RULES,
+                        default=options.get(CONF_SUBSTITUTION_RULES, ""),
+                    ): TextSelector(TextSelectorConfig(multiline=True)),
+                    vol.Optional(
+                        CONF_HTTP_TRACE, default=options.get(CONF_HTTP_TRACE, TRACE_OFF)
+                    ): SelectSelector(
+                        SelectSelectorConfig(
+                            options=list(TRACE_LEVELS),
+                            translation_key=CONF_HTTP_TRACE,
+                            mode=SelectSelectorMode.DROPDOWN,
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_HTTP_TRACE_SAMPLE_RATE,
+                        default=options.get(CONF_HTTP_TRACE_SAMPLE_RATE, DEFAULT_TRACE_SAMPLE_RATE),
+                    ): NumberSelector(
+                        NumberSelectorConfig(min=0, max=1, step=0.01, mode=NumberSelectorMode.BOX)
+                    ),
+                    vol.Optional(
+                        CONF_PUSH_UPDATES, default=options.get(CONF_PUSH_UPDATES, True)
+                    ): BooleanSelector(),
+                    vol.Optional(
+                        CONF_MEDIA_PLAYER,
+                        description={"suggested_value": options.get(CONF_MEDIA_PLAYER)},
+                    ): EntitySelector(EntitySelectorConfig(domain="media_player")),
+                }
+            ),
+            errors=errors,
+        )
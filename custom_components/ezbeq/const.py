@@ -5,6 +5,13 @@ DEFAULT_PORT = 8080
 DEFAULT_NAME = "EzBEQ"
 STATE_UNLOADED = "unloaded"
 
+# Options
+CONF_SUBSTITUTION_RULES = "substitution_rules"
+CONF_HTTP_TRACE = "http_trace"
+CONF_HTTP_TRACE_SAMPLE_RATE = "http_trace_sample_rate"
+CONF_PUSH_UPDATES = "push_updates"
+CONF_MEDIA_PLAYER = "media_player"
+
 # Sensor data
 CURRENT_PROFILE = "current_profile"
 DEVICES = "devices"
@@ -1,7 +1,8 @@
 """Data coordinator for the ezbeq Profile Loader integration."""
 
-from datetime import timedelta
+from collections.abc import Callable, Hashable, Iterable, Mapping
 import logging
+import time
 from typing import Any
 
 from httpx import HTTPStatusError, RequestError
@@ -9,17 +10,38 @@ from pyezbeq.errors import DeviceInfoEmpty
 from pyezbeq.ezbeq import EzbeqClient
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, Event, EventStateChangedData, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from ._http_log_proxy import HttpTrace
+from .catalogue import CatalogueStore
+from .latency import LatencyStats
+from .polling import POLL_INTERVAL, PollPolicy
+from .push import DevicePush, websocket_url
+from .resolver import PreResolver, ResolutionCache
+from .scheduler import SlotScheduler
+from .snapshot import DevicesSnapshot
+from .substitutions import SubstitutionRules
+
 _LOGGER = logging.getLogger(__name__)
 
+# The server version rarely changes: check it on the first poll, then this often
+VERSION_CHECK_INTERVAL = 6 * 60 * 60
+
 # circular dependency if imported
 type EzBEQConfigEntry = ConfigEntry[EzBEQCoordinator]
 
 
-class EzBEQCoordinator(DataUpdateCoordinator[Any]):
-    """Coordinator for fetching ezbeq data."""
+class EzBEQCoordinator(DataUpdateCoordinator[DevicesSnapshot]):
+    """
+    Single poller of the ezBEQ server.
+
+    Each update is one GET /api/2/devices, parsed into a typed
+    DevicesSnapshot that the device sensors, the load idempotency check and
+    sensor.ezbeq_devices all read. pyezbeq's device_info is refreshed from the
+    same payload, so its loads target the devices seen here.
+    """
 
     config_entry: EzBEQConfigEntry
 
@@ -29,15 +51,151 @@ class EzBEQCoordinator(DataUpdateCoordinator[Any]):
             hass,
             _LOGGER,
             name="ezbeq",
-            update_interval=timedelta(seconds=30),
+            update_interval=POLL_INTERVAL,
         )
         self.client = client
+        # Adaptive update_interval (recent writes, media player, failures)
+        self.poll_policy = PollPolicy()
+        self.poll_reason = self.poll_policy.interval()[1]
+        self._media_player_unsub: CALLBACK_TYPE | None = None
+        # Called with the outcome of every poll/push; unlike coordinator
+        # listeners, also on each failure of a streak (heartbeat)
+        self._activity_listeners: list[Callable[[bool], None]] = []
+        # Websocket device state; polling only runs while it is disconnected
+        self.push = DevicePush(hass, self, websocket_url(client.server_url))
+        # Last full /api/2/devices payload, patched by pushed device states
+        self._devices_payload: dict[str, Any] = {}
+        # HTTP trace ring buffer of the client's HttpxLogProxy (options flow level)
+        self.http_trace = HttpTrace()
+        # Per-slot, latest-wins serialization of load/unload writes
+        self.scheduler = SlotScheduler()
+        # False from a write until a poll started after it (see devices_snapshot)
+        self._snapshot_current = False
+        self._writes = 0
+        self._version_checked_at: float | None = None
+        # (device, slot id) -> entry_key of the catalogue entry last loaded there
+        self.loaded_entries: dict[tuple[str, str], Hashable] = {}
+        # BEQ catalogue shared by the load and manual-search services
+        self.catalogue = CatalogueStore(hass)
+        # Compiled codec substitution rules, recompiled per catalogue version
+        self.substitution_rules = SubstitutionRules(hass, self.catalogue)
+        # Memoized resolutions (per catalogue version) and speculative
+        # resolution of the next load from the playback sensors
+        self.resolutions = ResolutionCache(self.catalogue)
+        self.pre_resolver = PreResolver(hass, self.catalogue, self.substitution_rules)
+        # Rolling per-stage latencies of load/unload calls
+        self.latency = LatencyStats(hass)
+
+    @property
+    def devices_snapshot(self) -> DevicesSnapshot | None:
+        """The latest snapshot, or None while a write may have made it stale."""
+        return self.data if self._snapshot_current else None
+
+    def invalidate_snapshot(self) -> None:
+        """A write was sent: don't trust the snapshot until the next poll."""
+        self._writes += 1
+        self._snapshot_current = False
+        self.poll_policy.note_write()
+        self._apply_poll_interval()
+
+    def note_slots_written(self, slots: Iterable[tuple[str, Any]], entry_key: Hashable | None) -> None:
+        """Remember the entry each (device, slot) now holds; None forgets it."""
+        for device, slot in slots:
+            if entry_key is None:
+                self.loaded_entries.pop((device, str(slot)), None)
+            else:
+                self.loaded_entries[(device, str(slot))] = entry_key
+
+    def set_push_connected(self, connected: bool) -> None:
+        """Stop polling while pushed updates arrive; resume when the socket drops."""
+        was_connected = self.poll_policy.push_connected
+        self.poll_policy.push_connected = connected
+        self._apply_poll_interval()
+        if was_connected and not connected:
+            # Pushed updates unscheduled the poll timer, and setting
+            # update_interval alone does not re-arm it
+            self._schedule_refresh()
+
+    @callback
+    def async_add_activity_listener(self, listener: Callable[[bool], None]) -> CALLBACK_TYPE:
+        """Call `listener(success)` after every poll or push; returns the remover."""
+        self._activity_listeners.append(listener)
+        return lambda: self._activity_listeners.remove(listener)
+
+    def _notify_activity(self, success: bool) -> None:
+        for listener in list(self._activity_listeners):
+            listener(success)
+
+    def _apply_poll_interval(self) -> None:
+        """Takes effect when the next refresh is scheduled (after any update)."""
+        self.update_interval, self.poll_reason = self.poll_policy.interval()
+
+    @callback
+    def async_follow_media_player(self, entity_id: str | None) -> None:
+        """Poll at the normal interval while `entity_id` is in use and slowly otherwise."""
+        if self._media_player_unsub is not None:
+            self._media_player_unsub()
+            self._media_player_unsub = None
+        self.poll_policy.media_state = None
+        if entity_id:
+            state = self.hass.states.get(entity_id)
+            self.poll_policy.media_state = state.state if state else "unavailable"
+            self._media_player_unsub = async_track_state_change_event(
+                self.hass, entity_id, self._async_media_player_changed
+            )
+        self._apply_poll_interval()
+
+    @callback
+    def _async_media_player_changed(self, event: Event[EventStateChangedData]) -> None:
+        new_state = event.data["new_state"]
+        self.poll_policy.media_state = new_state.state if new_state else "unavailable"
+        previous = self.update_interval
+        self._apply_poll_interval()
+        if self.update_interval is not None and self.update_interval != previous:
+            # poll now so the new interval is scheduled from here
+            self.hass.async_create_task(self.async_request_refresh())
+        else:
+            self._notify_activity(self.last_update_success)
+
+    @callback
+    def async_push_devices(self, devices: Mapping[str, Any]) -> None:
+        """Apply device state pushed by ezBEQ (all devices or just the changed ones)."""
+        payload = {**self._devices_payload, **devices}
+        self.client.update_device_data(payload)
+        self._devices_payload = payload
+        self._notify_activity(True)
+        self.async_set_updated_data(DevicesSnapshot.from_api(payload, self.client.version))
 
-    async def _async_update_data(self) -> None:
-        """Fetch data from the ezbeq API."""
+    async def _async_update_data(self) -> DevicesSnapshot:
+        """Fetch device state (and, rarely, the version) from the ezbeq API."""
+        writes = self._writes
         try:
-            await self.client.get_status()
-            await self.client.get_version()
-        except (DeviceInfoEmpty, HTTPStatusError, RequestError) as err:
-            _LOGGER.error("Error fetching ezbeq data: %s", err)
+            response = await self.client.client.get(f"{self.client.server_url}/api/2/devices")
+            response.raise_for_status()
+            data = response.json()
+            self.client.update_device_data(data)
+            if not self.client.device_info:
+                raise DeviceInfoEmpty("No devices found")
+            now = time.monotonic()
+            if (
+                self._version_checked_at is None
+                or now - self._version_checked_at >= VERSION_CHECK_INTERVAL
+            ):
+                await self.client.get_version()
+                self._version_checked_at = now
+        except (DeviceInfoEmpty, HTTPStatusError, RequestError, KeyError, TypeError, ValueError) as err:
+            # log the first failure of a streak; backoff keeps the rest quiet
+            log = _LOGGER.error if not self.poll_policy.failures else _LOGGER.debug
+            log("Error fetching ezbeq data: %s", err)
+            self._snapshot_current = False
+            self.poll_policy.note_result(False)
+            self._apply_poll_interval()
+            self._notify_activity(False)
             raise UpdateFailed(f"Error fetching ezbeq data: {err}") from err
+        # a write sent during this poll may not be reflected yet
+        self._snapshot_current = writes == self._writes
+        self._devices_payload = data
+        self.poll_policy.note_result(True)
+        self._apply_poll_interval()
+        self._notify_activity(True)
+        return DevicesSnapshot.from_api(data, self.client.version)
@@ -3,20 +3,20 @@ from __future__ import annotations
 
 import logging
 import time
-from typing import Any, Dict, List, Optional, Callable
-from datetime import timedelta
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Callable, Tuple
 
-from homeassistant.core import HomeAssistant, ServiceCall, CALLBACK_TYPE
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.util import dt as dt_util
 
 from .coordinator import EzBEQCoordinator
+from .snapshot import DevicesSnapshot
 
 _LOGGER = logging.getLogger(__name__)
 
 DEVICES_SENSOR_ID = "sensor.ezbeq_devices"
 DEVICES_FRIENDLY_NAME = "ezBEQ Devices"
-DEFAULT_REFRESH_INTERVAL_SECS = 120  # configurable when you call async_setup_devices
+HEARTBEAT_SENSOR_ID = "sensor.ezbeq_heartbeat"
+HEARTBEAT_FRIENDLY_NAME = "ezBEQ Heartbeat"
 
 
 # ---------- small utilities ----------
@@ -24,115 +24,139 @@ def _utc_timestamp() -> str:
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 
-def _safe_base_url(hass: HomeAssistant, domain: str) -> Optional[str]:
-    """Resolve base_url strictly from hass.data set in __init__.py."""
-    base_url = (hass.data.get(domain) or {}).get("base_url")
-    if not base_url:
-        return None
-    return str(base_url).rstrip("/")
-
-
-# ---------- attribute flatteners ----------
-def _flatten_slots(slots: List[dict]) -> Dict[str, Any]:
-    flat: Dict[str, Any] = {}
-    for slot in slots or []:
-        sid = str(slot.get("id") or "")
-        prefix = f"slot{sid}_"
-        flat[prefix + "active"] = bool(slot.get("active", False))
-        flat[prefix + "title"] = slot.get("last", "")
-        flat[prefix + "author"] = slot.get("author") or ""
-        flat[prefix + "can_activate"] = slot.get("canActivate")
-        flat[prefix + "inputs"] = slot.get("inputs")
-        flat[prefix + "outputs"] = slot.get("outputs")
-
-        for g in slot.get("gains") or []:
-            gid = str(g.get("id"))
-            flat[f"{prefix}input{gid}_gain"] = g.get("value")
-        for m in slot.get("mutes") or []:
-            mid = str(m.get("id"))
-            flat[f"{prefix}input{mid}_mute"] = m.get("value")
-    return flat
-
-
-def _active_slot(slots: List[dict]) -> Optional[dict]:
-    for slot in slots or []:
-        if slot.get("active"):
-            return slot
-    return None
-
-
-# ---------- core refresh routine (exported) ----------
-async def async_refresh_devices_sensor(
-    hass: HomeAssistant, coordinator: EzBEQCoordinator, domain: str
-) -> None:
-    """Fetch /api/1/devices and update the devices sensor."""
-    base_url = _safe_base_url(hass, domain)
-    if not base_url:
-        _LOGGER.warning("Cannot refresh devices sensor: base_url not found")
-        hass.states.async_set(
-            DEVICES_SENSOR_ID,
-            "unreachable",
-            {
-                "friendly_name": DEVICES_FRIENDLY_NAME,
-                "last_refreshed": _utc_timestamp(),
-                "reason": "base_url not available",
-            },
-        )
-        return
-
-    url = f"{base_url}/api/1/devices"
-    session = async_get_clientsession(hass)
-    try:
-        async with session.get(url, timeout=10) as resp:
-            resp.raise_for_status()
-            data = await resp.json(content_type=None)
-    except Exception as e:
-        _LOGGER.warning("Failed to fetch MiniDSP devices state: %s", e)
-        hass.states.async_set(
-            DEVICES_SENSOR_ID,
-            "unreachable",
-            {
-                "friendly_name": DEVICES_FRIENDLY_NAME,
-                "last_refreshed": _utc_timestamp(),
-                "reason": str(e),
-            },
-        )
-        return
-
-    slots = data.get("slots") or []
-    flat = _flatten_slots(slots)
-    active = _active_slot(slots)
+# ---------- idempotency ----------
+def profile_already_loaded(
+    snapshot: Optional[DevicesSnapshot],
+    loaded: Mapping[Tuple[str, str], Hashable],
+    entry_key: Hashable,
+    title: str,
+    author: str,
+    slot_ids: List[Any],
+) -> bool:
+    """
+    True if, on every device of the snapshot, each target slot already holds
+    `title` (and `author`, when the slot reports one), one of them is the
+    active slot, and this integration loaded exactly `entry_key` into each
+    (`loaded`, see EzBEQCoordinator.loaded_entries). Another edition or codec
+    of the same title has another key; a slot without a record is reloaded.
+    """
+    if not snapshot or not snapshot.devices or not title:
+        return False
+    want_title = title.strip().lower()
+    want_author = (author or "").strip().lower()
+    for device in snapshot.devices:
+        targets = [device.slot(sid) for sid in (slot_ids or [1])]
+        for slot in targets:
+            if slot is None or slot.last.strip().lower() != want_title:
+                return False
+            slot_author = slot.author.strip().lower()
+            if slot_author and want_author and slot_author != want_author:
+                return False
+            if loaded.get((device.name, slot.id)) != entry_key:
+                return False
+        if not any(slot.active for slot in targets):
+            return False
+    return True
+
+
+# ---------- sensor rendering ----------
+def _devices_attributes(snapshot: DevicesSnapshot) -> Tuple[str, Dict[str, Any]]:
+    """State and attributes (without last_refreshed) of sensor.ezbeq_devices for a non-empty snapshot."""
+    # The sensor describes the first device; others have their own entities.
+    device = snapshot.devices[0]
+    active = device.active_slot
 
     attrs: Dict[str, Any] = {
         "friendly_name": DEVICES_FRIENDLY_NAME,
-        "last_refreshed": _utc_timestamp(),
-        "device_type": data.get("type"),
-        "device_name": data.get("name"),
-        "master_volume": data.get("masterVolume"),
-        "mute": data.get("mute"),
-        "serials": data.get("serials") or [],
-        "slots_count": len(slots),
-        "active_slot_id": active.get("id") if active else "",
-        "active_slot_title": active.get("last") if active else "",
-        "active_slot_author": active.get("author") if active else "",
-        "active_slot_can_activate": active.get("canActivate") if active else None,
-        "active_slot_inputs": active.get("inputs") if active else None,
-        "active_slot_outputs": active.get("outputs") if active else None,
+        "device_type": device.type,
+        "device_name": device.name,
+        "devices": [d.name for d in snapshot.devices],
+        "master_volume": device.master_volume,
+        "mute": device.mute,
+        "serials": list(device.serials),
+        "slots_count": len(device.slots),
+        "active_slot_id": active.id if active else "",
+        "active_slot_title": active.last if active else "",
+        "active_slot_author": active.author if active else "",
+        "active_slot_can_activate": active.can_activate if active else None,
+        "active_slot_inputs": active.inputs if active else None,
+        "active_slot_outputs": active.outputs if active else None,
     }
 
     if active:
-        for g in active.get("gains") or []:
-            gid = str(g.get("id"))
-            attrs[f"active_slot_input{gid}_gain"] = g.get("value")
-        for m in active.get("mutes") or []:
-            mid = str(m.get("id"))
-            attrs[f"active_slot_input{mid}_mute"] = m.get("value")
+        for gid, value in active.gains:
+            attrs[f"active_slot_input{gid}_gain"] = value
+        for mid, value in active.mutes:
+            attrs[f"active_slot_input{mid}_mute"] = value
+
+    # Per-slot values (title, gains, mutes, raw payload) are their own entities.
+    return device.name or "online", attrs
+
+
+@callback
+def async_write_heartbeat(
+    hass: HomeAssistant, coordinator: EzBEQCoordinator, success: bool
+) -> None:
+    """Small per-update liveness record with the polling diagnostics."""
+    interval = coordinator.update_interval
+    hass.states.async_set(
+        HEARTBEAT_SENSOR_ID,
+        "online" if success else "unreachable",
+        {
+            "friendly_name": HEARTBEAT_FRIENDLY_NAME,
+            "last_poll": dt_util.utcnow().isoformat(),
+            # adaptive polling diagnostics (no interval while updates are pushed)
+            "poll_interval_s": interval.total_seconds() if interval else None,
+            "poll_reason": coordinator.poll_reason,
+            "consecutive_failures": coordinator.poll_policy.failures,
+        },
+    )
+
+
+def _devices_writer(hass: HomeAssistant, coordinator: EzBEQCoordinator) -> Callable[[], None]:
+    """
+    Coordinator listener for sensor.ezbeq_devices.
+
+    It is only rewritten when what it shows (compared structurally) or the
+    failure reason changes.
+    """
+    written: Any = None
+
+    @callback
+    def _write() -> None:
+        nonlocal written
+        snapshot = coordinator.data
+        if not coordinator.last_update_success or snapshot is None or not snapshot.devices:
+            reason = str(coordinator.last_exception or "no devices")
+            if written == reason:
+                return
+            written = reason
+            hass.states.async_set(
+                DEVICES_SENSOR_ID,
+                "unreachable",
+                {
+                    "friendly_name": DEVICES_FRIENDLY_NAME,
+                    "last_refreshed": _utc_timestamp(),
+                    "reason": reason,
+                },
+            )
+            return
+
+        rendered = _devices_attributes(snapshot)
+        if rendered == written:
+            return
+        written = rendered
+        state, attrs = rendered
+        hass.states.async_set(DEVICES_SENSOR_ID, state, {**attrs, "last_refreshed": _utc_timestamp()})
+
+    return _write
 
-    attrs.update(flat)
-    attrs["slots_raw"] = slots  # optional full payload
 
-    state = data.get("name") or "online"
-    hass.states.async_set(DEVICES_SENSOR_ID, state, attrs)
+async def async_refresh_devices_sensor(
+    hass: HomeAssistant, coordinator: EzBEQCoordinator, domain: str
+) -> None:
+    """Poll ezBEQ now; the devices sensor follows through its coordinator listener."""
+    await coordinator.async_refresh()
 
 
 # ---------- setup / teardown ----------
@@ -140,35 +164,29 @@ async def async_setup_devices(
     hass: HomeAssistant,
     coordinator: EzBEQCoordinator,
     domain: str,
-    update_interval_secs: int = DEFAULT_REFRESH_INTERVAL_SECS,
 ) -> Callable[[], None]:
     """
-    Register manual refresh service and start periodic refresh.
+    Register the manual refresh service and render the devices sensor and
+    heartbeat from coordinator updates (no poller of its own).
     Returns a cleanup function to cancel listeners/services.
     """
-    refresh_task: List[CALLBACK_TYPE] = []
 
     async def _manual_refresh_service(call: ServiceCall) -> None:
         await async_refresh_devices_sensor(hass, coordinator, domain)
 
     hass.services.async_register(domain, "refresh_devices_snapshot", _manual_refresh_service)
 
-    await async_refresh_devices_sensor(hass, coordinator, domain)
-
-    if update_interval_secs and update_interval_secs > 0:
-        refresh_task.append(
-            async_track_time_interval(
-                hass,
-                lambda now: hass.async_create_task(
-                    async_refresh_devices_sensor(hass, coordinator, domain)
-                ),
-                timedelta(seconds=update_interval_secs),
-            )
-        )
+    write_devices = _devices_writer(hass, coordinator)
+    remove_listener = coordinator.async_add_listener(write_devices)
+    remove_heartbeat = coordinator.async_add_activity_listener(
+        lambda success: async_write_heartbeat(hass, coordinator, success)
+    )
+    write_devices()
+    async_write_heartbeat(hass, coordinator, coordinator.last_update_success)
 
     def _unload() -> None:
         hass.services.async_remove(domain, "refresh_devices_snapshot")
-        for cancel in refresh_task:
-            cancel()
+        remove_listener()
+        remove_heartbeat()
 
     return _unload
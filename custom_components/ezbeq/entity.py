@@ -1,10 +1,14 @@
 """Base class for ezbeq entities."""
 
+from typing import Any
+
+from homeassistant.core import callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import EzBEQCoordinator
+from .snapshot import SlotState
 
 
 class EzBEQEntity(CoordinatorEntity[EzBEQCoordinator]):
@@ -27,3 +31,54 @@ class EzBEQEntity(CoordinatorEntity[EzBEQCoordinator]):
                 f"{coordinator.config_entry.entry_id}_{DOMAIN}",
             ),
         )
+
+
+class EzBEQSlotEntity(EzBEQEntity):
+    """
+    An entity for one slot of a device.
+
+    Coordinator updates only write state when this entity's own value (see
+    `_current`) changed, so a gain change on one slot doesn't rewrite every
+    other slot entity.
+    """
+
+    def __init__(
+        self, coordinator: EzBEQCoordinator, device_name: str, slot_id: str, key: str
+    ) -> None:
+        """Initialize the slot entity."""
+        super().__init__(coordinator, device_name)
+        self._device_name = device_name
+        self._slot_id = slot_id
+        self._attr_unique_id = (
+            f"{coordinator.config_entry.entry_id}_{device_name}_slot{slot_id}_{key}"
+        )
+        self._written: Any = None
+
+    @property
+    def slot(self) -> SlotState | None:
+        """This slot in the latest snapshot; None if the device no longer reports it."""
+        device = self.coordinator.data.device(self._device_name) if self.coordinator.data else None
+        return device.slot(self._slot_id) if device else None
+
+    @property
+    def available(self) -> bool:
+        """Return True if the last poll reported this slot."""
+        return super().available and self.slot is not None
+
+    def _current(self) -> Any:
+        """Everything this entity renders; compared between coordinator updates."""
+        return self.available
+
+    async def async_added_to_hass(self) -> None:
+        """Remember what the first write rendered."""
+        await super().async_added_to_hass()
+        self._written = self._current()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when this entity's value changed."""
+        current = self._current()
+        if current == self._written:
+            return
+        self._written = current
+        self.async_write_ha_state()
@@ -0,0 +1,110 @@
+"""Concurrent load/unload across several (device, slot) targets."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict, dataclass
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Sequence, Tuple
+from urllib.parse import quote
+
+from pyezbeq.ezbeq import EzbeqClient
+
+_LOGGER = logging.getLogger(__name__)
+
+# Concurrent MiniDSP writes in fan-out mode
+FANOUT_CONCURRENCY = 4
+
+type Target = Tuple[str, int]
+
+
+@dataclass(slots=True)
+class TargetResult:
+    """Outcome of one (device, slot) write."""
+
+    device: str
+    slot: int
+    success: bool
+    latency_ms: float
+    error: str | None = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def expand_targets(
+    client: EzbeqClient, devices: str | Sequence[str], slots: Iterable[Any]
+) -> List[Target]:
+    """(device, slot) pairs for the requested devices ("all" = every known device)."""
+    if isinstance(devices, str):
+        names = [d.name for d in client.device_info] if devices == "all" else [devices]
+    else:
+        names = list(dict.fromkeys(devices))
+    return [(name, int(slot)) for name in names for slot in dict.fromkeys(slots or [1])]
+
+
+async def async_fan_out(
+    targets: Sequence[Target],
+    write: Callable[[str, int], Awaitable[Any]],
+    limit: int = FANOUT_CONCURRENCY,
+) -> List[TargetResult]:
+    """Run write for every target, at most `limit` at a time; results keep target order."""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def _one(device: str, slot: int) -> TargetResult:
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                await write(device, slot)
+            except Exception as e:  # noqa: BLE001 - reported per target
+                _LOGGER.warning("Write to %s slot %s failed: %s", device, slot, e)
+                return TargetResult(device, slot, False, _elapsed_ms(started), str(e))
+            return TargetResult(device, slot, True, _elapsed_ms(started))
+
+    return list(await asyncio.gather(*(_one(device, slot) for device, slot in targets)))
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.monotonic() - started) * 1000, 1)
+
+
+def _require_known(client: EzbeqClient, device: str) -> None:
+    if not any(d.name == device for d in client.device_info):
+        raise ValueError(f"Unknown ezBEQ device '{device}'")
+
+
+def _load_gains(client: EzbeqClient, mv_adjust: float) -> List[float]:
+    """Input gains of a load: the proxy's override pair if set, else the MV adjustment."""
+    pair = getattr(client.client, "override_pair", None)
+    return [pair[0], pair[1]] if pair is not None else [mv_adjust, mv_adjust]
+
+
+async def async_load_slot(
+    client: EzbeqClient, device: str, slot: int, entry_id: str, mv_adjust: float
+) -> None:
+    """PATCH one slot of one device with a catalogue entry (same payload as pyezbeq)."""
+    _require_known(client, device)
+    payload = {
+        "slots": [
+            {
+                "id": str(slot),
+                "gains": _load_gains(client, mv_adjust),
+                "active": True,
+                "mutes": [False, False],
+                "entry": entry_id,
+            }
+        ]
+    }
+    response = await client.client.patch(
+        f"{client.server_url}/api/2/devices/{quote(device)}", json=payload, gains_applied=True
+    )
+    response.raise_for_status()
+
+
+async def async_unload_slot(client: EzbeqClient, device: str, slot: int) -> None:
+    """Clear the filter of one slot of one device."""
+    _require_known(client, device)
+    response = await client.client.delete(
+        f"{client.server_url}/api/1/devices/{quote(device)}/filter/{slot}"
+    )
+    response.raise_for_status()
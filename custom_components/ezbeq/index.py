@@ -0,0 +1,224 @@
+"""Lookup indexes over one version of the BEQ catalogue."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+import heapq
+from itertools import islice
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from .records import CatalogueRecord
+
+# Fuzzy title search: results below this trigram similarity are dropped.
+FUZZY_MIN_SCORE = 0.3
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def _norm(value: Any) -> str:
+    return str(value).strip().lower() if value is not None else ""
+
+
+def _trigrams(text: str) -> set[str]:
+    """Padded character trigrams of text with punctuation folded to spaces."""
+    words = _NON_WORD.sub(" ", text.lower()).strip()
+    if not words:
+        return set()
+    padded = f"  {words} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _freeze(index: Dict[Any, List[CatalogueRecord]]) -> Dict[Any, Tuple[CatalogueRecord, ...]]:
+    return {key: tuple(bucket) for key, bucket in index.items()}
+
+
+class CatalogueIndex:
+    """
+    Hash indexes built once per catalogue version.
+
+    - tmdb id -> entries
+    - (normalized title, year) -> entries
+    - (tmdb id, normalized codec, normalized edition) -> entries; every entry is
+      also filed under edition "" because an empty requested edition matches
+      any edition.
+    - a sorted array of normalized titles and alt titles for prefix search.
+    - a trigram -> title posting list index for ranked fuzzy title search.
+    - `codecs`: the normalized codec vocabulary of this version.
+
+    Buckets keep catalogue order, so "first match" results are identical to a
+    linear scan while each lookup only touches the matching entries.
+    """
+
+    __slots__ = (
+        "version",
+        "records",
+        "codecs",
+        "_by_tmdb",
+        "_by_title_year",
+        "_by_tmdb_codec_edition",
+        "_prefix_keys",
+        "_prefix_pos",
+        "_postings",
+        "_doc_pos",
+        "_doc_grams",
+    )
+
+    def __init__(self, records: Sequence[CatalogueRecord], version: int = 0) -> None:
+        self.version = version
+        self.records = records
+        by_tmdb: Dict[str, List[CatalogueRecord]] = {}
+        by_title_year: Dict[Tuple[str, str], List[CatalogueRecord]] = {}
+        by_tce: Dict[Tuple[str, str, str], List[CatalogueRecord]] = {}
+        for rec in records:
+            by_tmdb.setdefault(rec.tmdb_id, []).append(rec)
+            by_title_year.setdefault((rec.title_norm, rec.year_key), []).append(rec)
+            for codec in dict.fromkeys(rec.audio_types_norm):
+                by_tce.setdefault((rec.tmdb_id, codec, rec.edition_norm), []).append(rec)
+                if rec.edition_norm:
+                    by_tce.setdefault((rec.tmdb_id, codec, ""), []).append(rec)
+        self._by_tmdb = _freeze(by_tmdb)
+        self._by_title_year = _freeze(by_title_year)
+        self._by_tmdb_codec_edition = _freeze(by_tce)
+        self.codecs = frozenset(codec for _, codec, _ in by_tce)
+
+        # Parallel arrays: sorted normalized (alt) titles -> position in records.
+        # The key strings are the ones already held by the records.
+        titles: List[Tuple[str, int]] = []
+        for pos, rec in enumerate(records):
+            if rec.title_norm:
+                titles.append((rec.title_norm, pos))
+            if rec.alt_title_norm and rec.alt_title_norm != rec.title_norm:
+                titles.append((rec.alt_title_norm, pos))
+        titles.sort()
+        self._prefix_keys = [key for key, _ in titles]
+        self._prefix_pos = [pos for _, pos in titles]
+
+        # Each (alt) title is a document; postings hold document numbers.
+        postings: Dict[str, array] = {}
+        self._doc_pos = array("I")
+        self._doc_grams = array("H")
+        for key, pos in titles:
+            grams = _trigrams(key)
+            if not grams:
+                continue
+            doc = len(self._doc_pos)
+            self._doc_pos.append(pos)
+            self._doc_grams.append(min(len(grams), 0xFFFF))
+            for gram in grams:
+                plist = postings.get(gram)
+                if plist is None:
+                    plist = postings[gram] = array("I")
+                plist.append(doc)
+        self._postings = postings
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    # ---------- raw lookups ----------
+    def by_tmdb(self, tmdb: Any) -> Tuple[CatalogueRecord, ...]:
+        return self._by_tmdb.get(str(tmdb).strip(), ())
+
+    def find(self, tmdb: Any, codec: str | None, edition: str | None) -> Tuple[CatalogueRecord, ...]:
+        """Entries for tmdb carrying codec, restricted to edition unless it is blank."""
+        return self._by_tmdb_codec_edition.get((str(tmdb).strip(), _norm(codec), _norm(edition)), ())
+
+    def iter_prefix(self, prefixes: Iterable[str]) -> Iterator[CatalogueRecord]:
+        """
+        Yield entries whose title or alt title starts with any prefix.
+
+        Each prefix is a bisect range over the sorted title array, so the cost
+        is proportional to the entries consumed; stop iterating at your limit.
+        Entries come out in title order per prefix, each at most once.
+        """
+        keys = self._prefix_keys
+        seen: set[int] = set()
+        for prefix in dict.fromkeys(_norm(p) for p in prefixes):
+            if not prefix:
+                continue
+            i = bisect_left(keys, prefix)
+            while i < len(keys) and keys[i].startswith(prefix):
+                pos = self._prefix_pos[i]
+                i += 1
+                if pos not in seen:
+                    seen.add(pos)
+                    yield self.records[pos]
+
+    def iter_fuzzy(
+        self,
+        queries: Iterable[str],
+        min_score: float = FUZZY_MIN_SCORE,
+    ) -> Iterator[Tuple[float, CatalogueRecord]]:
+        """
+        Yield (score, record) pairs ranked by trigram similarity (Dice
+        coefficient) of their title or alt title to any query, best first.
+        Only the posting lists of the query trigrams are read, and entries are
+        popped from a heap, so stop iterating at your limit.
+        """
+        best: Dict[int, float] = {}
+        for query in dict.fromkeys(queries):
+            grams = _trigrams(query)
+            if not grams:
+                continue
+            shared: Dict[int, int] = {}
+            for gram in grams:
+                for doc in self._postings.get(gram, ()):
+                    shared[doc] = shared.get(doc, 0) + 1
+            n_query = len(grams)
+            for doc, count in shared.items():
+                score = 2.0 * count / (n_query + self._doc_grams[doc])
+                if score < min_score:
+                    continue
+                pos = self._doc_pos[doc]
+                if score > best.get(pos, 0.0):
+                    best[pos] = score
+        heap = [(-score, pos) for pos, score in best.items()]
+        heapq.heapify(heap)
+        while heap:
+            score, pos = heapq.heappop(heap)
+            yield round(-score, 3), self.records[pos]
+
+    def search_fuzzy(
+        self,
+        queries: Iterable[str],
+        limit: int,
+        min_score: float = FUZZY_MIN_SCORE,
+    ) -> List[Tuple[float, CatalogueRecord]]:
+        """Up to `limit` (score, record) pairs from iter_fuzzy, best first."""
+        return list(islice(self.iter_fuzzy(queries, min_score), limit))
+
+    # ---------- matchers used by the load path ----------
+    def match(
+        self,
+        tmdb: Any,
+        codec: str | None,
+        edition: str | None,
+        year: Any,
+        title: str | None,
+    ) -> CatalogueRecord | None:
+        """tmdb+codec+edition first, then title+year+codec+edition."""
+        for rec in self.find(tmdb, codec, edition):
+            return rec
+        codec_norm = _norm(codec)
+        edition_norm = _norm(edition)
+        for rec in self._by_title_year.get((_norm(title), str(year).strip()), ()):
+            if rec.has_codec(codec_norm) and rec.edition_matches(edition_norm):
+                return rec
+        return None
+
+    def match_preferring_author(
+        self,
+        tmdb: Any,
+        codec: str | None,
+        edition: str | None,
+        preferred_author: str | None,
+    ) -> CatalogueRecord | None:
+        """tmdb+codec+edition restricted to preferred_author (if given)."""
+        author_norm = _norm(preferred_author)
+        for rec in self.find(tmdb, codec, edition):
+            if rec.author_matches(author_norm):
+                return rec
+        return None
+
+    def has_codec(self, tmdb: Any, edition: str | None, codec: str | None) -> bool:
+        return bool(self.find(tmdb, codec, edition))
@@ -0,0 +1,106 @@
+"""Per-stage timing of load/unload calls and their rolling percentiles."""
+from __future__ import annotations
+
+from collections import defaultdict, deque
+from contextlib import contextmanager
+import math
+import time
+from typing import Deque, Dict, Iterator, Mapping, Sequence, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+
+LATENCY_SENSOR_ID = "sensor.ezbeq_latency"
+LATENCY_FRIENDLY_NAME = "ezBEQ Latency"
+
+# Samples kept per (operation, stage) for the percentiles
+LATENCY_WINDOW = 100
+PERCENTILES = (50, 95, 99)
+
+# Stages reported for every call, 0 when skipped (a cached catalogue shows
+# up as catalogue_ms dropping to zero)
+LOAD_STAGES = ("catalogue", "match", "queue", "ezbeq", "substitution")
+UNLOAD_STAGES = ("queue", "ezbeq")
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+class StageTimer:
+    """Monotonic wall time spent in each stage of one service call."""
+
+    def __init__(self, stages: Sequence[str] = ()) -> None:
+        self.started = time.monotonic()
+        self._seconds: Dict[str, float] = dict.fromkeys(stages, 0.0)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Add the time spent in the with-block to `name` (stages may repeat)."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, time.monotonic() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        self._seconds[name] = self._seconds.get(name, 0.0) + seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        """Stage -> ms, plus `total` (wall time since the timer started)."""
+        durations = {name: _ms(s) for name, s in self._seconds.items()}
+        durations["total"] = _ms(time.monotonic() - self.started)
+        return durations
+
+
+def percentile(sorted_samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    rank = max(1, math.ceil(pct / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+class LatencyStats:
+    """
+    Rolling per-stage latencies of the last LATENCY_WINDOW calls, published
+    as p50/p95/p99 attributes of LATENCY_SENSOR_ID (e.g. load_ezbeq_p95_ms).
+    """
+
+    def __init__(self, hass: HomeAssistant, window: int = LATENCY_WINDOW) -> None:
+        self.hass = hass
+        self.window = window
+        self.counts: Dict[str, int] = defaultdict(int)
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+
+    @callback
+    def record(self, operation: str, durations: Mapping[str, float], count: bool = True) -> None:
+        """Add one call's stage durations (ms); count=False for late stages of a call."""
+        for stage, ms in durations.items():
+            samples = self._samples.get((operation, stage))
+            if samples is None:
+                samples = self._samples[(operation, stage)] = deque(maxlen=self.window)
+            samples.append(ms)
+        if count:
+            self.counts[operation] += 1
+        self._publish(operation, durations)
+
+    def stats(self) -> Dict[str, float]:
+        out: Dict[str, float] = {}
+        for (operation, stage), samples in sorted(self._samples.items()):
+            ordered = sorted(samples)
+            for pct in PERCENTILES:
+                out[f"{operation}_{stage}_p{pct}_ms"] = percentile(ordered, pct)
+        return out
+
+    def _publish(self, operation: str, durations: Mapping[str, float]) -> None:
+        current = self.hass.states.get(LATENCY_SENSOR_ID)
+        state = durations.get("total", current.state if current is not None else 0)
+        self.hass.states.async_set(
+            LATENCY_SENSOR_ID,
+            state,
+            {
+                "friendly_name": LATENCY_FRIENDLY_NAME,
+                "unit_of_measurement": "ms",
+                "window": self.window,
+                **{f"{op}_samples": n for op, n in self.counts.items()},
+                **self.stats(),
+            },
+        )
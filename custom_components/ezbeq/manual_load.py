@@ -8,10 +8,10 @@ from typing import Any, Dict, List, Tuple
 
 from homeassistant.core import HomeAssistant, ServiceCall, callback
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.event import async_track_state_change_event  # NEW
 
+from .catalogue import CatalogueStore
 from .const import (
     DOMAIN,
     SENSOR_TMDB_IDS,
@@ -21,13 +21,17 @@ from .const import (
     SENSOR_STATUS,
     SIGNAL_UPDATE_SELECT,
 )
+from .index import CatalogueIndex
+from .records import CatalogueRecord
 
 _LOGGER = logging.getLogger(__name__)
 
-CATALOG_URL = "https://beqcatalogue.readthedocs.io/en/latest/database.json"
-CATALOG_CACHE_TTL = 7 * 24 * 3600  # 1 week
 DEFAULT_LIMIT = 10  # How many candidates to expose
 
+# find_candidates title matching: exact prefixes, or ranked trigram similarity
+SEARCH_MODE_PREFIX = "prefix"
+SEARCH_MODE_FUZZY = "fuzzy"
+
 
 # ---------- Helpers ----------
 def _signal_name(entry_id: str) -> str:
@@ -42,48 +46,20 @@ def _normalize(value: str | None) -> str:
     return (value or "").strip().lower()
 
 
-def _starts_with_any(text: str, prefixes: List[str]) -> bool:
-    t = _normalize(text)
-    return any(t.startswith(_normalize(p)) for p in prefixes if p)
-
-
-def _as_list(value: Any) -> List[str]:
-    """Coerce value to a list of strings (may split strings into characters for images)."""
-    if value is None:
-        return []
-    if isinstance(value, list):
-        return [str(v) for v in value if v is not None]
-    if isinstance(value, tuple):
-        return [str(v) for v in value if v is not None]
-    return [str(value)]
-
-
-def _as_list_strict(value: Any) -> List[str]:
-    """Normalize to a list of strings; never explode a string into characters."""
-    if value is None:
-        return []
-    if isinstance(value, (list, tuple)):
-        return [str(v).strip() for v in value if v is not None and str(v).strip()]
-    if isinstance(value, str):
-        parsed = _parse_values(value)
-        return parsed if parsed else ([value.strip()] if value.strip() else [])
-    return [str(value).strip()] if str(value).strip() else []
-
-
-def _candidate_key(item: Dict[str, Any], audio: str | None) -> str:
+def _candidate_key(item: CatalogueRecord, audio: str | None) -> str:
     return "|".join(
         [
-            str(item.get("theMovieDB", "")).strip(),
-            item.get("title", "").strip(),
-            item.get("edition", "").strip(),
+            item.tmdb_id,
+            item.title.strip(),
+            item.edition,
             (audio or "").strip(),
-            item.get("author") if isinstance(item.get("author"), str) else ",".join(item.get("author", []) or []),
+            ",".join(item.authors),
         ]
     )
 
 
-def _first_image(item: Dict[str, Any]) -> Tuple[str | None, str | None]:
-    imgs = _as_list(item.get("images"))
+def _first_image(item: CatalogueRecord) -> Tuple[str | None, str | None]:
+    imgs = item.images
     if not imgs:
         return None, None
     if len(imgs) == 1:
@@ -154,59 +130,28 @@ def _set_status(
     _set_sensor(hass, SENSOR_STATUS, stage, **attrs)
 
 
-# ---------- Catalogue fetch ----------
-async def _get_catalog_items(hass: HomeAssistant, domain: str) -> list[dict] | None:
-    domain_cache = hass.data.setdefault(domain, {})
-    cache = domain_cache.get("catalog_cache")
-    now = time.time()
-    items = None
-    if cache and (now - cache["ts"] < CATALOG_CACHE_TTL):
-        items = cache["items"]
-
-    if items is None:
-        session = async_get_clientsession(hass)
-        try:
-            async with session.get(CATALOG_URL, timeout=15) as resp:
-                resp.raise_for_status()
-                data = await resp.json(content_type=None)
-        except Exception as e:
-            _LOGGER.warning("Could not fetch BEQ catalogue: %s", e)
-            return None
-
-        if isinstance(data, list):
-            items = data
-        elif isinstance(data, dict):
-            items = data.get("titles") or list(data.values())
-        else:
-            return None
-
-        domain_cache["catalog_cache"] = {"ts": now, "items": items}
-    return items
-
-
 # ---------- Search + build candidates ----------
 def _build_candidates(
-    items: List[Dict[str, Any]],
+    catalog: CatalogueIndex,
     tmdb_ids: List[str],
     title_prefixes: List[str],
     limit: int,
+    mode: str = SEARCH_MODE_PREFIX,
 ) -> List[Dict[str, Any]]:
-    tmdb_ids_norm = {tid.strip() for tid in tmdb_ids if tid.strip()}
+    tmdb_ids_norm = list(dict.fromkeys(tid.strip() for tid in tmdb_ids if tid.strip()))
     prefixes_norm = [_normalize(p) for p in title_prefixes if p.strip()]
 
     results: List[Dict[str, Any]] = []
     seen_keys = set()
 
-    def add_item(item: Dict[str, Any]):
-        audio_types_list = _as_list_strict(item.get("audioTypes"))
-        if not audio_types_list:
-            audio_types_list = [""]
+    def add_item(item: CatalogueRecord, score: float | None = None):
+        audio_types_list = list(item.audio_types) or [""]
         audio_types_text = ", ".join(audio_types_list)
 
-        genres_list = _as_list_strict(item.get("genres") or item.get("genre"))
+        genres_list = list(item.genres)
         genres_text = ", ".join(genres_list)
 
-        edition_raw = item.get("edition", "") or ""
+        edition_raw = item.edition
         edition_display = edition_raw if edition_raw else "—"
 
         for audio in audio_types_list:
@@ -215,56 +160,62 @@ def _build_candidates(
                 continue
             seen_keys.add(key)
             img1, img2 = _first_image(item)
-            author = item.get("author") or item.get("authors") or ""
-            if isinstance(author, list):
-                author = ", ".join(a for a in author if a)
+            author = item.author
             results.append(
                 {
                     "key": key,
-                    "label": f"{item.get('title','?')} ({item.get('year','?')}) • {edition_display} • {audio or 'Unknown'} • {author or 'n/a'}",
-                    "tmdb_id": item.get("theMovieDB", ""),
-                    "title": item.get("title", ""),
-                    "alt_title": item.get("altTitle", ""),
-                    "year": item.get("year"),
+                    "label": f"{item.title or '?'} ({item.year if item.year is not None else '?'}) • {edition_display} • {audio or 'Unknown'} • {author or 'n/a'}",
+                    "tmdb_id": item.tmdb_id,
+                    "title": item.title,
+                    "alt_title": item.alt_title,
+                    "year": item.year,
                     "edition": edition_raw,
                     "edition_display": edition_display,
                     "audio_type": audio,
                     "audio_types": audio_types_list,
                     "audio_types_text": audio_types_text,
                     "author": author,
-                    "mv": item.get("mv"),
-                    "warning": item.get("warning", ""),
-                    "note": item.get("note", ""),
+                    "mv": item.mv,
+                    "warning": item.warning,
+                    "note": item.note,
                     "image1": img1,
                     "image2": img2,
-                    "source": item.get("source", ""),
-                    "content_type": item.get("content_type", ""),
-                    "language": item.get("language", ""),
+                    "source": item.source,
+                    "content_type": item.content_type,
+                    "language": item.language,
                     "genres": genres_list,
                     "genres_text": genres_text,
+                    **({"match_score": score} if score is not None else {}),
                 }
             )
 
-    if tmdb_ids_norm:
-        for item in items:
-            if str(item.get("theMovieDB", "")).strip() in tmdb_ids_norm:
-                add_item(item)
+    for tmdb_id in tmdb_ids_norm:
+        for item in catalog.by_tmdb(tmdb_id):
+            add_item(item)
 
-    if prefixes_norm and len(results) < limit:
-        for item in items:
+    if prefixes_norm and len(results) < limit and mode == SEARCH_MODE_FUZZY:
+        # Entries expand to one row per audio type and rows are deduplicated,
+        # so keep consuming the ranking until `limit` rows are filled
+        for score, item in catalog.iter_fuzzy(prefixes_norm):
+            if len(results) >= limit:
+                break
+            add_item(item, score)
+    elif prefixes_norm and len(results) < limit:
+        for item in catalog.iter_prefix(prefixes_norm):
             if len(results) >= limit:
                 break
-            title = item.get("title", "")
-            alt_title = item.get("altTitle", "")
-            if _starts_with_any(title, prefixes_norm) or _starts_with_any(alt_title, prefixes_norm):
-                add_item(item)
+            add_item(item)
 
     return results[:limit]
 
 
 # ---------- Services ----------
 async def _service_find_candidates(
-    hass: HomeAssistant, call: ServiceCall, domain: str, entry_id: str
+    hass: HomeAssistant,
+    call: ServiceCall,
+    domain: str,
+    entry_id: str,
+    catalogue: CatalogueStore,
 ) -> None:
     domain_entry = hass.data.setdefault(domain, {}).setdefault(
         entry_id, {"candidate_options": ["none"], "selected_label": "none", "last_candidates": {}}
@@ -284,6 +235,11 @@ async def _service_find_candidates(
     tmdb_found = tmdb_raw is not None
     title_found = title_raw is not None
 
+    mode = call.data.get("mode", SEARCH_MODE_PREFIX)
+    if mode not in (SEARCH_MODE_PREFIX, SEARCH_MODE_FUZZY):
+        _set_status(hass, "error", reason=f"Unknown search mode '{mode}'")
+        raise HomeAssistantError(f"Unknown search mode '{mode}'")
+
     if not tmdb_ids and not titles:
         _set_status(
             hass,
@@ -310,13 +266,13 @@ async def _service_find_candidates(
         title_count=len(titles),
     )
 
-    catalog = await _get_catalog_items(hass, domain)
+    catalog = await catalogue.async_get_index(wait=True)
     if not catalog:
         _set_status(hass, "catalog_unavailable", reason="Failed to fetch BEQ catalogue")
         raise HomeAssistantError("Catalogue unavailable; cannot search.")
 
     limit = call.data.get("limit", DEFAULT_LIMIT)
-    candidates = _build_candidates(catalog, tmdb_ids, titles, limit)
+    candidates = _build_candidates(catalog, tmdb_ids, titles, limit, mode)
 
     domain_entry["last_candidates"] = {c["key"]: c for c in candidates}
 
@@ -330,6 +286,7 @@ async def _service_find_candidates(
             "no_candidates",
             reason="No matches for provided TMDB IDs or title prefixes",
             candidates=0,
+            mode=mode,
             tmdb_count=len(tmdb_ids),
             title_count=len(titles),
         )
@@ -356,6 +313,7 @@ async def _service_find_candidates(
         reason="Candidates available",
         candidates=len(candidates),
         selected=selected,
+        mode=mode,
         tmdb_count=len(tmdb_ids),
         title_count=len(titles),
     )
@@ -446,6 +404,7 @@ async def _service_load_selected_candidate(
         "preferred_author": attrs.get("author", ""),
         "slots": call.data.get("slots") or [1],
         "enable_audio_codec_substitutions": call.data.get("enable_audio_codec_substitutions", False),
+        "force": call.data.get("force", False),
         "manual_load": True,
     }
 
@@ -513,7 +472,7 @@ async def async_setup_manual_load(hass: HomeAssistant, coordinator: Any, domain:
         _set_status(hass, "disabled", reason="Search toggle is off")
 
     async def handle_find(call: ServiceCall) -> None:
-        await _service_find_candidates(hass, call, domain, entry_id)
+        await _service_find_candidates(hass, call, domain, entry_id, coordinator.catalogue)
 
     async def handle_select(call: ServiceCall) -> None:
         await _service_select_candidate(hass, call, domain, entry_id)
@@ -533,8 +492,11 @@ async def async_unload_manual_load(hass: HomeAssistant, domain: str) -> None:
     hass.services.async_remove(domain, "select_candidate")
     hass.services.async_remove(domain, "load_selected_candidate")
 
-    # Unsubscribe toggle listener if present
+    # Unsubscribe toggle listener if present (hass.data[domain] also holds
+    # non-entry values such as base_url and devices_cleanup)
     for domain_entry in hass.data.get(domain, {}).values():
+        if not isinstance(domain_entry, dict):
+            continue
         unsub = domain_entry.pop("toggle_unsub", None)
         if unsub:
             unsub()
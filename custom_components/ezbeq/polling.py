@@ -0,0 +1,74 @@
+"""Adaptive polling interval for the coordinator.
+
+Polls fast for a short window after a load/unload, at the normal interval
+while something is happening, slowly when idle, and backs off exponentially
+while ezBEQ keeps failing. Not used while the websocket pushes updates.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import timedelta
+import time
+
+FAST_POLL_INTERVAL = timedelta(seconds=5)
+# How long after a write to poll at FAST_POLL_INTERVAL (seconds)
+FAST_POLL_WINDOW = 60.0
+POLL_INTERVAL = timedelta(seconds=30)
+IDLE_POLL_INTERVAL = timedelta(minutes=5)
+# Without a media player, no write for this long (seconds) counts as idle
+IDLE_AFTER = 15 * 60.0
+MAX_BACKOFF_INTERVAL = timedelta(minutes=15)
+
+# Media player states that mean the theatre is in use
+ACTIVE_MEDIA_STATES = frozenset({"playing", "paused", "buffering", "on"})
+
+REASON_PUSH = "push"
+REASON_BACKOFF = "backoff"
+REASON_RECENT_WRITE = "recent_write"
+REASON_MEDIA_ACTIVE = "media_player_active"
+REASON_MEDIA_IDLE = "media_player_idle"
+REASON_ACTIVE = "active"
+REASON_IDLE = "idle"
+
+
+class PollPolicy:
+    """Picks the next poll interval, and why, from recent activity and failures."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self.push_connected = False
+        self.failures = 0
+        # None: no media player configured
+        self.media_state: str | None = None
+        self._last_write: float | None = None
+        self._last_activity = clock()
+
+    def note_write(self) -> None:
+        """A load/unload was sent."""
+        self._last_write = self._last_activity = self._clock()
+
+    def note_result(self, success: bool) -> None:
+        """Record the outcome of a poll."""
+        self.failures = 0 if success else self.failures + 1
+
+    def interval(self) -> tuple[timedelta | None, str]:
+        """(update_interval, reason); None while updates are pushed."""
+        if self.push_connected:
+            return None, REASON_PUSH
+        base, reason = self._base()
+        if self.failures:
+            backoff = base * (2 ** min(self.failures, 10))
+            return min(backoff, MAX_BACKOFF_INTERVAL), REASON_BACKOFF
+        return base, reason
+
+    def _base(self) -> tuple[timedelta, str]:
+        now = self._clock()
+        if self._last_write is not None and now - self._last_write < FAST_POLL_WINDOW:
+            return FAST_POLL_INTERVAL, REASON_RECENT_WRITE
+        if self.media_state is not None:
+            if self.media_state in ACTIVE_MEDIA_STATES:
+                return POLL_INTERVAL, REASON_MEDIA_ACTIVE
+            return IDLE_POLL_INTERVAL, REASON_MEDIA_IDLE
+        if now - self._last_activity < IDLE_AFTER:
+            return POLL_INTERVAL, REASON_ACTIVE
+        return IDLE_POLL_INTERVAL, REASON_IDLE
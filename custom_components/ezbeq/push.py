@@ -0,0 +1,146 @@
+"""Push device updates from ezBEQ's websocket into the coordinator.
+
+While the socket is up, every device state message ezBEQ broadcasts is
+applied with `async_set_updated_data` and the coordinator stops polling.
+When it drops, polling resumes and the socket is reconnected with an
+exponential backoff.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+if TYPE_CHECKING:
+    from .coordinator import EzBEQCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+PUSH_PATH = "/ws"
+PUSH_HEARTBEAT = 30  # seconds between websocket pings
+PUSH_BACKOFF_INITIAL = 1.0
+PUSH_BACKOFF_MAX = 60.0
+
+# ezBEQ wraps broadcasts as {"message": <type>, "data": ...}
+DEVICE_STATE_MESSAGE = "DeviceState"
+
+
+def websocket_url(server_url: str) -> str:
+    """ezBEQ's websocket URL for an http(s)://host:port server URL."""
+    scheme, sep, rest = server_url.partition("://")
+    ws_scheme = "wss" if scheme.lower() == "https" else "ws"
+    return f"{ws_scheme}://{rest.rstrip('/')}{PUSH_PATH}" if sep else f"ws://{server_url}{PUSH_PATH}"
+
+
+def devices_from_message(message: Any) -> dict[str, Any] | None:
+    """
+    Devices ({name: device}) carried by a websocket message, or None.
+
+    Accepts a DeviceState envelope or a bare payload, holding either one
+    device or the same {name: device} mapping as /api/2/devices.
+    """
+    if isinstance(message, Mapping) and "message" in message:
+        if message.get("message") != DEVICE_STATE_MESSAGE:
+            return None
+        message = message.get("data")
+    if not isinstance(message, Mapping):
+        return None
+    if isinstance(message.get("slots"), list) and message.get("name"):
+        return {message["name"]: dict(message)}
+    devices = {
+        name: dict(device)
+        for name, device in message.items()
+        if isinstance(device, Mapping) and isinstance(device.get("slots"), list)
+    }
+    return devices or None
+
+
+class DevicePush:
+    """Websocket subscription to ezBEQ device state, with reconnect backoff."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: EzBEQCoordinator,
+        url: str,
+        session: aiohttp.ClientSession | None = None,
+    ) -> None:
+        self._hass = hass
+        self._coordinator = coordinator
+        self.url = url
+        self._session = session
+        self._task: asyncio.Task[None] | None = None
+        self.connected = False
+        self.messages = 0
+
+    @callback
+    def async_start(self) -> None:
+        """Start the subscription loop (no-op if running)."""
+        if self._task is not None:
+            return
+        self._task = self._hass.async_create_background_task(
+            self._async_run(), "ezbeq device push"
+        )
+
+    async def async_stop(self) -> None:
+        """Stop the subscription; the coordinator goes back to polling."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._set_connected(False)
+
+    async def _async_run(self) -> None:
+        delay = PUSH_BACKOFF_INITIAL
+        session = self._session or async_get_clientsession(self._hass)
+        while True:
+            try:
+                async with session.ws_connect(self.url, heartbeat=PUSH_HEARTBEAT) as ws:
+                    _LOGGER.debug("Subscribed to ezBEQ device state at %s", self.url)
+                    delay = PUSH_BACKOFF_INITIAL
+                    self._set_connected(True)
+                    # catch up on anything that changed while disconnected
+                    await self._coordinator.async_refresh()
+                    async for msg in ws:
+                        if msg.type is aiohttp.WSMsgType.TEXT:
+                            self._handle(msg.data)
+                        elif msg.type is aiohttp.WSMsgType.ERROR:
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:  # keep reconnecting whatever went wrong
+                _LOGGER.debug("ezBEQ websocket %s unavailable: %s", self.url, err)
+            if self.connected:
+                _LOGGER.info("ezBEQ websocket closed; polling until it is back")
+                self._set_connected(False)
+                await self._coordinator.async_refresh()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, PUSH_BACKOFF_MAX)
+
+    def _handle(self, text: str) -> None:
+        try:
+            devices = devices_from_message(json.loads(text))
+        except ValueError:
+            _LOGGER.debug("Ignoring non-JSON websocket message: %.200s", text)
+            return
+        if devices is None:
+            return
+        self.messages += 1
+        try:
+            self._coordinator.async_push_devices(devices)
+        except (KeyError, IndexError, TypeError, ValueError) as err:
+            _LOGGER.debug("Ignoring malformed device state message: %s", err)
+
+    def _set_connected(self, connected: bool) -> None:
+        self.connected = connected
+        self._coordinator.set_push_connected(connected)
@@ -0,0 +1,130 @@
+"""Compact in-memory representation of BEQ catalogue entries."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+import sys
+from typing import Any, Dict, Tuple
+
+
+def _norm(value: Any) -> str:
+    return str(value).strip().lower() if value is not None else ""
+
+
+def _text(value: Any) -> str:
+    return str(value) if value is not None else ""
+
+
+def _intern(value: Any) -> str:
+    """Intern short, highly repeated values (codecs, authors, languages...)."""
+    return sys.intern(str(value).strip()) if value is not None else ""
+
+
+def _strings(value: Any, intern: bool = False) -> Tuple[str, ...]:
+    """Coerce a scalar or list into a tuple of non-empty strings."""
+    if value is None:
+        return ()
+    if not isinstance(value, (list, tuple)):
+        value = [value]
+    out = []
+    for v in value:
+        if v is None or not str(v).strip():
+            continue
+        out.append(_intern(v) if intern else str(v).strip())
+    return tuple(out)
+
+
+@dataclass(frozen=True, slots=True, kw_only=True, eq=False)
+class CatalogueRecord:
+    """
+    One BEQ catalogue entry, reduced to the fields this integration reads.
+
+    Match keys (`*_norm`, `tmdb_id`, `year_key`) are normalized once at
+    ingestion so the matchers only do plain string comparisons, and values
+    that repeat across thousands of entries are interned.
+    """
+
+    tmdb_id: str
+    title: str
+    title_norm: str
+    alt_title: str
+    alt_title_norm: str
+    year: Any
+    year_key: str
+    edition: str
+    edition_norm: str
+    audio_types: Tuple[str, ...]
+    audio_types_norm: Tuple[str, ...]
+    authors: Tuple[str, ...]
+    authors_norm: Tuple[str, ...]
+    author: str
+    source: str
+    content_type: str
+    language: str
+    mv: Any
+    warning: str
+    note: str
+    images: Tuple[str, ...]
+    runtime: Any
+    genres: Tuple[str, ...]
+    created_at: Any
+
+    @classmethod
+    def from_dict(cls, item: Dict[str, Any]) -> CatalogueRecord:
+        audio_types = _strings(item.get("audioTypes"), intern=True)
+        author_raw = item.get("author") or item.get("authors") or ""
+        if isinstance(author_raw, (list, tuple)):
+            authors = _strings(author_raw, intern=True)
+        else:
+            authors = (_intern(author_raw),) if str(author_raw).strip() else ()
+        edition = _intern(item.get("edition") or "")
+        title = _text(item.get("title") or "")
+        alt_title = _text(item.get("altTitle") or "")
+        tmdb_raw = item.get("theMovieDB")
+        return cls(
+            tmdb_id=str(tmdb_raw).strip() if tmdb_raw is not None else "",
+            title=title,
+            title_norm=_norm(title),
+            alt_title=alt_title,
+            alt_title_norm=_norm(alt_title),
+            year=item.get("year"),
+            year_key=str(item.get("year", "")).strip(),
+            edition=edition,
+            edition_norm=sys.intern(edition.lower()),
+            audio_types=audio_types,
+            audio_types_norm=tuple(sys.intern(a.lower()) for a in audio_types),
+            authors=authors,
+            authors_norm=tuple(sys.intern(a.lower()) for a in authors),
+            author=", ".join(authors),
+            source=_intern(item.get("source") or ""),
+            content_type=_intern(item.get("content_type") or ""),
+            language=_intern(item.get("language") or ""),
+            mv=item.get("mv"),
+            warning=_text(item.get("warning") or ""),
+            note=_text(item.get("note") or ""),
+            images=_strings(item.get("images")),
+            runtime=item.get("runtime"),
+            genres=_strings(item.get("genres") or item.get("genre"), intern=True),
+            created_at=item.get("created_at"),
+        )
+
+    @property
+    def entry_key(self) -> Tuple[Any, ...]:
+        """Identity of the catalogue entry: edition/codec variants of one title differ."""
+        return (
+            self.tmdb_id,
+            self.title_norm,
+            self.year_key,
+            self.edition_norm,
+            self.audio_types_norm,
+            self.authors_norm,
+        )
+
+    # ---------- match predicates (arguments are already normalized) ----------
+    def has_codec(self, codec_norm: str) -> bool:
+        return codec_norm in self.audio_types_norm
+
+    def edition_matches(self, edition_norm: str) -> bool:
+        return not edition_norm or self.edition_norm == edition_norm
+
+    def author_matches(self, author_norm: str) -> bool:
+        return not author_norm or author_norm in self.authors_norm
@@ -0,0 +1,318 @@
+"""Resolve playback metadata into a ready-to-send SearchRequest."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Tuple
+
+from pyezbeq.models import SearchRequest
+
+from homeassistant.core import CALLBACK_TYPE, Event, EventStateChangedData, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .index import CatalogueIndex
+from .records import CatalogueRecord
+from .substitutions import CodecPlan, SubstitutionTable, match_record, plan_codec
+
+if TYPE_CHECKING:
+    from .catalogue import CatalogueStore
+    from .substitutions import SubstitutionRules
+
+_LOGGER = logging.getLogger(__name__)
+
+# Service fields naming the playback metadata sensors
+SENSOR_FIELDS = ("tmdb_sensor", "year_sensor", "codec_sensor", "edition_sensor", "title_sensor")
+
+# Players update several metadata sensors at once; resolve once they settle.
+PRE_RESOLVE_COOLDOWN = 0.5
+
+# Memoized resolutions; misses (no catalogue entry) are only kept briefly.
+RESOLUTION_CACHE_SIZE = 64
+NEGATIVE_RESOLUTION_TTL = 5 * 60
+
+type ResolutionKey = Tuple[str, str, str, int, str, str, bool]
+
+
+def search_request_from_sensors(
+    hass: HomeAssistant,
+    sensors: Mapping[str, str],
+    preferred_author: str = "",
+    slots: list[int] | None = None,
+) -> SearchRequest:
+    """
+    Build a SearchRequest from the metadata sensors named in `sensors`
+    (service field -> entity_id); preferred_author is blank if not supplied.
+    Raises HomeAssistantError for a missing sensor and ValueError for a
+    non-numeric year.
+    """
+
+    def get_sensor_state(entity_id: str) -> Any:
+        """Get the state of a sensor entity."""
+        state = hass.states.get(entity_id)
+        if state is None:
+            raise HomeAssistantError(f"Sensor {entity_id} not found")
+        return state.state
+
+    search_request = SearchRequest(
+        tmdb=get_sensor_state(sensors["tmdb_sensor"]),
+        year=int(get_sensor_state(sensors["year_sensor"])),
+        codec=get_sensor_state(sensors["codec_sensor"]),
+        preferred_author=(preferred_author or "").strip(),
+        edition=(
+            get_sensor_state(sensors["edition_sensor"])
+            if "edition_sensor" in sensors
+            else ""
+        ),
+        slots=slots if slots is not None else [1],
+        title=(
+            get_sensor_state(sensors["title_sensor"])
+            if "title_sensor" in sensors
+            else ""
+        ),
+    )
+    return search_request
+
+
+def extra_fields(item: CatalogueRecord | None) -> Dict[str, Any]:
+    """Pull additional fields for the status sensor; safe defaults if missing."""
+    if not item:
+        return {}
+    imgs = item.images
+    try:
+        runtime_minutes = int(item.runtime) if item.runtime is not None else None
+    except (TypeError, ValueError):
+        runtime_minutes = None
+    return {
+        "tmdb_id": item.tmdb_id,
+        "title": item.title,
+        "alt_title": item.alt_title,
+        "source": item.source,
+        "content_type": item.content_type,
+        "language": item.language,
+        "mv_offset": float(item.mv) if str(item.mv).strip() not in ("", "None", "null") else None,
+        "audio_types": list(item.audio_types),
+        "warning": item.warning,
+        "note": item.note,
+        "image1": imgs[0] if len(imgs) >= 1 else "",
+        "image2": imgs[1] if len(imgs) >= 2 else "",
+        "runtime_minutes": runtime_minutes,
+        "genres": list(item.genres),
+        "created_at": item.created_at,
+    }
+
+
+def resolution_key(search_request: SearchRequest, substitutions: bool) -> ResolutionKey:
+    """What a resolution depends on, besides catalogue version and rules."""
+    return (
+        str(search_request.tmdb),
+        search_request.codec,
+        search_request.edition,
+        search_request.year,
+        search_request.title,
+        search_request.preferred_author,
+        substitutions,
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class Resolution:
+    """
+    Everything the load path derives locally for one request: the codec
+    plan, the matched catalogue entry, its status attributes and the
+    SearchRequest to send (planned codec and catalogue author applied).
+    Valid for one catalogue version and one compiled rule table.
+    """
+
+    key: ResolutionKey
+    plan: CodecPlan
+    record: CatalogueRecord | None
+    search_request: SearchRequest
+    catalogue_version: int
+    table: SubstitutionTable | None
+    extra_attrs: Dict[str, Any] = field(default_factory=dict)
+    resolved_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def negative(self) -> bool:
+        """No catalogue entry for the request (nor any planned substitute)."""
+        return self.record is None
+
+    def request_for(self, slots: list[int]) -> SearchRequest:
+        """A private copy of the ready-to-send request for these slots."""
+        return replace(self.search_request, slots=list(slots))
+
+
+def resolve(
+    catalog: CatalogueIndex | None,
+    search_request: SearchRequest,
+    table: SubstitutionTable | None,
+) -> Resolution:
+    """Plan the codec and match the catalogue entry (no network)."""
+    plan = plan_codec(catalog, search_request, table)
+    record = plan.record
+    if record is None and catalog:
+        record = match_record(catalog, search_request, search_request.codec)
+    ready = replace(search_request, slots=list(search_request.slots))
+    if plan.codec is not None:
+        ready.codec = plan.codec
+    if record and not search_request.preferred_author:
+        # Inject the author (aligns automatic load with manual determinism)
+        ready.preferred_author = record.author
+    return Resolution(
+        resolution_key(search_request, table is not None),
+        plan,
+        record,
+        ready,
+        catalog.version if catalog is not None else 0,
+        table,
+        extra_fields(record),
+    )
+
+
+class ResolutionCache:
+    """
+    Bounded LRU of resolutions keyed by resolution_key.
+
+    Entries are only valid for the catalogue version and rule table they were
+    computed with; the whole cache is dropped when the catalogue is replaced.
+    Negative results expire after NEGATIVE_RESOLUTION_TTL so a title without
+    BEQ is not re-matched on every retry, yet picks up catalogue fixes.
+    """
+
+    def __init__(self, catalogue: CatalogueStore, maxsize: int = RESOLUTION_CACHE_SIZE) -> None:
+        self.catalogue = catalogue
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[ResolutionKey, Resolution] = OrderedDict()
+        catalogue.async_add_listener(self.clear)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @callback
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get(self, key: ResolutionKey, table: SubstitutionTable | None) -> Resolution | None:
+        res = self._entries.get(key)
+        if res is not None and (
+            res.table is not table
+            or res.catalogue_version != self.catalogue.version
+            or (res.negative and time.monotonic() - res.resolved_at > NEGATIVE_RESOLUTION_TTL)
+        ):
+            del self._entries[key]
+            res = None
+        if res is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return res
+
+    def put(self, res: Resolution) -> None:
+        self._entries[res.key] = res
+        self._entries.move_to_end(res.key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "resolution_cache_hits": self.hits,
+            "resolution_cache_misses": self.misses,
+            "resolution_cache_size": len(self._entries),
+        }
+
+
+class PreResolver:
+    """
+    Resolve speculatively while playback metadata changes.
+
+    The sensors of the last load_beq_profile call are watched; when they
+    settle, the request they describe is resolved against the current
+    catalogue in the background, so the next load can go straight to ezBEQ.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        catalogue: CatalogueStore,
+        substitution_rules: SubstitutionRules,
+    ) -> None:
+        self.hass = hass
+        self.catalogue = catalogue
+        self.substitution_rules = substitution_rules
+        self.resolution: Resolution | None = None
+        self._watch: Tuple[Tuple[Tuple[str, str], ...], str, bool] | None = None
+        self._unsub: CALLBACK_TYPE | None = None
+        self._debouncer: Debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=PRE_RESOLVE_COOLDOWN,
+            immediate=False,
+            function=self._async_resolve,
+        )
+
+    @callback
+    def async_watch(self, call_data: Mapping[str, Any]) -> None:
+        """Follow the sensors (and options) of a load_beq_profile call."""
+        sensors = tuple((f, call_data[f]) for f in SENSOR_FIELDS if f in call_data)
+        watch = (
+            sensors,
+            str(call_data.get("preferred_author", "") or "").strip(),
+            bool(call_data.get("enable_audio_codec_substitutions", False)),
+        )
+        if watch == self._watch:
+            return
+        self._watch = watch
+        if self._unsub is not None:
+            self._unsub()
+        self._unsub = async_track_state_change_event(
+            self.hass, [entity_id for _, entity_id in sensors], self._async_sensor_changed
+        )
+
+    def lookup(self, key: ResolutionKey, table: SubstitutionTable | None) -> Resolution | None:
+        """The pre-resolved plan for key, if still valid."""
+        res = self.resolution
+        if (
+            res is not None
+            and res.key == key
+            and res.table is table
+            and res.catalogue_version == self.catalogue.version
+        ):
+            return res
+        return None
+
+    @callback
+    def async_shutdown(self) -> None:
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        self._debouncer.async_shutdown()
+
+    @callback
+    def _async_sensor_changed(self, event: Event[EventStateChangedData]) -> None:
+        self._debouncer.async_schedule_call()
+
+    async def _async_resolve(self) -> None:
+        if self._watch is None:
+            return
+        sensors, preferred_author, substitutions = self._watch
+        try:
+            search_request = search_request_from_sensors(self.hass, dict(sensors), preferred_author)
+        except (HomeAssistantError, ValueError) as e:
+            _LOGGER.debug("Not pre-resolving incomplete playback metadata: %s", e)
+            return
+        catalog = await self.catalogue.async_get_index()
+        table = self.substitution_rules.table if substitutions else None
+        self.resolution = resolve(catalog, search_request, table)
+        _LOGGER.debug(
+            "Pre-resolved %s -> codec '%s' (catalogue version %s)",
+            self.resolution.key,
+            self.resolution.search_request.codec,
+            self.resolution.catalogue_version,
+        )
@@ -0,0 +1,84 @@
+"""Serialize MiniDSP writes per slot with latest-wins coalescing."""
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, TypeVar
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class CommandDropped(Exception):
+    """A queued command was superseded by a newer one for the same slot."""
+
+
+class SlotScheduler:
+    """
+    One writer per slot at a time; only the newest waiting command survives.
+
+    Every command bumps a per-slot generation. Commands wait for the locks of
+    all their slots (taken in sorted order, so multi-slot commands cannot
+    deadlock); a command that finds a newer generation on any of its slots
+    once it gets its turn is dropped without touching the device. A running
+    command is never interrupted, so play/stop/play ends with the last
+    request applied and an unload pre-empts a load still waiting its turn.
+    """
+
+    def __init__(self, on_change: Callable[[], None] | None = None) -> None:
+        self.dropped = 0
+        self.completed = 0
+        self._waiting = 0
+        self._generation: Dict[Any, int] = defaultdict(int)
+        self._locks: Dict[Any, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.on_change = on_change
+
+    @property
+    def queue_depth(self) -> int:
+        """Commands waiting for their turn (not yet started)."""
+        return self._waiting
+
+    def stats(self) -> Dict[str, int]:
+        return {"queue_depth": self._waiting, "dropped_commands": self.dropped}
+
+    async def async_run(
+        self, kind: str, slots: Iterable[Any], func: Callable[[], Awaitable[_T]]
+    ) -> _T:
+        """Run func once it is the newest command for all slots; else raise CommandDropped."""
+        keys = sorted({str(s) for s in slots})
+        mine: Dict[str, int] = {}
+        for key in keys:
+            self._generation[key] += 1
+            mine[key] = self._generation[key]
+
+        acquired: List[asyncio.Lock] = []
+        self._waiting += 1
+        self._changed()
+        started = False
+        try:
+            for key in keys:
+                lock = self._locks[key]
+                await lock.acquire()
+                acquired.append(lock)
+            self._waiting -= 1
+            started = True
+            if any(self._generation[key] != mine[key] for key in keys):
+                self.dropped += 1
+                _LOGGER.debug("Dropping superseded %s for slots %s", kind, keys)
+                raise CommandDropped(f"{kind} for slots {', '.join(keys)} superseded by a newer command")
+            self._changed()
+            result = await func()
+            self.completed += 1
+            return result
+        finally:
+            if not started:
+                self._waiting -= 1
+            for lock in reversed(acquired):
+                lock.release()
+            self._changed()
+
+    def _changed(self) -> None:
+        if self.on_change is not None:
+            self.on_change()
@@ -1,10 +1,14 @@
 """Sensor platform for the ezbeq Profile Loader integration."""
 
+from __future__ import annotations
+
 from collections.abc import Callable
 from dataclasses import dataclass
 import logging
+from typing import Any
 
 from homeassistant.components.sensor import SensorEntity, SensorEntityDescription
+from homeassistant.const import EntityCategory
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
@@ -12,10 +16,15 @@ from homeassistant.helpers.typing import StateType
 from . import EzBEQConfigEntry
 from .const import CURRENT_PROFILE, STATE_UNLOADED
 from .coordinator import EzBEQCoordinator
-from .entity import EzBEQEntity
+from .entity import EzBEQEntity, EzBEQSlotEntity
+from .snapshot import DeviceState, SlotState
 
 _LOGGER = logging.getLogger(__name__)
 
+# Raw slot fields left out of the title attributes: they have their own
+# entities, and would rewrite the title on every gain/mute change
+_RAW_EXCLUDED = frozenset({"gains", "mutes"})
+
 
 @dataclass(frozen=True, kw_only=True)
 class EzBEQSensorEntityDescription(SensorEntityDescription):
@@ -24,21 +33,61 @@ class EzBEQSensorEntityDescription(SensorEntityDescription):
     value_fn: Callable[[EzBEQCoordinator, str], StateType]
 
 
+def _current_profile(coordinator: EzBEQCoordinator, device_name: str) -> StateType:
+    """Profile in the device's active slot; unknown if the last poll lacked the device."""
+    device = coordinator.data.device(device_name)
+    if device is None:
+        return None
+    return device.current_profile or STATE_UNLOADED
+
+
 SENSORS: tuple[EzBEQSensorEntityDescription, ...] = (
     EzBEQSensorEntityDescription(
         key=CURRENT_PROFILE,
-        value_fn=(
-            lambda coordinator, device_name: coordinator.client.get_device_profile(
-                device_name
-            )
-            if coordinator.client.get_device_profile(device_name) != ""
-            else STATE_UNLOADED
-        ),
+        value_fn=lambda coordinator, device_name: _current_profile(coordinator, device_name),
         translation_key=CURRENT_PROFILE,
     ),
 )
 
 
+@dataclass(frozen=True, kw_only=True)
+class EzBEQSlotSensorEntityDescription(SensorEntityDescription):
+    """Describe a per-slot EzBEQ sensor entity."""
+
+    value_fn: Callable[[SlotState], StateType]
+
+
+SLOT_TITLE = EzBEQSlotSensorEntityDescription(
+    key="title",
+    translation_key="slot_title",
+    value_fn=lambda slot: slot.last,
+)
+
+
+def _gain_description(input_id: str) -> EzBEQSlotSensorEntityDescription:
+    return EzBEQSlotSensorEntityDescription(
+        key=f"input{input_id}_gain",
+        translation_key="slot_input_gain",
+        translation_placeholders={"input": input_id},
+        native_unit_of_measurement="dB",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda slot: dict(slot.gains).get(input_id),
+    )
+
+
+def _slot_sensors(
+    coordinator: EzBEQCoordinator, device: DeviceState
+) -> list[EzBEQSlotSensor]:
+    sensors = []
+    for slot in device.slots:
+        descriptions = [SLOT_TITLE, *(_gain_description(gid) for gid, _ in slot.gains)]
+        sensors.extend(
+            EzBEQSlotSensor(coordinator, description, device.name, slot.id)
+            for description in descriptions
+        )
+    return sensors
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: EzBEQConfigEntry,
@@ -46,12 +95,17 @@ async def async_setup_entry(
 ) -> None:
     """Set up the sensor entities."""
     coordinator = entry.runtime_data
-    _LOGGER.debug("Found %s devices", len(coordinator.client.device_info))
+    _LOGGER.debug("Found %s devices", len(coordinator.data.devices))
     async_add_entities(
         EzBEQSensor(coordinator, description, device.name)
-        for device in coordinator.client.device_info
+        for device in coordinator.data.devices
         for description in SENSORS
     )
+    async_add_entities(
+        sensor
+        for device in coordinator.data.devices
+        for sensor in _slot_sensors(coordinator, device)
+    )
 
 
 class EzBEQSensor(EzBEQEntity, SensorEntity):
@@ -77,3 +131,51 @@ class EzBEQSensor(EzBEQEntity, SensorEntity):
     def native_value(self) -> StateType:
         """Return the state of the sensor."""
         return self.entity_description.value_fn(self.coordinator, self._device_name)
+
+
+class EzBEQSlotSensor(EzBEQSlotEntity, SensorEntity):
+    """A value of one device slot (loaded title, input gains)."""
+
+    entity_description: EzBEQSlotSensorEntityDescription
+    # the full slot payload is for templates/debugging, not history
+    _unrecorded_attributes = frozenset({"raw"})
+
+    def __init__(
+        self,
+        coordinator: EzBEQCoordinator,
+        description: EzBEQSlotSensorEntityDescription,
+        device_name: str,
+        slot_id: str,
+    ) -> None:
+        """Initialize the slot sensor."""
+        super().__init__(coordinator, device_name, slot_id, description.key)
+        self.entity_description = description
+        self._attr_translation_placeholders = {
+            "slot": slot_id,
+            **(description.translation_placeholders or {}),
+        }
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the state of the sensor."""
+        slot = self.slot
+        return self.entity_description.value_fn(slot) if slot else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Author, I/O counts and the raw payload (without gains/mutes) of the loaded slot."""
+        slot = self.slot
+        if slot is None or self.entity_description is not SLOT_TITLE:
+            return None
+        device = self.coordinator.data.device(self._device_name)
+        raw = device.raw_slot(self._slot_id) if device else None
+        return {
+            "author": slot.author,
+            "can_activate": slot.can_activate,
+            "inputs": slot.inputs,
+            "outputs": slot.outputs,
+            "raw": {k: v for k, v in raw.items() if k not in _RAW_EXCLUDED} if raw else None,
+        }
+
+    def _current(self) -> Any:
+        return (self.available, self.native_value, self.extra_state_attributes)
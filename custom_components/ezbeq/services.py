@@ -1,64 +1,29 @@
 from __future__ import annotations
 
+from dataclasses import replace
 import logging
 import time
-from typing import Any, List, Dict
+from typing import Any, Dict, List
 
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from pyezbeq.errors import BEQProfileNotFound
 from pyezbeq.models import SearchRequest
 
 from .coordinator import EzBEQCoordinator
-from .devices import async_refresh_devices_sensor  # unchanged import
+from .devices import async_refresh_devices_sensor, profile_already_loaded
+from .fanout import Target, TargetResult, async_fan_out, async_load_slot, async_unload_slot, expand_targets
+from .latency import LOAD_STAGES, UNLOAD_STAGES, StageTimer
+from .records import CatalogueRecord
+from .resolver import extra_fields, resolution_key, resolve, search_request_from_sensors
+from .scheduler import CommandDropped
+from .substitutions import match_record, normalize_codec, probe_codecs
 
 _LOGGER = logging.getLogger(__name__)
 
-CATALOG_URL = "https://beqcatalogue.readthedocs.io/en/latest/database.json"
-CATALOG_CACHE_TTL = 7 * 24 * 3600  # 1 week
-
 STATUS_SENSOR_ID = "sensor.ezbeq_load_status"
 STATUS_FRIENDLY_NAME = "ezBEQ Load Status"
 
-# ---------------------------------------------------------------------------
-# Substitution rules (ordered). Users can edit these lists directly.
-# Each rule: enabled, inputs (incoming codec matches any), outputs (try in order).
-# Normalization: lowercase string equality.
-# ---------------------------------------------------------------------------
-SUBSTITUTION_RULES: List[Dict[str, Any]] = [
-    {
-        "enabled": True,
-        "inputs": ["Atmos"],
-        "outputs": ["TrueHD 7.1", "TrueHD Atmos", "TrueHD 5.1", "DD+ Atmos"],
-    },
-    {
-        "enabled": True,
-        "inputs": ["dts-hd ma 7.1"],
-        "outputs": ["dts-x", "dts:x", "dts-x hr", "dts-hd ma 5.1", "dts.hd ma 5.1"],
-    },
-    {
-        "enabled": True,
-        "inputs": ["DD+ 5.1", "DD+ 7.1", "DD+ 2.0", "DD+ 2.1"],
-        "outputs": ["DD+", "DD+ Atmos", "DD+ 5.1 Atmos"],
-    },
-    {
-        "enabled": True,
-        "inputs": ["DTS 5.1", "DTS 6.1"],
-        "outputs": ["DTS-HD MA 5.1", "DTS-HD MA 7.1", "DTS-ES 5.1", "DTS-ES 6.1", "DTS-EX 5.1"],
-    },
-    {
-        "enabled": True,
-        "inputs": ["DTS-HD MA 5.1", "DTS-HD MA 7.1"],
-        "outputs": ["DTS-HD MA 5.1", "DTS-HD MA 7.1"],
-    },
-    {
-        "enabled": True,
-        "inputs": ["PCM"],
-        "outputs": ["LPCM 5.1", "LPCM 7.1", "LPCM 2.0", "LPCM 1.0"],
-    },
-    # Add more rules here as needed.
-]
-
 
 async def async_setup_services(
     hass: HomeAssistant, coordinator: EzBEQCoordinator, domain: str
@@ -76,448 +41,383 @@ async def async_setup_services(
             "last_changed": _utc_timestamp(),
             "stage": state,
         }
+        base_attrs.update(coordinator.scheduler.stats())
         base_attrs.update({k: v for k, v in attrs.items() if v is not None})
         hass.states.async_set(STATUS_SENSOR_ID, state, base_attrs)
         _LOGGER.debug("STATUS -> %s | manual_load=%s | attrs=%s", state, attrs.get("manual_load"), attrs)
 
+    @callback
+    def _publish_queue_stats() -> None:
+        """Refresh the queue counters without changing the current status."""
+        current = hass.states.get(STATUS_SENSOR_ID)
+        if current is not None:
+            hass.states.async_set(
+                STATUS_SENSOR_ID,
+                current.state,
+                {**current.attributes, **coordinator.scheduler.stats()},
+            )
+
     # Initialize the status sensor
     _set_status("idle")
-
-    # ---------- Catalogue fetcher (shared) ----------
-    async def _get_catalog_items() -> list[dict] | None:
-        domain_cache = hass.data.setdefault(domain, {})
-        cache = domain_cache.get("catalog_cache")
-        now = time.time()
-        items = None
-        if cache and (now - cache["ts"] < CATALOG_CACHE_TTL):
-            items = cache["items"]
-
-        if items is None:
-            session = async_get_clientsession(hass)
-            try:
-                async with session.get(CATALOG_URL, timeout=15) as resp:
-                    resp.raise_for_status()
-                    data = await resp.json(content_type=None)
-            except Exception as e:
-                _LOGGER.warning("Could not fetch BEQ catalogue: %s", e)
-                return None
-
-            if isinstance(data, list):
-                items = data
-            elif isinstance(data, dict):
-                items = data.get("titles") or list(data.values())
-            else:
-                return None
-
-            domain_cache["catalog_cache"] = {"ts": now, "items": items}
-        return items
+    coordinator.scheduler.on_change = _publish_queue_stats
 
     # ---------- Catalogue match helpers ----------
-    def _normalize_codec(value: str | None) -> str:
-        return (value or "").strip().lower()
-
-    def _match_catalog_item(
-        items: list[dict],
-        tmdb: str,
-        codec: str,
-        edition: str,
-        year: int,
-        title: str,
-    ) -> dict | None:
-        tmdb_str = str(tmdb).strip()
-        codec_norm = _normalize_codec(codec)
-        edition_norm = (edition or "").strip().lower()
-        year_str = str(year).strip()
-        title_norm = (title or "").strip().lower()
-
-        def _edition_matches(item: dict) -> bool:
-            if not edition_norm:
-                return True
-            return (item.get("edition", "") or "").strip().lower() == edition_norm
-
-        def _codec_matches(item: dict) -> bool:
-            audio_types = item.get("audioTypes") or []
-            if isinstance(audio_types, str):
-                audio_types = [audio_types]
-            return any((a or "").strip().lower() == codec_norm for a in audio_types)
-
-        for item in items:
-            if str(item.get("theMovieDB", "")).strip() == tmdb_str and _codec_matches(item) and _edition_matches(item):
-                return item
-
-        for item in items:
-            if (
-                str(item.get("year", "")).strip() == year_str
-                and (item.get("title", "") or "").strip().lower() == title_norm
-                and _codec_matches(item)
-                and _edition_matches(item)
-            ):
-                return item
-        return None
-
-    def _author_matches(item_author: str | list[str], target: str) -> bool:
-        if not target:
-            return True
-        target_norm = target.strip().lower()
-        if isinstance(item_author, list):
-            return any(str(a).strip().lower() == target_norm for a in item_author)
-        return str(item_author).strip().lower() == target_norm
-
-    def _match_catalog_item_preferring_author(
-        items: list[dict],
-        tmdb: str,
-        codec: str,
-        edition: str,
-        year: int,
-        title: str,
-        preferred_author: str,
-    ) -> dict | None:
-        """First try to match tmdb+codec+edition with preferred_author; fall back later."""
-        tmdb_str = str(tmdb).strip()
-        codec_norm = _normalize_codec(codec)
-        edition_norm = (edition or "").strip().lower()
-        preferred = preferred_author.strip().lower()
-
-        def _edition_matches(item: dict) -> bool:
-            if not edition_norm:
-                return True
-            return (item.get("edition", "") or "").strip().lower() == edition_norm
-
-        def _codec_matches(item: dict) -> bool:
-            audio_types = item.get("audioTypes") or []
-            if isinstance(audio_types, str):
-                audio_types = [audio_types]
-            return any((a or "").strip().lower() == codec_norm for a in audio_types)
-
-        for item in items:
-            if str(item.get("theMovieDB", "")).strip() != tmdb_str:
-                continue
-            if not _codec_matches(item) or not _edition_matches(item):
-                continue
-            if not preferred:
-                return item
-            item_author = item.get("author") or item.get("authors") or ""
-            if _author_matches(item_author, preferred):
-                return item
-        return None
-
-    def _extract_author(item: dict | None) -> str:
-        if not item:
-            return ""
-        author = item.get("author") or item.get("authors") or ""
-        if isinstance(author, list):
-            return ", ".join(str(a) for a in author if a)
-        return str(author)
-
-    def _extract_extra_fields(item: dict | None) -> Dict[str, Any]:
-        """Pull additional fields for the status sensor; safe defaults if missing."""
-        if not item:
-            return {}
-        imgs = item.get("images") or []
-        if isinstance(imgs, str):
-            imgs = [imgs]
-        runtime_raw = item.get("runtime")
-        try:
-            runtime_minutes = int(runtime_raw) if runtime_raw is not None else None
-        except (TypeError, ValueError):
-            runtime_minutes = None
-        return {
-            "tmdb_id": item.get("theMovieDB") or "",
-            "title": item.get("title") or "",
-            "alt_title": item.get("altTitle") or "",
-            "source": item.get("source") or "",
-            "content_type": item.get("content_type") or "",
-            "language": item.get("language") or "",
-            "mv_offset": float(item.get("mv")) if str(item.get("mv")).strip() not in ("", "None", "null") else None,
-            "audio_types": item.get("audioTypes") or [],
-            "warning": item.get("warning") or "",
-            "note": item.get("note") or "",
-            "image1": imgs[0] if len(imgs) >= 1 else "",
-            "image2": imgs[1] if len(imgs) >= 2 else "",
-            "runtime_minutes": runtime_minutes,
-            "genres": item.get("genres") or [],
-            "created_at": item.get("created_at"),
-        }
+    def _extract_author(item: CatalogueRecord | None) -> str:
+        return item.author if item else ""
+
+    async def _refresh_devices(operation: str) -> None:
+        """Refresh the devices sensor after a write; timed as that operation's device_refresh stage."""
+        started = time.monotonic()
+        await async_refresh_devices_sensor(hass, coordinator, domain)
+        coordinator.latency.record(
+            operation, {"device_refresh": round((time.monotonic() - started) * 1000, 1)}, count=False
+        )
 
-    # ---------- Substitution helpers ----------
-    def _rule_applies(rule: Dict[str, Any], original_codec_norm: str) -> bool:
-        if not rule.get("enabled", False):
-            return False
-        inputs = [_normalize_codec(x) for x in rule.get("inputs", [])]
-        return original_codec_norm in inputs
-
-    def _catalog_has_codec(
-        items: list[dict], tmdb: str, edition: str, candidate_codec_norm: str
-    ) -> bool:
-        tmdb_str = str(tmdb).strip()
-        edition_norm = (edition or "").strip().lower()
-
-        def _edition_matches(item: dict) -> bool:
-            if not edition_norm:
-                return True
-            return (item.get("edition", "") or "").strip().lower() == edition_norm
-
-        for item in items:
-            if str(item.get("theMovieDB", "")).strip() != tmdb_str:
-                continue
-            if not _edition_matches(item):
-                continue
-            audio_types = item.get("audioTypes") or []
-            if isinstance(audio_types, str):
-                audio_types = [audio_types]
-            audio_types_norm = [(a or "").strip().lower() for a in audio_types]
-            if candidate_codec_norm in audio_types_norm:
-                return True
-        return False
+    # ---------- Fan-out helpers ----------
+    def _targets(call: ServiceCall, slots: List[Any]) -> List[Target]:
+        """(device, slot) targets of a call; empty means every device via pyezbeq."""
+        devices = call.data.get("devices")
+        if not devices:
+            return []
+        return expand_targets(coordinator.client, devices, slots)
+
+    def _written_slots(targets: List[Target], slots: List[Any]) -> List[Target]:
+        """(device, slot) pairs a write touches; without targets, every known device."""
+        if targets:
+            return targets
+        snapshot = coordinator.data
+        names = [d.name for d in snapshot.devices] if snapshot else []
+        return [(name, slot) for name in names for slot in slots or [1]]
+
+    def _any_failed(results: List[TargetResult]) -> bool:
+        return any(not r.success for r in results)
+
+    def _raise_if_all_failed(results: List[TargetResult]) -> None:
+        if results and not any(r.success for r in results):
+            raise HomeAssistantError(
+                "; ".join(f"{r.device} slot {r.slot}: {r.error}" for r in results)
+            )
 
     # ---------- Service: load_beq_profile ----------
-    async def load_beq_profile(call: ServiceCall) -> None:
+    async def load_beq_profile(call: ServiceCall) -> ServiceResponse:
         """Load a BEQ profile."""
+        timer = StageTimer(LOAD_STAGES)
         enable_audio_codec_subs = bool(call.data.get("enable_audio_codec_substitutions", False))
         manual_load = bool(call.data.get("manual_load", False))
-
-        def get_sensor_state(entity_id: str) -> Any:
-            """Get the state of a sensor entity."""
-            state = hass.states.get(entity_id)
-            if state is None:
-                raise HomeAssistantError(f"Sensor {entity_id} not found")
-            return state.state
+        force = bool(call.data.get("force", False))  # load even if already active
 
         try:
-            search_request = SearchRequest(
-                tmdb=get_sensor_state(call.data["tmdb_sensor"]),
-                year=int(get_sensor_state(call.data["year_sensor"])),
-                codec=get_sensor_state(call.data["codec_sensor"]),
+            search_request = search_request_from_sensors(
+                hass,
+                call.data,
                 preferred_author=call.data.get("preferred_author", ""),
-                edition=(
-                    get_sensor_state(call.data["edition_sensor"])
-                    if "edition_sensor" in call.data
-                    else ""
-                ),
                 slots=call.data.get("slots", [1]),
-                title=(
-                    get_sensor_state(call.data["title_sensor"])
-                    if "title_sensor" in call.data
-                    else ""
-                ),
             )
         except ValueError as e:
             raise HomeAssistantError(f"Invalid sensor data: {e}") from e
+        targets = _targets(call, search_request.slots)
+        target_results: List[TargetResult] = []
 
-        # Remember whether a preferred author was supplied; blank if not
-        preferred_supplied = bool(search_request.preferred_author.strip())
-        if not preferred_supplied:
-            search_request.preferred_author = ""
+        # Follow these sensors so the next load is resolved before it is called
+        coordinator.pre_resolver.async_watch(call.data)
 
-        used_codec = search_request.codec  # Track the codec actually loaded
+        requested_codec = search_request.codec
+        requested_author = search_request.preferred_author  # blank if not supplied
         author = ""
-        catalog_items: list[dict] | None = None
-        matched_item: dict | None = None  # keep the match for extra attrs
-
-        # Pre-match to inject author if missing (aligns automatic load with manual determinism)
-        catalog_items = await _get_catalog_items()
-        if catalog_items:
-            matched_item = _match_catalog_item_preferring_author(
-                catalog_items,
-                search_request.tmdb,
-                search_request.codec,
-                search_request.edition,
-                search_request.year,
-                search_request.title or "",
-                search_request.preferred_author,
-            ) or _match_catalog_item(
-                catalog_items,
-                search_request.tmdb,
-                search_request.codec,
-                search_request.edition,
-                search_request.year,
-                search_request.title or "",
+
+        # Plan locally: pick the best codec the catalogue confirms for this
+        # title (substitutes only when enabled), so the common case is a single
+        # successful load. Reuse the speculative plan when it is still valid.
+        table = coordinator.substitution_rules.table if enable_audio_codec_subs else None
+        key = resolution_key(search_request, enable_audio_codec_subs)
+        with timer.stage("match"):
+            resolved = coordinator.pre_resolver.lookup(key, table)
+        pre_resolved = resolved is not None
+        catalog = coordinator.catalogue.index
+        if resolved is None:
+            with timer.stage("catalogue"):
+                catalog = await coordinator.catalogue.async_get_index()
+            with timer.stage("match"):
+                resolved = coordinator.resolutions.get(key, table)
+                if resolved is None:
+                    resolved = resolve(catalog, search_request, table)
+                    coordinator.resolutions.put(resolved)
+        plan = resolved.plan
+        matched_item: CatalogueRecord | None = resolved.record  # keep the match for extra attrs
+        search_request = resolved.request_for(search_request.slots)
+        used_codec = search_request.codec  # Track the codec actually loaded
+        # How the loaded codec was chosen: catalogue plan, as requested, or ezBEQ probe
+        resolution = "catalogue" if plan.codec is not None else "requested"
+
+        def _status(state: str, **attrs: Any) -> None:
+            _set_status(
+                state,
+                profile=search_request.title,
+                codec=used_codec,
+                requested_codec=requested_codec,
+                resolution=resolution,
+                pre_resolved=pre_resolved,
+                edition=search_request.edition,
+                slots=search_request.slots,
+                manual_load=manual_load,
+                targets=[r.as_dict() for r in target_results] or None,
+                **coordinator.resolutions.stats(),
+                **attrs,
             )
-            if matched_item and not preferred_supplied:
-                search_request.preferred_author = _extract_author(matched_item)
-
-        _set_status(
-            "loading_primary",
-            profile=search_request.title,
-            codec=used_codec,
-            edition=search_request.edition,
-            slots=search_request.slots,
-            manual_load=manual_load,
-        )
 
-        try:
-            await coordinator.client.load_beq_profile(search_request)
-            _LOGGER.info("Successfully loaded BEQ profile")
-            if catalog_items and matched_item:
-                author = _extract_author(matched_item) or ""
-            elif catalog_items:
-                matched_item = _match_catalog_item_preferring_author(
-                    catalog_items,
-                    search_request.tmdb,
-                    used_codec,
-                    search_request.edition,
-                    search_request.year,
-                    search_request.title or "",
+        def _timings() -> Dict[str, float]:
+            """Final stage durations (ms); also fed to the latency statistics."""
+            durations = timer.as_dict()
+            coordinator.latency.record("load", durations)
+            return durations
+
+        async def _send(request: SearchRequest) -> None:
+            """Load through pyezbeq (every device), or fan out to the requested targets."""
+            nonlocal target_results
+            if not targets:
+                await coordinator.client.load_beq_profile(request)
+                return
+            if not request.skip_search:
+                entry = await coordinator.client.search.search_catalog(request)
+                request.entry_id = entry.id
+                request.mvAdjust = entry.mvAdjust
+                request.skip_search = True
+            target_results = await async_fan_out(
+                targets,
+                lambda device, slot: async_load_slot(
+                    coordinator.client, device, slot, request.entry_id, request.mvAdjust
+                ),
+            )
+            _raise_if_all_failed(target_results)
+
+        async def _probe_and_load(candidates: List[str]) -> None:
+            """Probe ezBEQ for all candidates at once, then load the best one."""
+            nonlocal used_codec, matched_item, resolution
+            resolution = "probe"
+            _status("probing", candidates=candidates)
+            probe_request = replace(search_request, preferred_author=requested_author)
+            hit = await probe_codecs(coordinator.client.search.search_catalog, probe_request, candidates)
+            if hit is None:
+                raise BEQProfileNotFound(f"No BEQ profile found for codecs: {', '.join(candidates)}")
+            codec, entry = hit
+            # The probe already resolved the entry: load it without a second search.
+            search_request.codec = codec
+            search_request.entry_id = entry.id
+            search_request.mvAdjust = entry.mvAdjust
+            search_request.skip_search = True
+            used_codec = codec
+            _status("loading_secondary")
+            await _send(search_request)
+            matched_item = match_record(catalog, search_request, codec) if catalog else None
+            _LOGGER.info("Successfully loaded BEQ profile with probed codec '%s'", codec)
+
+        async def _write() -> str:
+            """Device writes; serialized per slot by the scheduler."""
+            nonlocal author
+            timer.add("queue", time.monotonic() - queued)
+            # Idempotency: rewriting the same filters is slow and glitches the audio.
+            if (
+                not force
+                and not targets
+                and matched_item is not None
+                and profile_already_loaded(
+                    coordinator.devices_snapshot,
+                    coordinator.loaded_entries,
+                    matched_item.entry_key,
+                    matched_item.title,
                     search_request.preferred_author,
-                ) or _match_catalog_item(
-                    catalog_items,
-                    search_request.tmdb,
-                    used_codec,
-                    search_request.edition,
-                    search_request.year,
-                    search_request.title or "",
+                    search_request.slots,
                 )
-                author = _extract_author(matched_item) or ""
-        except Exception as e:
-            _LOGGER.warning("Primary load failed for codec '%s': %s", search_request.codec, e)
-            if not enable_audio_codec_subs:
-                _set_status(
-                    "load_fail",
-                    reason=str(e),
-                    profile=search_request.title,
-                    codec=used_codec,
-                    edition=search_request.edition,
-                    slots=search_request.slots,
-                    manual_load=manual_load,
+            ):
+                _LOGGER.info("BEQ profile '%s' already loaded; skipping", matched_item.title)
+                _status(
+                    "already_loaded",
+                    author=_extract_author(matched_item),
+                    stage_ms=_timings(),
+                    **resolved.extra_attrs,
                 )
-                raise HomeAssistantError(f"Failed to load BEQ profile: {e}") from e
+                return "already_loaded"
 
-            catalog_items = catalog_items or await _get_catalog_items()
-            if not catalog_items:
+            # Whatever the outcome, the slots no longer hold what was recorded
+            written = _written_slots(targets, search_request.slots)
+            coordinator.note_slots_written(written, None)
+            try:
+                if enable_audio_codec_subs and plan.codec is None and len(plan.candidates) > 1:
+                    # Nothing confirmed locally: ask ezBEQ instead of loading blind.
+                    with timer.stage("substitution"):
+                        await _probe_and_load(list(plan.candidates))
+                else:
+                    _status("loading_primary")
+                    with timer.stage("ezbeq"):
+                        await _send(search_request)
+                    _LOGGER.info("Successfully loaded BEQ profile (codec '%s', %s)", used_codec, resolution)
+                author = _extract_author(matched_item)
+            except Exception as e:
+                _LOGGER.warning("Load failed for codec '%s': %s", used_codec, e)
+                failed_norm = normalize_codec(used_codec)
+                remaining = (
+                    [c for c in plan.candidates if normalize_codec(c) != failed_norm]
+                    if enable_audio_codec_subs and resolution != "probe"
+                    else []
+                )
+                if not remaining:
+                    _status("load_fail", reason=str(e), stage_ms=_timings())
+                    raise HomeAssistantError(f"Failed to load BEQ profile: {e}") from e
+
+                # The local plan failed (ezBEQ disagrees with our catalogue copy):
+                # fall back to probing the remaining candidates.
+                try:
+                    with timer.stage("substitution"):
+                        await _probe_and_load(remaining)
+                    author = _extract_author(matched_item)
+                except Exception as e2:
+                    _LOGGER.warning("Substitution fallback failed: %s", e2)
+                    _status("load_fail", reason=str(e2), stage_ms=_timings())
+                    raise HomeAssistantError(f"Failed to load BEQ profile after substitutions: {e2}") from e2
+
+            extra_attrs = (
+                resolved.extra_attrs if matched_item is resolved.record else extra_fields(matched_item)
+            )
+
+            state = "load_partial" if _any_failed(target_results) else "load_success"
+            _status(state, author=author, stage_ms=_timings(), **extra_attrs)
+
+            if matched_item is not None:
+                failed = {(r.device, r.slot) for r in target_results if not r.success}
+                coordinator.note_slots_written(
+                    [t for t in written if t not in failed], matched_item.entry_key
+                )
+
+            # MiniDSP may have changed: refresh snapshot (fire-and-forget)
+            coordinator.invalidate_snapshot()
+            hass.async_create_task(_refresh_devices("load"))
+            return state
+
+        queued = time.monotonic()
+        try:
+            state = await coordinator.scheduler.async_run("load", search_request.slots, _write)
+        except CommandDropped as e:
+            _LOGGER.info("Load of '%s' not sent: %s", search_request.title, e)
+            state = "dropped"
+        return {
+            "status": state,
+            "codec": used_codec,
+            "targets": [r.as_dict() for r in target_results],
+        }
+
+    # ---------- Service: unload_beq_profile ----------
+    async def unload_beq_profile(call: ServiceCall) -> ServiceResponse:
+        """Unload the BEQ profile."""
+        slots = call.data.get("slots", [1])
+        manual_load = bool(call.data.get("manual_load", False))  # keep flag for consistency
+        timer = StageTimer(UNLOAD_STAGES)
+        targets = _targets(call, slots)
+        target_results: List[TargetResult] = []
+
+        def _timings() -> Dict[str, float]:
+            durations = timer.as_dict()
+            coordinator.latency.record("unload", durations)
+            return durations
+
+        async def _write() -> str:
+            """Device writes; serialized per slot by the scheduler."""
+            nonlocal target_results
+            timer.add("queue", time.monotonic() - queued)
+            _set_status("unloading", slots=slots, manual_load=manual_load)
+            try:
+                with timer.stage("ezbeq"):
+                    if targets:
+                        target_results = await async_fan_out(
+                            targets,
+                            lambda device, slot: async_unload_slot(coordinator.client, device, slot),
+                        )
+                        _raise_if_all_failed(target_results)
+                    else:
+                        search_request = SearchRequest(
+                            preferred_author="",
+                            edition="",
+                            tmdb="",  # Not used for unloading, but required by the model
+                            year=0,
+                            codec="",
+                            slots=slots,
+                        )
+                        await coordinator.client.unload_beq_profile(search_request)
+                _LOGGER.info("Successfully unloaded BEQ profile")
+                state = "unload_partial" if _any_failed(target_results) else "unload_success"
                 _set_status(
-                    "load_fail",
-                    reason=f"No catalogue for substitutions: {e}",
-                    profile=search_request.title,
-                    codec=used_codec,
-                    edition=search_request.edition,
-                    slots=search_request.slots,
+                    state,
+                    slots=slots,
                     manual_load=manual_load,
+                    targets=[r.as_dict() for r in target_results] or None,
+                    stage_ms=_timings(),
                 )
-                raise HomeAssistantError(
-                    f"Failed to load BEQ profile (no catalogue for substitutions): {e}"
-                ) from e
-
-            original_codec_norm = _normalize_codec(search_request.codec)
-            substitute_found = False
-
-            for rule in SUBSTITUTION_RULES:
-                if not _rule_applies(rule, original_codec_norm):
-                    continue
-                outputs = [_normalize_codec(x) for x in rule.get("outputs", [])]
-                for cand in outputs:
-                    if cand == original_codec_norm:
-                        continue  # skip identical
-                    if not _catalog_has_codec(catalog_items, search_request.tmdb, search_request.edition, cand):
-                        continue
-                    _LOGGER.info("Retrying load with substitute codec '%s'", cand)
-                    search_request.codec = cand
-                    used_codec = cand
-                    _set_status(
-                        "loading_secondary",
-                        profile=search_request.title,
-                        codec=used_codec,
-                        edition=search_request.edition,
-                        slots=search_request.slots,
-                        manual_load=manual_load,
-                    )
+                return state
+            except Exception as e:
+                resp = getattr(e, "response", None)
+                if resp is not None:
                     try:
-                        await coordinator.client.load_beq_profile(search_request)
-                        _LOGGER.info("Successfully loaded BEQ profile after substitution")
-                        matched_item = _match_catalog_item_preferring_author(
-                            catalog_items,
-                            search_request.tmdb,
-                            used_codec,
-                            search_request.edition,
-                            search_request.year,
-                            search_request.title or "",
-                            search_request.preferred_author,
-                        ) or _match_catalog_item(
-                            catalog_items,
-                            search_request.tmdb,
-                            used_codec,
-                            search_request.edition,
-                            search_request.year,
-                            search_request.title or "",
+                        _LOGGER.error(
+                            "Failed to unload BEQ profile: %s (status=%s, body=%s)",
+                            e,
+                            getattr(resp, "status_code", "?"),
+                            getattr(resp, "text", "")[:800],
                         )
-                        author = _extract_author(matched_item) or ""
-                        substitute_found = True
-                        break
-                    except Exception as e2:
-                        _LOGGER.warning("Substitution load with codec '%s' failed: %s", cand, e2)
-                        continue
-                if substitute_found:
-                    break
-
-            if not substitute_found:
+                    except Exception:
+                        _LOGGER.error("Failed to unload BEQ profile: %s (response present but unreadable)", e)
+                else:
+                    _LOGGER.error("Failed to unload BEQ profile: %s", e)
                 _set_status(
-                    "load_fail",
+                    "unload_fail",
                     reason=str(e),
-                    profile=search_request.title,
-                    codec=used_codec,
-                    edition=search_request.edition,
-                    slots=search_request.slots,
+                    slots=slots,
                     manual_load=manual_load,
+                    targets=[r.as_dict() for r in target_results] or None,
+                    stage_ms=_timings(),
                 )
-                raise HomeAssistantError(f"Failed to load BEQ profile after substitutions: {e}") from e
-
-        extra_attrs = _extract_extra_fields(matched_item)
-
-        _set_status(
-            "load_success",
-            profile=search_request.title,
-            codec=used_codec,
-            edition=search_request.edition,
-            slots=search_request.slots,
-            author=author,
-            manual_load=manual_load,
-            **extra_attrs,
-        )
+                raise HomeAssistantError(f"Failed to unload BEQ profile: {e}") from e
+            finally:
+                coordinator.note_slots_written(_written_slots(targets, slots), None)
+                coordinator.invalidate_snapshot()
+                hass.async_create_task(_refresh_devices("unload"))
 
-        # MiniDSP may have changed: refresh snapshot (fire-and-forget)
-        hass.async_create_task(async_refresh_devices_sensor(hass, coordinator, domain))
-
-    # ---------- Service: unload_beq_profile ----------
-    async def unload_beq_profile(call: ServiceCall) -> None:
-        """Unload the BEQ profile."""
-        slots = call.data.get("slots", [1])
-        manual_load = bool(call.data.get("manual_load", False))  # keep flag for consistency
-        _set_status("unloading", slots=slots, manual_load=manual_load)
+        queued = time.monotonic()
         try:
-            search_request = SearchRequest(
-                preferred_author="",
-                edition="",
-                tmdb="",  # Not used for unloading, but required by the model
-                year=0,
-                codec="",
-                slots=slots,
-            )
-            await coordinator.client.unload_beq_profile(search_request)
-            _LOGGER.info("Successfully unloaded BEQ profile")
-            _set_status("unload_success", slots=slots, manual_load=manual_load)
-        except Exception as e:
-            resp = getattr(e, "response", None)
-            if resp is not None:
-                try:
-                    _LOGGER.error(
-                        "Failed to unload BEQ profile: %s (status=%s, body=%s)",
-                        e,
-                        getattr(resp, "status_code", "?"),
-                        getattr(resp, "text", "")[:800],
-                    )
-                except Exception:
-                    _LOGGER.error("Failed to unload BEQ profile: %s (response present but unreadable)", e)
-            else:
-                _LOGGER.error("Failed to unload BEQ profile: %s", e)
-            _set_status("unload_fail", reason=str(e), slots=slots, manual_load=manual_load)
-            raise HomeAssistantError(f"Failed to unload BEQ profile: {e}") from e
-        finally:
-            hass.async_create_task(async_refresh_devices_sensor(hass, coordinator, domain))
-
-    hass.services.async_register(domain, "load_beq_profile", load_beq_profile)
-    hass.services.async_register(domain, "unload_beq_profile", unload_beq_profile)
+            state = await coordinator.scheduler.async_run("unload", slots, _write)
+        except CommandDropped as e:
+            _LOGGER.info("Unload not sent: %s", e)
+            state = "dropped"
+        return {"status": state, "targets": [r.as_dict() for r in target_results]}
+
+    # ---------- Service: reload_substitution_rules ----------
+    async def reload_substitution_rules(call: ServiceCall) -> None:
+        """Re-read the substitution rules (options / YAML file) and recompile."""
+        await coordinator.substitution_rules.async_load(coordinator.config_entry)
+
+    # ---------- Service: dump_http_trace ----------
+    async def dump_http_trace(call: ServiceCall) -> ServiceResponse:
+        """Return (and optionally clear) the HTTP trace ring buffer."""
+        trace = coordinator.http_trace
+        return {
+            "level": trace.level,
+            "sample_rate": trace.sample_rate,
+            "records": trace.dump(clear=bool(call.data.get("clear", False))),
+        }
+
+    hass.services.async_register(
+        domain, "load_beq_profile", load_beq_profile, supports_response=SupportsResponse.OPTIONAL
+    )
+    hass.services.async_register(
+        domain, "unload_beq_profile", unload_beq_profile, supports_response=SupportsResponse.OPTIONAL
+    )
+    hass.services.async_register(domain, "reload_substitution_rules", reload_substitution_rules)
+    hass.services.async_register(
+        domain, "dump_http_trace", dump_http_trace, supports_response=SupportsResponse.ONLY
+    )
 
 
 async def async_unload_services(hass: HomeAssistant, domain: str) -> None:
     """Unload EzBEQ services."""
     hass.services.async_remove(domain, "load_beq_profile")
     hass.services.async_remove(domain, "unload_beq_profile")
+    hass.services.async_remove(domain, "reload_substitution_rules")
+    hass.services.async_remove(domain, "dump_http_trace")
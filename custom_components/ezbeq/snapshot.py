@@ -0,0 +1,109 @@
+"""Typed device state parsed from ezBEQ's /api/2/devices payload."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Tuple
+
+# Title ezBEQ reports for a slot without a filter
+EMPTY_SLOT = "Empty"
+
+
+def _values(items: Any) -> Tuple[Tuple[str, Any], ...]:
+    """[{"id": .., "value": ..}, ...] -> ((id, value), ...)."""
+    return tuple((str(i.get("id")), i.get("value")) for i in items or () if isinstance(i, Mapping))
+
+
+@dataclass(frozen=True, slots=True)
+class SlotState:
+    """One MiniDSP configuration slot."""
+
+    id: str
+    active: bool
+    last: str
+    author: str
+    can_activate: bool | None
+    inputs: int | None
+    outputs: int | None
+    gains: Tuple[Tuple[str, Any], ...]
+    mutes: Tuple[Tuple[str, Any], ...]
+
+    @classmethod
+    def from_api(cls, slot: Mapping[str, Any]) -> SlotState:
+        return cls(
+            id=str(slot.get("id") or ""),
+            active=bool(slot.get("active", False)),
+            last=slot.get("last") or "",
+            author=slot.get("author") or "",
+            can_activate=slot.get("canActivate"),
+            inputs=slot.get("inputs"),
+            outputs=slot.get("outputs"),
+            gains=_values(slot.get("gains")),
+            mutes=_values(slot.get("mutes")),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceState:
+    """One ezBEQ device (e.g. a MiniDSP) and its slots."""
+
+    name: str
+    type: str | None
+    mute: bool | None
+    master_volume: float | None
+    serials: Tuple[str, ...]
+    slots: Tuple[SlotState, ...]
+    # Untyped slot list as sent by ezBEQ (the slots_raw attribute)
+    raw_slots: Tuple[Mapping[str, Any], ...] = field(default=(), compare=False, repr=False)
+
+    @classmethod
+    def from_api(cls, device: Mapping[str, Any]) -> DeviceState:
+        raw_slots = tuple(s for s in device.get("slots") or () if isinstance(s, Mapping))
+        return cls(
+            name=device.get("name") or "",
+            type=device.get("type"),
+            mute=device.get("mute"),
+            master_volume=device.get("masterVolume"),
+            serials=tuple(device.get("serials") or ()),
+            slots=tuple(SlotState.from_api(s) for s in raw_slots),
+            raw_slots=raw_slots,
+        )
+
+    @property
+    def active_slot(self) -> SlotState | None:
+        return next((slot for slot in self.slots if slot.active), None)
+
+    @property
+    def current_profile(self) -> str:
+        """Title loaded in the active slot; "" when none (as pyezbeq reports it)."""
+        active = self.active_slot
+        if active is None or active.last == EMPTY_SLOT:
+            return ""
+        return active.last
+
+    def slot(self, slot_id: Any) -> SlotState | None:
+        sid = str(slot_id)
+        return next((slot for slot in self.slots if slot.id == sid), None)
+
+    def raw_slot(self, slot_id: Any) -> Mapping[str, Any] | None:
+        """The slot as ezBEQ sent it."""
+        sid = str(slot_id)
+        return next((s for s in self.raw_slots if str(s.get("id") or "") == sid), None)
+
+
+@dataclass(frozen=True, slots=True)
+class DevicesSnapshot:
+    """Everything one coordinator poll knows about the ezBEQ server."""
+
+    devices: Tuple[DeviceState, ...]
+    version: str = ""
+
+    @classmethod
+    def from_api(cls, data: Mapping[str, Any], version: str = "") -> DevicesSnapshot:
+        """Parse /api/2/devices ({name: device})."""
+        return cls(
+            tuple(DeviceState.from_api(d) for d in data.values() if isinstance(d, Mapping)),
+            version,
+        )
+
+    def device(self, name: str) -> DeviceState | None:
+        return next((d for d in self.devices if d.name == name), None)
@@ -0,0 +1,318 @@
+"""Audio codec substitution rules and planning against the local BEQ catalogue."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, replace
+import logging
+import os
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, FrozenSet, List, Sequence, Tuple
+
+from pyezbeq.models import BeqCatalog, SearchRequest
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util.yaml import load_yaml, parse_yaml
+
+from .const import CONF_SUBSTITUTION_RULES
+from .index import CatalogueIndex
+from .records import CatalogueRecord
+
+if TYPE_CHECKING:
+    from .catalogue import CatalogueStore
+
+_LOGGER = logging.getLogger(__name__)
+
+# Optional rules file in the HA config directory (used unless the options
+# flow holds rules); reload with the ezbeq.reload_substitution_rules service.
+SUBSTITUTION_RULES_FILE = "ezbeq_substitutions.yaml"
+
+# Concurrent ezBEQ search requests while probing substitute codecs
+PROBE_CONCURRENCY = 3
+
+RULES_SENSOR_ID = "sensor.ezbeq_substitution_rules"
+RULES_FRIENDLY_NAME = "ezBEQ Substitution Rules"
+
+# ---------------------------------------------------------------------------
+# Default substitution rules (ordered).
+# Each rule: enabled, inputs (incoming codec matches any), outputs (try in order).
+# Normalization: lowercase string equality.
+# ---------------------------------------------------------------------------
+DEFAULT_SUBSTITUTION_RULES: List[Dict[str, Any]] = [
+    {
+        "enabled": True,
+        "inputs": ["Atmos"],
+        "outputs": ["TrueHD 7.1", "TrueHD Atmos", "TrueHD 5.1", "DD+ Atmos"],
+    },
+    {
+        "enabled": True,
+        "inputs": ["dts-hd ma 7.1"],
+        "outputs": ["dts-x", "dts:x", "dts-x hr", "dts-hd ma 5.1", "dts.hd ma 5.1"],
+    },
+    {
+        "enabled": True,
+        "inputs": ["DD+ 5.1", "DD+ 7.1", "DD+ 2.0", "DD+ 2.1"],
+        "outputs": ["DD+", "DD+ Atmos", "DD+ 5.1 Atmos"],
+    },
+    {
+        "enabled": True,
+        "inputs": ["DTS 5.1", "DTS 6.1"],
+        "outputs": ["DTS-HD MA 5.1", "DTS-HD MA 7.1", "DTS-ES 5.1", "DTS-ES 6.1", "DTS-EX 5.1"],
+    },
+    {
+        "enabled": True,
+        "inputs": ["DTS-HD MA 5.1", "DTS-HD MA 7.1"],
+        "outputs": ["DTS-HD MA 5.1", "DTS-HD MA 7.1"],
+    },
+    {
+        "enabled": True,
+        "inputs": ["PCM"],
+        "outputs": ["LPCM 5.1", "LPCM 7.1", "LPCM 2.0", "LPCM 1.0"],
+    },
+]
+
+RULE_SCHEMA = vol.Schema(
+    {
+        vol.Optional("enabled", default=True): cv.boolean,
+        vol.Required("inputs"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Required("outputs"): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+RULES_SCHEMA = vol.All(cv.ensure_list, [RULE_SCHEMA])
+
+
+def normalize_codec(value: str | None) -> str:
+    return (value or "").strip().lower()
+
+
+def parse_rules(text: str) -> List[Dict[str, Any]]:
+    """Validate rules given as YAML text; raises vol.Invalid/HomeAssistantError."""
+    return RULES_SCHEMA(parse_yaml(text) or [])
+
+
+def _load_rules_file(path: str) -> List[Dict[str, Any]] | None:
+    """Executor job: rules from the YAML file, None if there is no file."""
+    if not os.path.isfile(path):
+        return None
+    return RULES_SCHEMA(load_yaml(path) or [])
+
+
+class SubstitutionTable:
+    """
+    Rules compiled once into normalized input codec -> ordered, de-duplicated
+    output codecs, so a load does a single dict lookup.
+
+    When a catalogue codec vocabulary is given, outputs the catalogue has
+    never heard of are dropped (never probed) and reported in `dead_outputs`;
+    enabled rules left without any output are listed in `dead_rules`.
+    """
+
+    __slots__ = ("rules", "dead_outputs", "dead_rules", "_table")
+
+    def __init__(
+        self,
+        rules: Sequence[Dict[str, Any]],
+        vocabulary: FrozenSet[str] | None = None,
+    ) -> None:
+        self.rules = rules
+        dead_outputs: Dict[str, None] = {}
+        self.dead_rules: List[int] = []
+        table: Dict[str, Dict[str, None]] = {}
+        for pos, rule in enumerate(rules):
+            if not rule.get("enabled", True):
+                continue
+            outputs = [o for o in map(normalize_codec, rule.get("outputs", [])) if o]
+            if vocabulary is not None:
+                for o in outputs:
+                    if o not in vocabulary:
+                        dead_outputs.setdefault(o)
+                outputs = [o for o in outputs if o in vocabulary]
+                if not outputs:
+                    self.dead_rules.append(pos)
+            for codec in map(normalize_codec, rule.get("inputs", [])):
+                bucket = table.setdefault(codec, {})
+                for o in outputs:
+                    if o != codec:
+                        bucket.setdefault(o)
+        self.dead_outputs = list(dead_outputs)
+        self._table: Dict[str, Tuple[str, ...]] = {k: tuple(v) for k, v in table.items() if v}
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def outputs(self, codec: str | None) -> Tuple[str, ...]:
+        return self._table.get(normalize_codec(codec), ())
+
+    def candidates(self, codec: str) -> Tuple[str, ...]:
+        """The requested codec, then its substitutes in priority order."""
+        return (codec, *self.outputs(codec))
+
+
+class SubstitutionRules:
+    """
+    The active substitution rules of a config entry.
+
+    Source precedence: options flow, then SUBSTITUTION_RULES_FILE, then the
+    defaults. The table is recompiled when the rules change and whenever the
+    catalogue is replaced (new codec vocabulary), without a restart.
+    """
+
+    def __init__(self, hass: HomeAssistant, catalogue: CatalogueStore) -> None:
+        self.hass = hass
+        self.catalogue = catalogue
+        self.rules: Sequence[Dict[str, Any]] = DEFAULT_SUBSTITUTION_RULES
+        self.source = "default"
+        self.error: str | None = None
+        self.table = self._compile()
+        catalogue.async_add_listener(self._async_recompile)
+
+    async def async_load(self, entry: ConfigEntry) -> None:
+        """(Re)read the rules; a broken source keeps the current rules."""
+        try:
+            text = entry.options.get(CONF_SUBSTITUTION_RULES)
+            if text and text.strip():
+                rules, source = parse_rules(text), "options"
+            else:
+                path = self.hass.config.path(SUBSTITUTION_RULES_FILE)
+                file_rules = await self.hass.async_add_executor_job(_load_rules_file, path)
+                if file_rules is not None:
+                    rules, source = file_rules, "yaml"
+                else:
+                    rules, source = DEFAULT_SUBSTITUTION_RULES, "default"
+        except (HomeAssistantError, vol.Invalid) as e:
+            _LOGGER.error("Invalid substitution rules; keeping the %s rules: %s", self.source, e)
+            self.error = str(e)
+        else:
+            self.rules, self.source, self.error = rules, source, None
+        self._async_recompile()
+
+    def _compile(self) -> SubstitutionTable:
+        index = self.catalogue.index
+        return SubstitutionTable(self.rules, index.codecs if index is not None else None)
+
+    @callback
+    def _async_recompile(self) -> None:
+        self.table = self._compile()
+        if self.table.dead_outputs:
+            _LOGGER.warning(
+                "Substitution outputs not in the BEQ catalogue (never tried): %s",
+                ", ".join(self.table.dead_outputs),
+            )
+        self.hass.states.async_set(
+            RULES_SENSOR_ID,
+            self.source,
+            {
+                "friendly_name": RULES_FRIENDLY_NAME,
+                "rules": len(self.rules),
+                "input_codecs": len(self.table),
+                "dead_rules": self.table.dead_rules,
+                "dead_outputs": self.table.dead_outputs,
+                "catalogue_version": self.catalogue.version,
+                "error": self.error,
+            },
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CodecPlan:
+    """
+    Outcome of planning a load.
+
+    `candidates` is the requested codec followed by its substitutes in rule
+    priority order (the fallback probing order). `codec`/`record` are the
+    first candidate the catalogue confirms for the request, or None when the
+    catalogue knows none of them.
+    """
+
+    requested: str
+    candidates: Tuple[str, ...]
+    codec: str | None = None
+    record: CatalogueRecord | None = None
+
+    @property
+    def substituted(self) -> bool:
+        return self.codec is not None and normalize_codec(self.codec) != normalize_codec(self.requested)
+
+
+def match_record(
+    catalog: CatalogueIndex, search_request: SearchRequest, codec: str | None
+) -> CatalogueRecord | None:
+    """Preferred-author match first, then the plain tmdb/title+year match."""
+    return catalog.match_preferring_author(
+        search_request.tmdb,
+        codec,
+        search_request.edition,
+        search_request.preferred_author,
+    ) or catalog.match(
+        search_request.tmdb,
+        codec,
+        search_request.edition,
+        search_request.year,
+        search_request.title or "",
+    )
+
+
+def plan_codec(
+    catalog: CatalogueIndex | None,
+    search_request: SearchRequest,
+    table: SubstitutionTable | None = None,
+) -> CodecPlan:
+    """
+    Pick the best codec for (tmdb, edition, author) before contacting ezBEQ.
+
+    Candidates are checked in priority order against tmdb + edition + the
+    preferred author (if any), which is what ezBEQ's own search filters on;
+    pass no table to only confirm the requested codec.
+    """
+    candidates = table.candidates(search_request.codec) if table else (search_request.codec,)
+    if catalog is not None:
+        for cand in candidates:
+            record = catalog.match_preferring_author(
+                search_request.tmdb, cand, search_request.edition, search_request.preferred_author
+            )
+            if record is not None:
+                return CodecPlan(search_request.codec, candidates, cand, record)
+    return CodecPlan(search_request.codec, candidates)
+
+
+async def probe_codecs(
+    search: Callable[[SearchRequest], Awaitable[BeqCatalog]],
+    search_request: SearchRequest,
+    candidates: Sequence[str],
+    limit: int = PROBE_CONCURRENCY,
+) -> Tuple[str, BeqCatalog] | None:
+    """
+    Ask ezBEQ's search API about every candidate codec, at most `limit` at a
+    time, and return the highest-priority (codec, catalogue entry) it has.
+
+    Results are consumed in priority order, so a lower-priority hit never
+    wins over a slower higher-priority one; once the winner is known the
+    remaining probes are cancelled. Any probe error, including a cancelled
+    probe, counts as "not found"; cancelling the caller still cancels it.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def _probe(codec: str) -> BeqCatalog:
+        async with semaphore:
+            return await search(replace(search_request, codec=codec))
+
+    tasks = [asyncio.create_task(_probe(codec)) for codec in candidates]
+    try:
+        for codec, task in zip(candidates, tasks):
+            try:
+                return codec, await task
+            except asyncio.CancelledError:
+                current = asyncio.current_task()
+                if current is not None and current.cancelling():
+                    raise  # the load itself is being cancelled
+                # only this probe was cancelled: not found, like any other failure
+                _LOGGER.debug("Probe for codec '%s' was cancelled", codec)
+            except Exception as e:  # noqa: BLE001 - BEQProfileNotFound, HTTP errors...
+                _LOGGER.debug("Probe for codec '%s' found nothing: %s", codec, e)
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,6 +1,8 @@
 """Fixtures for ezbeq tests."""
 
 from collections.abc import Generator
+import copy
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from httpx import HTTPStatusError
@@ -11,7 +13,7 @@ from custom_components import ezbeq
 from homeassistant.const import CONF_HOST, CONF_PORT
 from homeassistant.core import HomeAssistant
 
-from .const import MOCK_CONFIG
+from .const import MOCK_CONFIG, MOCK_DEVICES
 
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
@@ -27,12 +29,16 @@ def mock_setup_entry() -> Generator[AsyncMock]:
 
 
 @pytest.fixture
-def mock_ezbeq_client() -> Generator[AsyncMock]:
+def mock_devices_response() -> MagicMock:
+    """The /api/2/devices response the mocked client serves to the coordinator."""
+    return devices_response(MOCK_DEVICES)
+
+
+@pytest.fixture
+def mock_ezbeq_client(mock_devices_response: MagicMock) -> Generator[AsyncMock]:
     """Mock an ezbeq client."""
     with patch("custom_components.ezbeq.EzbeqClient", autospec=True) as mock_client:
         client = mock_client.return_value
-        client.host = MOCK_CONFIG[CONF_HOST]
-        client.port = MOCK_CONFIG[CONF_PORT]
         client.server_url = f"http://{MOCK_CONFIG[CONF_HOST]}:{MOCK_CONFIG[CONF_PORT]}"
         client.current_media_type = "Movie"
         client.version = "1.0.0"
@@ -55,10 +61,21 @@ def mock_ezbeq_client() -> Generator[AsyncMock]:
             ),
         ]
         client.client = AsyncMock()
+        # the coordinator polls GET /api/2/devices (through the log proxy once set up)
+        client.client.get.return_value = mock_devices_response
+        client.client.request.return_value = mock_devices_response
         client.get_device_profile = MagicMock(return_value="Test Profile")
         yield client
 
 
+def devices_response(payload: dict[str, Any]) -> MagicMock:
+    """An httpx-like response carrying an /api/2/devices payload."""
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = copy.deepcopy(payload)
+    return response
+
+
 @pytest.fixture
 def mock_config_entry(hass: HomeAssistant) -> MockConfigEntry:
     """Mock a config entry."""
@@ -6,3 +6,31 @@ MOCK_CONFIG = {
     CONF_HOST: "192.168.1.100",
     CONF_PORT: 8080,
 }
+
+
+def _slot(slot_id: str, active: bool, last: str) -> dict:
+    return {
+        "id": slot_id,
+        "active": active,
+        "last": last,
+        "author": "aron7awol" if last != "Empty" else "",
+        "canActivate": True,
+        "inputs": 2,
+        "outputs": 4,
+        "gains": [{"id": "1", "value": 0.0}, {"id": "2", "value": 0.0}],
+        "mutes": [{"id": "1", "value": False}, {"id": "2", "value": False}],
+    }
+
+
+# GET /api/2/devices
+MOCK_DEVICES = {
+    name: {
+        "name": name,
+        "type": "minidsp",
+        "mute": False,
+        "masterVolume": volume,
+        "serials": [],
+        "slots": [_slot("1", True, "Test Profile"), _slot("2", False, "Empty")],
+    }
+    for name, volume in (("master", -10.0), ("master2", -5.0))
+}
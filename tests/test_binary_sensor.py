@@ -0,0 +1,42 @@
+"""Tests for the ezbeq binary sensors."""
+
+import copy
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from homeassistant.const import STATE_OFF, STATE_ON, STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+
+from .conftest import setup_integration
+from .const import MOCK_DEVICES
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_slot_binary_sensors(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_devices_response: MagicMock,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """Active and mute flags per slot; a slot missing from the poll is unavailable."""
+    await setup_integration(hass, mock_config_entry)
+
+    assert hass.states.get("binary_sensor.master_slot_1_active").state == STATE_ON
+    assert hass.states.get("binary_sensor.master_slot_2_active").state == STATE_OFF
+    mute = hass.states.get("binary_sensor.master_slot_1_input_2_mute")
+    assert mute.state == STATE_OFF
+
+    payload = copy.deepcopy(MOCK_DEVICES)
+    payload["master"]["slots"][0]["mutes"][0]["value"] = True
+    del payload["master"]["slots"][1]
+    mock_devices_response.json.return_value = payload
+    await mock_config_entry.runtime_data.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get("binary_sensor.master_slot_1_input_1_mute").state == STATE_ON
+    assert hass.states.get("binary_sensor.master_slot_1_input_2_mute") is mute
+    assert hass.states.get("binary_sensor.master_slot_2_active").state == STATE_UNAVAILABLE
@@ -0,0 +1,247 @@
+"""Tests for the BEQ catalogue store."""
+
+import asyncio
+import json
+import time
+from typing import Any
+
+import pytest
+
+from custom_components.ezbeq import catalogue
+from custom_components.ezbeq.catalogue import CatalogueStore
+from custom_components.ezbeq.records import CatalogueRecord
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+    AiohttpClientMockResponse,
+)
+
+pytestmark = pytest.mark.asyncio
+
+CATALOGUE = [
+    {"theMovieDB": "603", "title": "The Matrix", "year": 1999, "audioTypes": ["TrueHD 7.1"]},
+    {"theMovieDB": "604", "title": "The Matrix Reloaded", "year": 2003, "audioTypes": ["DTS-HD MA 5.1"]},
+]
+RECORDS = [CatalogueRecord.from_dict(item) for item in CATALOGUE]
+
+
+@pytest.fixture(autouse=True)
+def isolated_config_dir(hass: HomeAssistant, tmp_path) -> None:
+    """Keep the persisted catalogue body out of the shared test config dir."""
+    hass.config.config_dir = str(tmp_path)
+
+
+async def test_catalogue_persisted_and_reloaded_without_network(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    hass_storage: dict,
+) -> None:
+    """A fresh download is persisted and served from disk after a restart."""
+    aioclient_mock.get(catalogue.CATALOG_URL, json=CATALOGUE, headers={"ETag": '"v1"'})
+
+    items = (await CatalogueStore(hass).async_get_index(wait=True)).records
+    assert [i.tmdb_id for i in items] == ["603", "604"]
+    assert hass_storage[catalogue.CATALOG_STORAGE_KEY]["data"]["etag"] == '"v1"'
+
+    # Simulate a restart: new store, network unavailable.
+    aioclient_mock.clear_requests()
+    store = CatalogueStore(hass)
+    items = (await store.async_get_index()).records
+    assert [i.tmdb_id for i in items] == ["603", "604"]
+    assert store.version == 1
+    assert aioclient_mock.call_count == 0
+
+
+async def _expired_store(hass: HomeAssistant) -> CatalogueStore:
+    store = CatalogueStore(hass)
+    store._persisted_task = hass.async_create_task(asyncio.sleep(0))
+    await store._async_replace(
+        RECORDS,
+        time.time() - catalogue.CATALOG_CACHE_TTL - 1,
+        '"v1"',
+        "Mon, 01 Jan 2024 00:00:00 GMT",
+    )
+    return store
+
+
+async def test_expired_catalogue_served_then_revalidated_with_304(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    hass_storage: dict,
+) -> None:
+    """An expired copy is returned at once; the background refresh sends validators."""
+    store = await _expired_store(hass)
+    release = asyncio.Event()
+
+    async def _slow_304(method, url, data):
+        await release.wait()
+        return AiohttpClientMockResponse(method, url, status=304)
+
+    aioclient_mock.get(catalogue.CATALOG_URL, side_effect=_slow_304)
+
+    index = await store.async_get_index()
+
+    assert index.records == RECORDS
+    assert not store.is_fresh()
+    assert hass.states.get(catalogue.CATALOG_SENSOR_ID).attributes["refreshing"] is True
+
+    release.set()
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert store.version == 1
+    _, _, _, headers = aioclient_mock.mock_calls[0]
+    assert headers["If-None-Match"] == '"v1"'
+    assert headers["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert store.is_fresh()
+    state = hass.states.get(catalogue.CATALOG_SENSOR_ID)
+    assert state.state == "fresh"
+    assert state.attributes["last_refresh_result"] == "not_modified"
+    assert state.attributes["fetched_at"] == catalogue._utc_timestamp(store.fetched_at)
+    age = hass.states.get(catalogue.CATALOG_AGE_SENSOR_ID)
+    assert age.state == dt_util.utc_from_timestamp(store.fetched_at).isoformat()
+    assert age.attributes["device_class"] == "timestamp"
+
+
+async def test_failed_refresh_keeps_stale_copy_and_counts_failure(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+) -> None:
+    """A refresh failure never drops the served copy and is not retried at once."""
+    store = await _expired_store(hass)
+    aioclient_mock.get(catalogue.CATALOG_URL, status=500)
+
+    assert (await store.async_get_index()).records == RECORDS
+    await hass.async_block_till_done(wait_background_tasks=True)
+    assert (await store.async_get_index()).records == RECORDS
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert aioclient_mock.call_count == 1
+    state = hass.states.get(catalogue.CATALOG_SENSOR_ID)
+    assert state.state == "stale"
+    assert state.attributes["refresh_failures"] == 1
+    assert state.attributes["consecutive_failures"] == 1
+    assert state.attributes["last_refresh_result"] == "failed"
+    assert state.attributes["last_error"]
+
+
+async def test_cold_cache_does_not_wait_unless_asked(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+) -> None:
+    """The load path gets None on a cold cache instead of a remote download."""
+    aioclient_mock.get(catalogue.CATALOG_URL, json=CATALOGUE)
+    store = CatalogueStore(hass)
+
+    assert await store.async_get_index() is None
+
+    await hass.async_block_till_done(wait_background_tasks=True)
+    assert len(await store.async_get_index()) == 2
+    assert aioclient_mock.call_count == 1
+
+
+async def test_concurrent_callers_share_one_fetch(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+) -> None:
+    """Cold-cache callers wait on a single download and listeners fire once."""
+    release = asyncio.Event()
+
+    async def _slow_response(method, url, data):
+        await release.wait()
+        return AiohttpClientMockResponse(method, url, json=CATALOGUE)
+
+    aioclient_mock.get(catalogue.CATALOG_URL, side_effect=_slow_response)
+    store = CatalogueStore(hass)
+    replaced = []
+    store.async_add_listener(lambda: replaced.append(store.version))
+
+    callers = [hass.async_create_task(store.async_get_index(wait=True)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*callers)
+
+    assert aioclient_mock.call_count == 1
+    assert all(r is results[0] for r in results)
+    assert replaced == [1]
+    assert store.fetched_at is not None
+
+
+async def test_refresh_does_not_stall_event_loop(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+) -> None:
+    """Decoding and indexing a large catalogue happen off the event loop."""
+    big = [
+        {
+            "theMovieDB": str(n),
+            "title": f"Synthetic Title {n} Part {n % 7}",
+            "altTitle": f"Alt {n}",
+            "year": 1950 + n % 70,
+            "audioTypes": ["DTS-HD MA 5.1", "TrueHD 7.1"],
+            "author": "aron7awol",
+            "edition": "Extended" if n % 5 == 0 else "",
+        }
+        for n in range(30000)
+    ]
+    aioclient_mock.get(catalogue.CATALOG_URL, json=big)
+    store = CatalogueStore(hass)
+
+    async def _longest_step(work: Any) -> tuple[float, Any, float]:
+        """Longest loop-thread CPU time between iterations while ``work`` runs."""
+        # CPU time of the loop thread per loop iteration: waiting for the GIL
+        # while the executor works is not loop occupancy
+        longest = 0.0
+        done = False
+
+        async def _ticker() -> None:
+            nonlocal longest
+            last = time.thread_time()
+            while not done:
+                await asyncio.sleep(0)
+                now = time.thread_time()
+                longest = max(longest, now - last)
+                last = now
+
+        ticker = hass.async_create_task(_ticker())
+        started = time.monotonic()
+        result = await work
+        elapsed = time.monotonic() - started
+        done = True
+        await ticker
+        return longest, result, elapsed
+
+    longest_step, index, elapsed = await _longest_step(store.async_get_index(wait=True))
+    # Baseline from this machine and run: the same ticker over an idle loop
+    baseline, _, _ = await _longest_step(asyncio.sleep(elapsed))
+
+    assert len(index) == 30000
+    assert index.find("10", "truehd 7.1", "extended")
+    # Building the index on the loop takes over a second; off-loop steps
+    # stay within a small multiple of idle scheduling jitter
+    assert longest_step < max(baseline * 20, 0.25)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+async def test_stream_parser_matches_json_loads(chunk_size: int) -> None:
+    """Records are emitted incrementally regardless of chunk boundaries."""
+    payload = json.dumps(CATALOGUE + [{"title": "Amélie – Le Fabuleux Destin"}]).encode()
+    parser = catalogue._ArrayStreamParser()
+    items = []
+    for start in range(0, len(payload), chunk_size):
+        items.extend(parser.feed(payload[start : start + chunk_size]))
+    items.extend(parser.finish())
+    assert items == json.loads(payload)
+
+
+async def test_stream_parser_accepts_titles_object_and_rejects_truncation() -> None:
+    """Legacy object payloads are buffered; truncated arrays are an error."""
+    parser = catalogue._ArrayStreamParser()
+    assert parser.feed(json.dumps({"titles": CATALOGUE}).encode()) == []
+    assert parser.finish() == CATALOGUE
+
+    parser = catalogue._ArrayStreamParser()
+    parser.feed(json.dumps(CATALOGUE).encode()[:-10])
+    with pytest.raises(ValueError):
+        parser.finish()
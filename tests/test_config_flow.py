@@ -12,6 +12,8 @@ from homeassistant.core import HomeAssistant
 from .conftest import mock_get_version
 from .const import MOCK_CONFIG
 
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
 pytestmark = pytest.mark.asyncio
 
 
@@ -73,3 +75,33 @@ async def test_fail_connection(
 
     assert result2["type"] == data_entry_flow.FlowResultType.FORM
     assert result2["errors"] == {"base": "cannot_connect"}
+
+
+async def test_options_flow_validates_substitution_rules(
+    hass: HomeAssistant,
+    mock_setup_entry: AsyncMock,
+) -> None:
+    """Substitution rules are edited as YAML and rejected when malformed."""
+    entry = MockConfigEntry(domain=ezbeq.const.DOMAIN, data=MOCK_CONFIG)
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    assert result["step_id"] == "init"
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {ezbeq.const.CONF_SUBSTITUTION_RULES: "- inputs: [PCM]\n"}
+    )
+    assert result["errors"] == {ezbeq.const.CONF_SUBSTITUTION_RULES: "invalid_rules"}
+
+    rules = "- inputs: [PCM]\n  outputs: [LPCM 5.1]\n"
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {ezbeq.const.CONF_SUBSTITUTION_RULES: rules}
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    assert entry.options == {
+        ezbeq.const.CONF_SUBSTITUTION_RULES: rules,
+        ezbeq.const.CONF_HTTP_TRACE: "off",
+        ezbeq.const.CONF_HTTP_TRACE_SAMPLE_RATE: 0.1,
+        ezbeq.const.CONF_PUSH_UPDATES: True,
+    }
@@ -0,0 +1,170 @@
+"""Tests for the MiniDSP devices snapshot and its coordinator poll."""
+
+import copy
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from custom_components.ezbeq.devices import (
+    DEVICES_SENSOR_ID,
+    HEARTBEAT_SENSOR_ID,
+    profile_already_loaded,
+)
+from custom_components.ezbeq.snapshot import DevicesSnapshot
+from homeassistant.core import HomeAssistant
+
+from .conftest import setup_integration
+from .const import MOCK_DEVICES
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+pytestmark = pytest.mark.asyncio
+
+SNAPSHOT = DevicesSnapshot.from_api(
+    {
+        "master": {
+            "name": "master",
+            "slots": [
+                {"id": "1", "active": True, "last": "The Matrix", "author": "aron7awol"},
+                {"id": "2", "active": False, "last": "The Matrix", "author": ""},
+                {"id": "3", "active": False, "last": "Empty"},
+            ],
+        }
+    }
+)
+
+
+ENTRY = ("603", "the matrix", "1999", "", ("truehd 7.1",), ("aron7awol",))
+LOADED = {("master", "1"): ENTRY, ("master", "2"): ENTRY, ("master", "3"): ENTRY}
+
+
+async def test_profile_already_loaded_matches_title_author_and_active_slot() -> None:
+    """Only an active slot already holding the same title/author counts."""
+    assert profile_already_loaded(SNAPSHOT, LOADED, ENTRY, "the matrix ", "aron7awol", [1])
+    assert profile_already_loaded(SNAPSHOT, LOADED, ENTRY, "The Matrix", "", [1, 2])
+    assert not profile_already_loaded(SNAPSHOT, LOADED, ENTRY, "The Matrix", "mobe1969", [1])
+    assert not profile_already_loaded(SNAPSHOT, LOADED, ENTRY, "The Matrix", "", [2])  # not active
+    assert not profile_already_loaded(SNAPSHOT, LOADED, ENTRY, "The Matrix", "", [1, 3])
+    assert not profile_already_loaded(SNAPSHOT, LOADED, ENTRY, "The Matrix", "", [4])
+    assert not profile_already_loaded(None, LOADED, ENTRY, "The Matrix", "", [1])
+
+
+async def test_profile_already_loaded_requires_the_same_entry() -> None:
+    """Another edition/codec of the title, or a slot loaded elsewhere, is not skipped."""
+    extended = ("603", "the matrix", "1999", "extended", ("truehd 7.1",), ("aron7awol",))
+    assert not profile_already_loaded(SNAPSHOT, LOADED, extended, "The Matrix", "", [1])
+    assert not profile_already_loaded(SNAPSHOT, {}, ENTRY, "The Matrix", "", [1])
+
+
+async def test_profile_already_loaded_checks_every_device() -> None:
+    snapshot = DevicesSnapshot.from_api(MOCK_DEVICES)
+    loaded = {("master", "1"): ENTRY, ("master2", "1"): ENTRY}
+    assert profile_already_loaded(snapshot, loaded, ENTRY, "Test Profile", "", [1])
+    assert not profile_already_loaded(snapshot, {("master", "1"): ENTRY}, ENTRY, "Test Profile", "", [1])
+
+    payload = copy.deepcopy(MOCK_DEVICES)
+    payload["master2"]["slots"][0]["last"] = "Other"
+    assert not profile_already_loaded(DevicesSnapshot.from_api(payload), loaded, ENTRY, "Test Profile", "", [1])
+
+
+async def test_snapshot_parses_devices_payload() -> None:
+    snapshot = DevicesSnapshot.from_api(MOCK_DEVICES, "1.0.0")
+    master = snapshot.device("master")
+    assert [d.name for d in snapshot.devices] == ["master", "master2"]
+    assert snapshot.version == "1.0.0"
+    assert master.master_volume == -10.0
+    assert master.current_profile == "Test Profile"
+    assert master.slot(1).gains == (("1", 0.0), ("2", 0.0))
+    assert master.slot("2").last == "Empty"
+    assert snapshot.device("nope") is None
+    # equality is structural: a re-parse of the same payload compares equal
+    assert snapshot == DevicesSnapshot.from_api(copy.deepcopy(MOCK_DEVICES), "1.0.0")
+
+
+async def test_coordinator_polls_devices_once(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_devices_response: MagicMock,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """One GET per poll feeds the sensors; the version is only checked on the first."""
+    await setup_integration(hass, mock_config_entry)
+    coordinator = mock_config_entry.runtime_data
+    inner = mock_ezbeq_client.client._inner
+    polls = inner.request.await_count
+
+    payload = copy.deepcopy(MOCK_DEVICES)
+    payload["master"]["slots"][0]["last"] = "Dune"
+    mock_devices_response.json.return_value = payload
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert inner.request.await_count == polls + 1
+    assert inner.request.call_args.args[:2] == ("GET", f"{mock_ezbeq_client.server_url}/api/2/devices")
+    mock_ezbeq_client.get_version.assert_awaited_once()
+    mock_ezbeq_client.update_device_data.assert_called_with(payload)
+    assert hass.states.get("sensor.master_current_profile").state == "Dune"
+    devices = hass.states.get(DEVICES_SENSOR_ID)
+    assert devices.state == "master"
+    assert devices.attributes["active_slot_title"] == "Dune"
+    assert devices.attributes["devices"] == ["master", "master2"]
+
+
+async def test_snapshot_stale_until_next_poll(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_devices_response: MagicMock,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """A write hides the snapshot until a poll started after it; failures mark it unreachable."""
+    await setup_integration(hass, mock_config_entry)
+    coordinator = mock_config_entry.runtime_data
+    assert coordinator.devices_snapshot is coordinator.data
+
+    coordinator.invalidate_snapshot()
+    assert coordinator.devices_snapshot is None
+    await coordinator.async_refresh()
+    assert coordinator.devices_snapshot is coordinator.data
+
+    mock_devices_response.raise_for_status.side_effect = ValueError("boom")
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert coordinator.devices_snapshot is None
+    devices = hass.states.get(DEVICES_SENSOR_ID)
+    assert devices.state == "unreachable"
+    assert "boom" in devices.attributes["reason"]
+
+
+async def test_devices_sensor_written_only_on_change(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_devices_response: MagicMock,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """Unchanged polls only touch the heartbeat; a device change rewrites the sensor."""
+    await setup_integration(hass, mock_config_entry)
+    coordinator = mock_config_entry.runtime_data
+    devices = hass.states.get(DEVICES_SENSOR_ID)
+    heartbeat = hass.states.get(HEARTBEAT_SENSOR_ID)
+    assert heartbeat.state == "online"
+
+    await coordinator.async_refresh()
+    assert hass.states.get(DEVICES_SENSOR_ID) is devices
+    assert hass.states.get(HEARTBEAT_SENSOR_ID) is not heartbeat
+
+    payload = copy.deepcopy(MOCK_DEVICES)
+    payload["master"]["slots"][0]["gains"][0]["value"] = -3.0
+    mock_devices_response.json.return_value = payload
+    await coordinator.async_refresh()
+    changed = hass.states.get(DEVICES_SENSOR_ID)
+    assert changed is not devices
+    assert changed.attributes["active_slot_input1_gain"] == -3.0
+
+    # the same failure twice is one write
+    mock_devices_response.raise_for_status.side_effect = ValueError("boom")
+    await coordinator.async_refresh()
+    unreachable = hass.states.get(DEVICES_SENSOR_ID)
+    await coordinator.async_refresh()
+    assert hass.states.get(DEVICES_SENSOR_ID) is unreachable
+    assert hass.states.get(HEARTBEAT_SENSOR_ID).state == "unreachable"
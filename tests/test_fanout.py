@@ -0,0 +1,157 @@
+"""Tests for the (device, slot) fan-out of loads and unloads."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pyezbeq.models import BeqCatalog
+
+from custom_components.ezbeq.const import DOMAIN
+from custom_components.ezbeq.fanout import async_fan_out, expand_targets
+from homeassistant.core import HomeAssistant
+
+from .conftest import setup_integration
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_expand_targets(mock_ezbeq_client: AsyncMock) -> None:
+    """'all' expands to every known device; duplicates are dropped."""
+    assert expand_targets(mock_ezbeq_client, "all", [1, 2]) == [
+        ("master", 1),
+        ("master", 2),
+        ("master2", 1),
+        ("master2", 2),
+    ]
+    assert expand_targets(mock_ezbeq_client, ["master2", "master2"], [3, 3]) == [("master2", 3)]
+    assert expand_targets(mock_ezbeq_client, "master", []) == [("master", 1)]
+
+
+async def test_fan_out_limits_concurrency_and_keeps_order() -> None:
+    """At most `limit` writes run at once; results follow target order."""
+    running = 0
+    peak = 0
+
+    async def _write(device: str, slot: int) -> None:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01 * (5 - slot))
+        running -= 1
+        if slot == 3:
+            raise RuntimeError("boom")
+
+    targets = [("dsp", slot) for slot in range(1, 5)]
+    results = await async_fan_out(targets, _write, limit=2)
+
+    assert peak == 2
+    assert [(r.device, r.slot) for r in results] == targets
+    assert [r.success for r in results] == [True, True, False, True]
+    assert results[2].error == "boom"
+    assert all(r.latency_ms >= 0 for r in results)
+
+
+async def test_load_fans_out_with_response(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """A load with devices writes each target and reports per-target results."""
+    await setup_integration(hass, mock_config_entry)
+    hass.states.async_set("sensor.tmdb_id", "123456")
+    hass.states.async_set("sensor.year", "2023")
+    hass.states.async_set("sensor.codec", "Atmos")
+
+    mock_ezbeq_client.search = MagicMock()
+    mock_ezbeq_client.search.search_catalog = AsyncMock(
+        return_value=BeqCatalog(
+            id="entry-1",
+            title="Test",
+            sortTitle="test",
+            year=2023,
+            audioTypes=["Atmos"],
+            digest="",
+            mvAdjust=-1.5,
+            edition="",
+            theMovieDB="123456",
+            author="aron7awol",
+        )
+    )
+
+    async def _patch(url: str, json: dict, gains_applied: bool = False) -> MagicMock:
+        if "master2" in url:
+            raise RuntimeError("device offline")
+        return MagicMock()
+
+    mock_ezbeq_client.client.patch = AsyncMock(side_effect=_patch)
+    mock_ezbeq_client.load_beq_profile = AsyncMock()
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "load_beq_profile",
+        {
+            "tmdb_sensor": "sensor.tmdb_id",
+            "year_sensor": "sensor.year",
+            "codec_sensor": "sensor.codec",
+            "slots": [1, 2],
+            "devices": "all",
+        },
+        blocking=True,
+        return_response=True,
+    )
+    await hass.async_block_till_done()
+
+    mock_ezbeq_client.load_beq_profile.assert_not_called()
+    assert mock_ezbeq_client.client.patch.await_count == 4
+    _, kwargs = mock_ezbeq_client.client.patch.call_args_list[0]
+    # OVERRIDE_GAINS: the pair is applied when the payload is built
+    assert kwargs["gains_applied"] is True
+    assert kwargs["json"]["slots"][0] == {
+        "id": "1",
+        "gains": [0.0, 0.0],
+        "active": True,
+        "mutes": [False, False],
+        "entry": "entry-1",
+    }
+    assert response["status"] == "load_partial"
+    assert [(t["device"], t["slot"], t["success"]) for t in response["targets"]] == [
+        ("master", 1, True),
+        ("master", 2, True),
+        ("master2", 1, False),
+        ("master2", 2, False),
+    ]
+    assert response["targets"][2]["error"] == "device offline"
+
+    status = hass.states.get("sensor.ezbeq_load_status")
+    assert status.state == "load_partial"
+    assert status.attributes["targets"] == response["targets"]
+
+
+async def test_unload_fans_out(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """An unload with devices clears each target; unknown devices fail alone."""
+    await setup_integration(hass, mock_config_entry)
+    mock_ezbeq_client.client.delete = AsyncMock(return_value=MagicMock())
+    mock_ezbeq_client.unload_beq_profile = AsyncMock()
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "unload_beq_profile",
+        {"slots": [2], "devices": ["master", "missing"]},
+        blocking=True,
+        return_response=True,
+    )
+    await hass.async_block_till_done()
+
+    mock_ezbeq_client.unload_beq_profile.assert_not_called()
+    mock_ezbeq_client.client.delete.assert_awaited_once_with(
+        f"{mock_ezbeq_client.server_url}/api/1/devices/master/filter/2"
+    )
+    assert response["status"] == "unload_partial"
+    assert [t["success"] for t in response["targets"]] == [True, False]
+    assert "Unknown ezBEQ device" in response["targets"][1]["error"]
@@ -0,0 +1,172 @@
+"""Tests for the HTTP log proxy and its trace ring buffer."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from custom_components.ezbeq._http_log_proxy import (
+    TRACE_HEADERS,
+    TRACE_SAMPLED,
+    HttpTrace,
+    HttpxLogProxy,
+)
+from custom_components.ezbeq.const import DOMAIN
+from homeassistant.core import HomeAssistant
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+pytestmark = pytest.mark.asyncio
+
+URL = "http://ezbeq:8080/api/2/devices/master"
+
+
+class _Response:
+    """Response whose body must not be decoded unless a trace samples it."""
+
+    def __init__(self) -> None:
+        self.status_code = 200
+        self.headers = {"content-type": "application/json"}
+        self.request = httpx.Request("PATCH", URL, headers={"x-test": "1"})
+        self.text_reads = 0
+
+    @property
+    def text(self) -> str:
+        self.text_reads += 1
+        return '{"ok": true}'
+
+
+def _proxy(trace: HttpTrace) -> tuple[HttpxLogProxy, _Response]:
+    resp = _Response()
+    inner = AsyncMock()
+    inner.request = AsyncMock(return_value=resp)
+    return HttpxLogProxy(inner, MagicMock(), trace=trace), resp
+
+
+async def test_tracing_off_does_no_serialization() -> None:
+    """Off: no json.dumps, no body read, nothing buffered; gains still normalized."""
+    trace = HttpTrace()
+    proxy, resp = _proxy(trace)
+    payload = {"slots": [{"id": "1", "gains": [None, 1.0]}]}
+
+    with patch("custom_components.ezbeq._http_log_proxy.json.dumps") as dumps:
+        assert await proxy.patch(URL, json=payload) is resp
+
+    dumps.assert_not_called()
+    assert resp.text_reads == 0
+    assert not trace.records
+    assert payload["slots"][0]["gains"] == [0.0, 1.0]
+
+
+async def test_headers_level_records_without_bodies() -> None:
+    trace = HttpTrace()
+    trace.configure(TRACE_HEADERS)
+    proxy, resp = _proxy(trace)
+
+    await proxy.patch(URL, json={"slots": []})
+    await proxy.get(URL)
+
+    assert resp.text_reads == 0
+    first, second = trace.dump()
+    assert first["id"] != second["id"]
+    assert first["method"] == "PATCH"
+    assert first["status"] == 200
+    assert first["request_headers"]["x-test"] == "1"
+    assert first["response_headers"] == {"content-type": "application/json"}
+    assert first["request_json"] is None
+    assert first["response_body"] is None
+    assert first["duration_ms"] >= 0
+
+
+async def test_sampled_level_captures_bodies_and_errors() -> None:
+    """Sampled records carry payload and body; failures are recorded too."""
+    trace = HttpTrace()
+    trace.configure(TRACE_SAMPLED, 1.0)
+    proxy, _resp = _proxy(trace)
+
+    await proxy.patch(URL, json={"slots": [{"id": "1"}]})
+    proxy._inner.request.side_effect = httpx.ConnectError("refused")
+    with pytest.raises(httpx.ConnectError):
+        await proxy.delete(URL)
+
+    ok, failed = trace.dump(clear=True)
+    assert ok["full"] is True
+    assert ok["request_json"] == '{"slots": [{"id": "1"}]}'
+    assert ok["response_body"] == '{"ok": true}'
+    assert failed["error"] == "refused"
+    assert failed["status"] is None
+    assert not trace.records
+
+    proxy._inner.request.side_effect = None
+    trace.configure(TRACE_SAMPLED, 0.0)
+    await proxy.get(URL)
+    assert trace.dump()[0]["full"] is False
+
+
+async def test_ring_buffer_is_bounded() -> None:
+    trace = HttpTrace(maxlen=3)
+    trace.configure(TRACE_HEADERS)
+    proxy, _resp = _proxy(trace)
+    for _ in range(5):
+        await proxy.get(URL)
+    assert [r["id"] for r in trace.dump()] == ["000003", "000004", "000005"]
+
+
+async def test_unknown_level_disables_tracing() -> None:
+    trace = HttpTrace()
+    trace.configure("verbose", 5)
+    assert not trace.enabled
+    assert trace.sample_rate == 1.0
+
+
+async def test_dump_http_trace_service(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """The service returns the buffer and the options set the level."""
+    mock_config_entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(
+        mock_config_entry, options={"http_trace": TRACE_HEADERS}
+    )
+    await hass.config_entries.async_setup(mock_config_entry.entry_id)
+    await hass.async_block_till_done()
+    trace = mock_config_entry.runtime_data.http_trace
+    assert trace.level == TRACE_HEADERS
+    trace.dump(clear=True)  # drop the setup polls
+    trace.records.append(trace.start("GET", URL))
+
+    response = await hass.services.async_call(
+        DOMAIN, "dump_http_trace", {"clear": True}, blocking=True, return_response=True
+    )
+
+    assert response["level"] == TRACE_HEADERS
+    assert [r["url"] for r in response["records"]] == [URL]
+    assert not trace.records
+
+
+async def test_gain_override_only_touches_device_patch() -> None:
+    """The override pair hits slot gains of device PATCHes; other payloads pass untouched."""
+    inner = AsyncMock()
+    inner.request = AsyncMock(return_value=_Response())
+    proxy = HttpxLogProxy(inner, MagicMock(), override_gains=True, override_gains_values=(0, -1))
+
+    v2 = {"slots": [{"id": "1", "gains": [-3.5, -3.5], "entry": "x"}, {"id": "2", "gains": [1, 2, 3]}]}
+    v1 = {"slots": [{"id": "1", "gain1": None, "gain2": 4.0, "mute1": False}]}
+    entry = {"filters": [{"gain": 6.0}], "slots": [{"gains": [5.0, 5.0]}]}
+    await proxy.patch(URL, json=v2)
+    await proxy.patch("http://ezbeq:8080/api/1/devices/master", json=v1)
+    await proxy.post("http://ezbeq:8080/api/1/search", json=entry)
+    await proxy.patch(f"{URL}/filter/1", json={"slots": [{"gains": [5.0, 5.0]}]})
+
+    assert v2["slots"][0]["gains"] == [0.0, -1.0]
+    assert v2["slots"][1]["gains"] == [0.0, 0.0, 0.0]
+    assert v1["slots"][0] == {"id": "1", "gain1": 0.0, "gain2": -1.0, "mute1": False}
+    assert entry == {"filters": [{"gain": 6.0}], "slots": [{"gains": [5.0, 5.0]}]}
+    assert inner.request.call_args_list[3].kwargs["json"] == {"slots": [{"gains": [5.0, 5.0]}]}
+
+    # payloads built with the override already applied are sent untouched
+    built = {"slots": [{"id": "1", "gains": [None, 2]}]}
+    await proxy.patch(URL, json=built, gains_applied=True)
+    assert built == {"slots": [{"id": "1", "gains": [None, 2]}]}
+    assert "gains_applied" not in inner.request.call_args.kwargs
@@ -0,0 +1,94 @@
+"""Tests for the catalogue lookup indexes."""
+
+import pytest
+
+from custom_components.ezbeq.index import CatalogueIndex
+from custom_components.ezbeq.manual_load import SEARCH_MODE_FUZZY, _build_candidates
+from custom_components.ezbeq.records import CatalogueRecord
+
+pytestmark = pytest.mark.asyncio
+
+
+def _index() -> CatalogueIndex:
+    raw = [
+        {"theMovieDB": "1", "title": "Alien", "year": 1979, "audioTypes": ["DTS-HD MA 5.1"], "author": "mobe1969"},
+        {"theMovieDB": "1", "title": "Alien", "year": 1979, "audioTypes": ["DTS-HD MA 5.1"], "author": "aron7awol",
+         "edition": "Director's Cut"},
+        {"theMovieDB": "1", "title": "Alien", "year": 1979, "audioTypes": ["Atmos", "TrueHD 7.1"], "author": "aron7awol"},
+        {"theMovieDB": "", "title": "Obscure Film", "year": 2001, "audioTypes": ["DD+"], "author": "halcyon888"},
+    ]
+    return CatalogueIndex([CatalogueRecord.from_dict(r) for r in raw], version=3)
+
+
+async def test_index_lookups_match_linear_scan_semantics() -> None:
+    """Blank edition matches any edition; buckets keep catalogue order."""
+    index = _index()
+    records = index.records
+
+    assert index.version == 3
+    assert index.by_tmdb(" 1 ") == tuple(records[:3])
+    assert index.find("1", "dts-hd ma 5.1", "") == (records[0], records[1])
+    assert index.find("1", "DTS-HD MA 5.1", "director's cut") == (records[1],)
+    assert index.has_codec("1", "", "truehd 7.1")
+    assert not index.has_codec("1", "Director's Cut", "atmos")
+
+
+async def test_index_matchers() -> None:
+    """Preferred author restricts the tmdb match; title+year is the fallback."""
+    index = _index()
+    records = index.records
+
+    assert index.match_preferring_author("1", "DTS-HD MA 5.1", "", "aron7awol") is records[1]
+    assert index.match_preferring_author("1", "DTS-HD MA 5.1", "", "") is records[0]
+    assert index.match_preferring_author("1", "DTS-HD MA 5.1", "", "nobody") is None
+    assert index.match("999", "dd+", "", 2001, "obscure film") is records[3]
+    assert index.match("999", "dd+", "", 2002, "obscure film") is None
+
+
+async def test_prefix_search_uses_titles_and_alt_titles() -> None:
+    """Prefix ranges cover titles and alt titles and yield each entry once."""
+    raw = [
+        {"theMovieDB": "1", "title": "The Matrix", "altTitle": "Matrix"},
+        {"theMovieDB": "2", "title": "The Matrix Reloaded"},
+        {"theMovieDB": "3", "title": "Matilda"},
+        {"theMovieDB": "4", "title": "Heat"},
+    ]
+    index = CatalogueIndex([CatalogueRecord.from_dict(r) for r in raw])
+
+    assert [r.tmdb_id for r in index.iter_prefix(["the matrix"])] == ["1", "2"]
+    assert [r.tmdb_id for r in index.iter_prefix(["Mat"])] == ["3", "1"]
+    assert [r.tmdb_id for r in index.iter_prefix(["mat", "the m", "he"])] == ["3", "1", "2", "4"]
+    assert list(index.iter_prefix(["zzz", ""])) == []
+
+
+async def test_fuzzy_search_ranks_typos_and_missing_articles() -> None:
+    """Trigram search tolerates typos/missing articles and returns top-k."""
+    raw = [
+        {"theMovieDB": "1", "title": "The Matrix"},
+        {"theMovieDB": "2", "title": "The Matrix Reloaded"},
+        {"theMovieDB": "3", "title": "Heat"},
+        {"theMovieDB": "4", "title": "Spider-Man", "altTitle": "Spiderman"},
+    ]
+    index = CatalogueIndex([CatalogueRecord.from_dict(r) for r in raw])
+
+    ranked = index.search_fuzzy(["Matrix"], limit=5)
+    assert [r.tmdb_id for _, r in ranked] == ["1", "2"]
+    assert ranked[0][0] > ranked[1][0]
+
+    assert [r.tmdb_id for _, r in index.search_fuzzy(["the matirx"], limit=1)] == ["1"]
+    assert [r.tmdb_id for _, r in index.search_fuzzy(["spider man"], limit=5)] == ["4"]
+    assert index.search_fuzzy(["zzzz"], limit=5) == []
+
+
+async def test_fuzzy_candidates_fill_limit_after_dedupe() -> None:
+    """Duplicate catalogue entries do not leave fuzzy mode short of rows."""
+    raw = [
+        {"theMovieDB": "1", "title": "The Matrix", "audioTypes": ["Atmos"], "author": "aron7awol"},
+        {"theMovieDB": "1", "title": "The Matrix", "audioTypes": ["Atmos"], "author": "aron7awol"},
+        {"theMovieDB": "2", "title": "The Matrix Reloaded", "audioTypes": ["Atmos"], "author": "aron7awol"},
+    ]
+    index = CatalogueIndex([CatalogueRecord.from_dict(r) for r in raw])
+
+    rows = _build_candidates(index, [], ["Matrix"], limit=2, mode=SEARCH_MODE_FUZZY)
+    assert [row["tmdb_id"] for row in rows] == ["1", "2"]
+    assert all("match_score" in row for row in rows)
@@ -0,0 +1,96 @@
+"""Tests for per-stage load timing and the latency statistics sensor."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from custom_components.ezbeq.const import DOMAIN
+from custom_components.ezbeq.latency import (
+    LATENCY_SENSOR_ID,
+    LOAD_STAGES,
+    LatencyStats,
+    StageTimer,
+    percentile,
+)
+from homeassistant.core import HomeAssistant
+
+from .conftest import setup_integration
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_stage_timer_accumulates() -> None:
+    """Skipped stages report 0; repeated stages add up; total is wall time."""
+    timer = StageTimer(("catalogue", "ezbeq"))
+    with timer.stage("ezbeq"):
+        await asyncio.sleep(0.01)
+    with timer.stage("ezbeq"):
+        await asyncio.sleep(0.01)
+    durations = timer.as_dict()
+    assert durations["catalogue"] == 0.0
+    assert durations["ezbeq"] >= 20
+    assert durations["total"] >= durations["ezbeq"]
+
+
+async def test_percentile_nearest_rank() -> None:
+    samples = sorted(float(n) for n in range(1, 101))
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 95) == 95.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([7.0], 99) == 7.0
+
+
+async def test_latency_stats_sensor(hass: HomeAssistant) -> None:
+    """Rolling window per stage, published as flat percentile attributes."""
+    stats = LatencyStats(hass, window=10)
+    for n in range(20):
+        stats.record("load", {"catalogue": float(n), "total": 100.0})
+    stats.record("load", {"device_refresh": 40.0}, count=False)
+
+    state = hass.states.get(LATENCY_SENSOR_ID)
+    assert state.state == "100.0"
+    assert state.attributes["load_samples"] == 20
+    # only the last 10 catalogue samples (10..19) count
+    assert state.attributes["load_catalogue_p50_ms"] == 14.0
+    assert state.attributes["load_catalogue_p99_ms"] == 19.0
+    assert state.attributes["load_device_refresh_p95_ms"] == 40.0
+
+
+async def test_load_reports_stage_durations(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """The final load status carries every stage; the stats sensor follows."""
+    await setup_integration(hass, mock_config_entry)
+    hass.states.async_set("sensor.tmdb_id", "123456")
+    hass.states.async_set("sensor.year", "2023")
+    hass.states.async_set("sensor.codec", "Atmos")
+
+    async def _slow_load(_request) -> None:
+        await asyncio.sleep(0.02)
+
+    mock_ezbeq_client.load_beq_profile = AsyncMock(side_effect=_slow_load)
+
+    await hass.services.async_call(
+        DOMAIN,
+        "load_beq_profile",
+        {"tmdb_sensor": "sensor.tmdb_id", "year_sensor": "sensor.year", "codec_sensor": "sensor.codec"},
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+
+    status = hass.states.get("sensor.ezbeq_load_status")
+    assert status.state == "load_success"
+    stage_ms = status.attributes["stage_ms"]
+    assert set(stage_ms) == {*LOAD_STAGES, "total"}
+    assert stage_ms["ezbeq"] >= 20
+    assert stage_ms["substitution"] == 0.0
+
+    latency = hass.states.get(LATENCY_SENSOR_ID)
+    assert latency.attributes["load_samples"] == 1
+    assert latency.attributes["load_ezbeq_p50_ms"] == stage_ms["ezbeq"]
+    assert "load_device_refresh_p50_ms" in latency.attributes
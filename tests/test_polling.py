@@ -0,0 +1,118 @@
+"""Tests for the adaptive polling interval."""
+
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from custom_components.ezbeq.const import CONF_MEDIA_PLAYER, CONF_PUSH_UPDATES
+from custom_components.ezbeq.devices import HEARTBEAT_SENSOR_ID
+from custom_components.ezbeq.polling import (
+    FAST_POLL_INTERVAL,
+    FAST_POLL_WINDOW,
+    IDLE_AFTER,
+    IDLE_POLL_INTERVAL,
+    MAX_BACKOFF_INTERVAL,
+    POLL_INTERVAL,
+    PollPolicy,
+)
+from homeassistant.core import HomeAssistant
+
+from .conftest import setup_integration
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+pytestmark = pytest.mark.asyncio
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def test_fast_after_write_then_idle() -> None:
+    clock = _Clock()
+    policy = PollPolicy(clock)
+    assert policy.interval() == (POLL_INTERVAL, "active")
+
+    policy.note_write()
+    assert policy.interval() == (FAST_POLL_INTERVAL, "recent_write")
+    clock.now += FAST_POLL_WINDOW
+    assert policy.interval() == (POLL_INTERVAL, "active")
+    clock.now += IDLE_AFTER
+    assert policy.interval() == (IDLE_POLL_INTERVAL, "idle")
+
+    policy.push_connected = True
+    assert policy.interval() == (None, "push")
+
+
+async def test_media_player_and_backoff() -> None:
+    clock = _Clock()
+    policy = PollPolicy(clock)
+    policy.media_state = "playing"
+    assert policy.interval() == (POLL_INTERVAL, "media_player_active")
+    policy.media_state = "off"
+    assert policy.interval() == (IDLE_POLL_INTERVAL, "media_player_idle")
+
+    policy.media_state = "playing"
+    intervals = []
+    for _ in range(6):
+        policy.note_result(False)
+        intervals.append(policy.interval())
+    assert intervals[0] == (POLL_INTERVAL * 2, "backoff")
+    assert intervals[1] == (POLL_INTERVAL * 4, "backoff")
+    assert intervals[-1] == (MAX_BACKOFF_INTERVAL, "backoff")
+
+    policy.note_result(True)
+    assert policy.interval() == (POLL_INTERVAL, "media_player_active")
+
+
+async def test_coordinator_follows_media_player_and_failures(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_devices_response: MagicMock,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """The interval follows the configured player and backs off on failures, visible on the heartbeat."""
+    hass.states.async_set("media_player.theatre", "off")
+    mock_config_entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(
+        mock_config_entry,
+        options={CONF_PUSH_UPDATES: False, CONF_MEDIA_PLAYER: "media_player.theatre"},
+    )
+    await setup_integration(hass, mock_config_entry)
+    coordinator = mock_config_entry.runtime_data
+    assert coordinator.update_interval == IDLE_POLL_INTERVAL
+    assert coordinator.poll_reason == "media_player_idle"
+
+    polls = mock_devices_response.json.call_count
+    hass.states.async_set("media_player.theatre", "playing")
+    await hass.async_block_till_done()
+    assert coordinator.update_interval == POLL_INTERVAL
+    # the interval shrank, so ezBEQ is polled right away
+    assert mock_devices_response.json.call_count == polls + 1
+
+    coordinator.invalidate_snapshot()
+    assert coordinator.update_interval == FAST_POLL_INTERVAL
+
+    mock_devices_response.raise_for_status.side_effect = ValueError("down")
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    heartbeat = hass.states.get(HEARTBEAT_SENSOR_ID).attributes
+    assert heartbeat["poll_reason"] == "backoff"
+    assert heartbeat["poll_interval_s"] == (FAST_POLL_INTERVAL * 4).total_seconds()
+    assert heartbeat["consecutive_failures"] == 2
+
+    mock_devices_response.raise_for_status.side_effect = None
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == FAST_POLL_INTERVAL
+    assert hass.states.get(HEARTBEAT_SENSOR_ID).attributes["consecutive_failures"] == 0
+
+    coordinator.async_follow_media_player(None)
+    hass.states.async_set("media_player.theatre", "off")
+    await hass.async_block_till_done()
+    assert coordinator.poll_reason == "recent_write"
+    assert coordinator.update_interval == timedelta(seconds=5)
@@ -0,0 +1,138 @@
+"""Tests for websocket push updates, against a local fake ezBEQ websocket."""
+
+import asyncio
+import copy
+from collections.abc import AsyncGenerator, Callable
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import pytest
+
+from custom_components.ezbeq.const import CONF_PUSH_UPDATES
+from custom_components.ezbeq.coordinator import POLL_INTERVAL
+from custom_components.ezbeq.push import (
+    PUSH_PATH,
+    DevicePush,
+    devices_from_message,
+    websocket_url,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .conftest import setup_integration
+from .const import MOCK_DEVICES
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeEzbeqSocket:
+    """ezBEQ's /ws endpoint: tests push messages to, or drop, the live connection."""
+
+    def __init__(self) -> None:
+        self.connections: asyncio.Queue[web.WebSocketResponse] = asyncio.Queue()
+
+    async def handler(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await self.connections.put(ws)
+        async for _msg in ws:
+            pass
+        return ws
+
+
+@pytest.fixture
+async def fake_ezbeq(socket_enabled: None) -> AsyncGenerator[tuple[FakeEzbeqSocket, str]]:
+    fake = FakeEzbeqSocket()
+    app = web.Application()
+    app.router.add_get(PUSH_PATH, fake.handler)
+    server = TestServer(app)
+    await server.start_server()
+    yield fake, str(server.make_url(PUSH_PATH))
+    await server.close()
+
+
+async def _until(check: Callable[[], bool]) -> None:
+    async with asyncio.timeout(5):
+        while not check():
+            await asyncio.sleep(0.01)
+
+
+async def test_websocket_url() -> None:
+    assert websocket_url("http://192.168.1.100:8080") == "ws://192.168.1.100:8080/ws"
+    assert websocket_url("https://ezbeq.local:443/") == "wss://ezbeq.local:443/ws"
+
+
+async def test_push_url_from_client(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """The client only exposes server_url (pyezbeq has no host/port attributes)."""
+    await setup_integration(hass, mock_config_entry)
+    assert mock_config_entry.runtime_data.push.url == "ws://192.168.1.100:8080/ws"
+
+
+async def test_devices_from_message() -> None:
+    master = MOCK_DEVICES["master"]
+    assert devices_from_message({"message": "DeviceState", "data": master}) == {"master": master}
+    assert devices_from_message(MOCK_DEVICES) == MOCK_DEVICES
+    assert devices_from_message({"message": "Catalogue", "data": master}) is None
+    assert devices_from_message({"message": "DeviceState", "data": "nope"}) is None
+    assert devices_from_message([master]) is None
+
+
+async def test_push_updates_and_fallback(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_devices_response: MagicMock,
+    mock_config_entry: MockConfigEntry,
+    fake_ezbeq: tuple[FakeEzbeqSocket, str],
+) -> None:
+    """Pushed states reach the entities without polling; a drop polls, then reconnects."""
+    fake, url = fake_ezbeq
+    mock_config_entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(mock_config_entry, options={CONF_PUSH_UPDATES: False})
+    await setup_integration(hass, mock_config_entry)
+    coordinator = mock_config_entry.runtime_data
+    polls = mock_devices_response.json.call_count
+
+    async with aiohttp.ClientSession() as session:
+        push = DevicePush(hass, coordinator, url, session)
+        with patch("custom_components.ezbeq.push.PUSH_BACKOFF_INITIAL", 0.01):
+            push.async_start()
+            ws = await fake.connections.get()
+            await _until(lambda: push.connected)
+            assert coordinator.update_interval is None
+            # one catch-up poll on connect
+            await _until(lambda: mock_devices_response.json.call_count == polls + 1)
+
+            pushed = copy.deepcopy(MOCK_DEVICES["master"])
+            pushed["slots"][0]["last"] = "Pushed Profile"
+            await ws.send_json({"message": "DeviceState", "data": pushed})
+            await ws.send_str("not json")
+            await _until(lambda: push.messages == 1)
+            await hass.async_block_till_done()
+
+            assert hass.states.get("sensor.master_current_profile").state == "Pushed Profile"
+            assert hass.states.get("sensor.master2_current_profile").state == "Test Profile"
+            assert mock_devices_response.json.call_count == polls + 1
+
+            # the server goes away: poll at once, then resubscribe after the backoff
+            await ws.close()
+            await _until(lambda: mock_devices_response.json.call_count >= polls + 2)
+            await fake.connections.get()
+            await _until(lambda: push.connected)
+
+            await push.async_stop()
+
+    assert not push.connected
+    assert coordinator.update_interval == POLL_INTERVAL
+    # the poll timer is re-armed: the next poll happens without any other trigger
+    polls = mock_devices_response.json.call_count
+    async_fire_time_changed(hass, dt_util.utcnow() + POLL_INTERVAL)
+    await hass.async_block_till_done()
+    assert mock_devices_response.json.call_count == polls + 1
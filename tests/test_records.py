@@ -0,0 +1,38 @@
+"""Tests for the compact catalogue record."""
+
+import pytest
+
+from custom_components.ezbeq.records import CatalogueRecord
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_record_normalizes_match_keys_and_interns_values() -> None:
+    """Match keys are pre-normalized and repeated values share one object."""
+    raw = {
+        "theMovieDB": 603,
+        "title": " The Matrix ",
+        "year": 1999,
+        "audioTypes": ["TrueHD 7.1 ", "Atmos"],
+        "edition": "Director's Cut",
+        "authors": ["aron7awol", "mobe1969"],
+        "images": "https://example.invalid/a.jpg",
+        "genres": ["Sci-Fi"],
+        "unused": {"filters": [1, 2, 3]},
+    }
+    first = CatalogueRecord.from_dict(raw)
+    second = CatalogueRecord.from_dict(dict(raw))
+
+    assert not hasattr(first, "__dict__")
+    assert first.tmdb_id == "603"
+    assert first.title_norm == "the matrix"
+    assert first.year_key == "1999"
+    assert first.audio_types_norm == ("truehd 7.1", "atmos")
+    assert first.author == "aron7awol, mobe1969"
+    assert first.images == ("https://example.invalid/a.jpg",)
+    assert first.audio_types[1] is second.audio_types[1]
+    assert first.authors_norm[0] is second.authors_norm[0]
+
+    assert first.has_codec("atmos")
+    assert first.edition_matches("") and first.edition_matches("director's cut")
+    assert first.author_matches("mobe1969") and not first.author_matches("someone")
@@ -0,0 +1,129 @@
+"""Tests for request resolution and speculative pre-resolution."""
+
+from datetime import timedelta
+import time
+
+import pytest
+
+from custom_components.ezbeq.catalogue import CatalogueStore
+from custom_components.ezbeq.records import CatalogueRecord
+from custom_components.ezbeq import resolver
+from custom_components.ezbeq.resolver import (
+    PreResolver,
+    ResolutionCache,
+    resolution_key,
+    resolve,
+    search_request_from_sensors,
+)
+from custom_components.ezbeq.substitutions import SubstitutionRules
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+pytestmark = pytest.mark.asyncio
+
+CATALOGUE = [
+    {"theMovieDB": "603", "title": "The Matrix", "year": 1999, "audioTypes": ["TrueHD 7.1"], "author": "aron7awol"},
+]
+CALL = {
+    "tmdb_sensor": "sensor.tmdb",
+    "year_sensor": "sensor.year",
+    "codec_sensor": "sensor.codec",
+    "title_sensor": "sensor.title",
+    "enable_audio_codec_substitutions": True,
+}
+
+
+def _play(hass: HomeAssistant, tmdb: str, codec: str, title: str = "The Matrix") -> None:
+    hass.states.async_set("sensor.tmdb", tmdb)
+    hass.states.async_set("sensor.year", "1999")
+    hass.states.async_set("sensor.codec", codec)
+    hass.states.async_set("sensor.title", title)
+
+
+async def _stores(hass: HomeAssistant) -> tuple[CatalogueStore, SubstitutionRules]:
+    catalogue = CatalogueStore(hass)
+    await catalogue._async_replace([CatalogueRecord.from_dict(i) for i in CATALOGUE], time.time(), None, None)
+    return catalogue, SubstitutionRules(hass, catalogue)
+
+
+async def test_resolve_applies_plan_and_author(hass: HomeAssistant) -> None:
+    """The ready request carries the planned codec and the catalogue author."""
+    catalogue, rules = await _stores(hass)
+    _play(hass, "603", "Atmos")
+    request = search_request_from_sensors(hass, CALL, preferred_author="  ", slots=[2])
+
+    res = resolve(catalogue.index, request, rules.table)
+
+    assert res.key == resolution_key(request, True)
+    ready = res.request_for([1, 2])
+    assert (ready.codec, ready.preferred_author, ready.slots) == ("truehd 7.1", "aron7awol", [1, 2])
+    assert request.codec == "Atmos" and request.preferred_author == ""
+    assert res.catalogue_version == catalogue.version
+
+
+async def test_pre_resolution_follows_sensor_changes(hass: HomeAssistant) -> None:
+    """Settled sensor changes are resolved ahead of the load and invalidated by a new catalogue."""
+    catalogue, rules = await _stores(hass)
+    pre = PreResolver(hass, catalogue, rules)
+    _play(hass, "1", "DTS 5.1")
+    pre.async_watch(CALL)
+
+    _play(hass, "603", "Atmos")
+    await hass.async_block_till_done()
+    assert pre.resolution is None  # still settling
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+
+    request = search_request_from_sensors(hass, CALL)
+    res = pre.lookup(resolution_key(request, True), rules.table)
+    assert res is not None
+    assert res.search_request.codec == "truehd 7.1"
+    assert pre.lookup(resolution_key(request, False), None) is None
+
+    await catalogue._async_replace(list(catalogue.index.records), time.time(), None, None)
+    assert pre.lookup(resolution_key(request, True), rules.table) is None
+    pre.async_shutdown()
+
+
+async def test_resolution_cache_lru_version_and_negative_ttl(
+    hass: HomeAssistant, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Hits are counted, the LRU is bounded, replacement clears it and misses expire."""
+    catalogue, rules = await _stores(hass)
+    cache = ResolutionCache(catalogue, maxsize=2)
+    _play(hass, "603", "TrueHD 7.1")
+    found = resolve(catalogue.index, search_request_from_sensors(hass, CALL), None)
+    _play(hass, "999", "TrueHD 7.1", "No BEQ Here")
+    missing = resolve(catalogue.index, search_request_from_sensors(hass, CALL), None)
+    assert not found.negative and missing.negative
+    assert found.extra_attrs["title"] == "The Matrix"
+
+    cache.put(found)
+    cache.put(missing)
+    assert cache.get(found.key, None) is found
+    assert cache.get(found.key, rules.table) is None  # other rule table
+    assert cache.stats() == {
+        "resolution_cache_hits": 1,
+        "resolution_cache_misses": 1,
+        "resolution_cache_size": 1,
+    }
+
+    # Negative results expire after the TTL.
+    monkeypatch.setattr(resolver, "NEGATIVE_RESOLUTION_TTL", -1)
+    assert cache.get(missing.key, None) is None
+    monkeypatch.undo()
+
+    # LRU eviction keeps the most recently used.
+    cache.put(found)
+    for tmdb in ("1", "2"):
+        _play(hass, tmdb, "TrueHD 7.1")
+        cache.put(resolve(catalogue.index, search_request_from_sensors(hass, CALL), None))
+    assert len(cache) == 2
+    assert cache.get(found.key, None) is None
+
+    # A new catalogue version drops everything.
+    cache.put(found)
+    await catalogue._async_replace(list(catalogue.index.records), time.time(), None, None)
+    assert len(cache) == 0
@@ -0,0 +1,63 @@
+"""Tests for the per-slot latest-wins command scheduler."""
+
+import asyncio
+
+import pytest
+
+from custom_components.ezbeq.scheduler import CommandDropped, SlotScheduler
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_newest_command_wins_and_running_one_finishes() -> None:
+    """Queued commands are dropped by newer ones; the running write completes."""
+    scheduler = SlotScheduler()
+    release = asyncio.Event()
+    ran: list[str] = []
+
+    async def _job(name: str) -> str:
+        if name == "load1":
+            await release.wait()
+        ran.append(name)
+        return name
+
+    first = asyncio.create_task(scheduler.async_run("load", [1], lambda: _job("load1")))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(scheduler.async_run("load", [1], lambda: _job("load2")))
+    third = asyncio.create_task(scheduler.async_run("unload", [1], lambda: _job("unload")))
+    await asyncio.sleep(0)
+    assert scheduler.stats() == {"queue_depth": 2, "dropped_commands": 0}
+
+    release.set()
+    assert await first == "load1"
+    with pytest.raises(CommandDropped):
+        await second
+    assert await third == "unload"
+    assert ran == ["load1", "unload"]
+    assert scheduler.stats() == {"queue_depth": 0, "dropped_commands": 1}
+
+
+async def test_other_slots_are_not_superseded() -> None:
+    """Commands for different slots queue behind a multi-slot write without dropping."""
+    changes: list[dict] = []
+    scheduler = SlotScheduler()
+    scheduler.on_change = lambda: changes.append(scheduler.stats())
+    release = asyncio.Event()
+    ran: list[str] = []
+
+    async def _job(name: str) -> None:
+        if name == "both":
+            await release.wait()
+        ran.append(name)
+
+    both = asyncio.create_task(scheduler.async_run("load", [1, 2], lambda: _job("both")))
+    await asyncio.sleep(0)
+    two = asyncio.create_task(scheduler.async_run("load", [2], lambda: _job("two")))
+    one = asyncio.create_task(scheduler.async_run("unload", [1], lambda: _job("one")))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(both, two, one)
+
+    assert ran[0] == "both" and sorted(ran[1:]) == ["one", "two"]
+    assert scheduler.dropped == 0
+    assert max(c["queue_depth"] for c in changes) == 2
@@ -1,15 +1,18 @@
 """Tests for the ezbeq sensors."""
 
+import copy
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from syrupy import SnapshotAssertion
 
+from custom_components.ezbeq.sensor import EzBEQSlotSensor
 from homeassistant.const import STATE_UNKNOWN, Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import entity_registry as er
 
 from .conftest import setup_integration
+from .const import MOCK_DEVICES
 
 from pytest_homeassistant_custom_component.common import MockConfigEntry, snapshot_platform
 
@@ -19,6 +22,7 @@ pytestmark = pytest.mark.asyncio
 async def test_sensor_setup_and_update(
     hass: HomeAssistant,
     mock_ezbeq_client: AsyncMock,
+    mock_devices_response: MagicMock,
     mock_config_entry: MockConfigEntry,
     entity_registry: er.EntityRegistry,
     snapshot: SnapshotAssertion,
@@ -39,8 +43,11 @@ async def test_sensor_setup_and_update(
     await snapshot_platform(hass, entity_registry, snapshot, mock_config_entry.entry_id)
 
     # Simulate a data update
-    mock_ezbeq_client.get_device_profile = MagicMock(return_value="New Test Profile")
-    await hass.config_entries.async_reload(mock_config_entry.entry_id)
+    payload = copy.deepcopy(MOCK_DEVICES)
+    for device in payload.values():
+        device["slots"][0]["last"] = "New Test Profile"
+    mock_devices_response.json.return_value = payload
+    await mock_config_entry.runtime_data.async_refresh()
     await hass.async_block_till_done()
 
     for device_name in mock_ezbeq_client.device_info:
@@ -50,10 +57,51 @@ async def test_sensor_setup_and_update(
         assert state.state == "New Test Profile"
 
     # Simulate a data update with unavailable data
-    mock_ezbeq_client.get_device_profile = MagicMock(return_value=None)
-    await hass.config_entries.async_reload(mock_config_entry.entry_id)
+    del payload["master2"]
+    await mock_config_entry.runtime_data.async_refresh()
     await hass.async_block_till_done()
 
     state = hass.states.get(entity_id)
     assert state
     assert state.state == STATE_UNKNOWN
+
+
+async def test_slot_sensors(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_devices_response: MagicMock,
+    mock_config_entry: MockConfigEntry,
+    entity_registry: er.EntityRegistry,
+) -> None:
+    """Per-slot sensors carry their own value and only rewrite when it changes."""
+    await setup_integration(hass, mock_config_entry)
+
+    title = hass.states.get("sensor.master2_slot_1_title")
+    assert title.state == "Test Profile"
+    assert title.attributes["author"] == "aron7awol"
+    assert title.attributes["raw"]["id"] == "1"
+    assert "gains" not in title.attributes["raw"]
+    assert "mutes" not in title.attributes["raw"]
+    assert EzBEQSlotSensor._unrecorded_attributes == frozenset({"raw"})
+    assert hass.states.get("sensor.master_slot_2_title").state == "Empty"
+    gain = hass.states.get("sensor.master_slot_1_input_1_gain")
+    assert gain.state == "0.0"
+    assert gain.attributes["unit_of_measurement"] == "dB"
+    assert (
+        entity_registry.async_get("sensor.master2_slot_1_input_2_gain").unique_id
+        == f"{mock_config_entry.entry_id}_master2_slot1_input2_gain"
+    )
+
+    other_gain = hass.states.get("sensor.master_slot_1_input_2_gain")
+    master_title = hass.states.get("sensor.master_slot_1_title")
+
+    payload = copy.deepcopy(MOCK_DEVICES)
+    payload["master"]["slots"][0]["gains"][0]["value"] = -3.0
+    mock_devices_response.json.return_value = payload
+    await mock_config_entry.runtime_data.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.master_slot_1_input_1_gain").state == "-3.0"
+    assert hass.states.get("sensor.master2_slot_1_title") is title
+    assert hass.states.get("sensor.master_slot_1_title") is master_title
+    assert hass.states.get("sensor.master_slot_1_input_2_gain") is other_gain
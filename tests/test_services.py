@@ -1,20 +1,65 @@
 """Tests for the ezbeq Profile Loader services."""
 
+import asyncio
+from datetime import timedelta
+import time
 from unittest.mock import AsyncMock, patch
 
 import pytest
 from pyezbeq.models import SearchRequest
 
 from custom_components.ezbeq.const import DOMAIN
+from custom_components.ezbeq.records import CatalogueRecord
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
 
 from .conftest import setup_integration
 
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
 
 pytestmark = pytest.mark.asyncio
 
+# Two editions of the title MOCK_DEVICES reports in slot 1
+CATALOGUE = [
+    {"theMovieDB": "603", "title": "Test Profile", "year": 1999, "audioTypes": ["Atmos"], "author": "aron7awol"},
+    {
+        "theMovieDB": "603",
+        "title": "Test Profile",
+        "year": 1999,
+        "edition": "Extended",
+        "audioTypes": ["Atmos"],
+        "author": "aron7awol",
+    },
+]
+LOAD_CALL = {
+    "tmdb_sensor": "sensor.tmdb_id",
+    "year_sensor": "sensor.year",
+    "codec_sensor": "sensor.codec",
+    "edition_sensor": "sensor.edition",
+    "title_sensor": "sensor.title",
+    "slots": [1],
+}
+
+
+async def _setup_with_catalogue(hass: HomeAssistant, config_entry: MockConfigEntry) -> None:
+    await setup_integration(hass, config_entry)
+    records = [CatalogueRecord.from_dict(i) for i in CATALOGUE]
+    await config_entry.runtime_data.catalogue._async_replace(records, time.time(), None, None)
+    hass.states.async_set("sensor.tmdb_id", "603")
+    hass.states.async_set("sensor.year", "1999")
+    hass.states.async_set("sensor.codec", "Atmos")
+    hass.states.async_set("sensor.edition", "")
+    hass.states.async_set("sensor.title", "Test Profile")
+
+
+async def _load(hass: HomeAssistant, **data) -> dict:
+    response = await hass.services.async_call(
+        DOMAIN, "load_beq_profile", {**LOAD_CALL, **data}, blocking=True, return_response=True
+    )
+    await hass.async_block_till_done()
+    return response
+
 
 async def test_load_beq_profile_service(
     hass: HomeAssistant,
@@ -195,3 +240,128 @@ async def test_unload_beq_profile_service_error_handling(
             {"slots": [1]},
             blocking=True,
         )
+
+
+async def test_load_skipped_only_when_same_entry_loaded(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """A repeat load of the entry this integration wrote is skipped; another edition is not."""
+    await _setup_with_catalogue(hass, mock_config_entry)
+
+    # the devices already show the title, but nothing was loaded from here yet
+    assert (await _load(hass))["status"] == "load_success"
+    assert (await _load(hass))["status"] == "already_loaded"
+    assert hass.states.get("sensor.ezbeq_load_status").state == "already_loaded"
+    assert mock_ezbeq_client.load_beq_profile.await_count == 1
+
+    hass.states.async_set("sensor.edition", "Extended")
+    assert (await _load(hass))["status"] == "load_success"
+    assert mock_ezbeq_client.load_beq_profile.await_count == 2
+    assert (await _load(hass))["status"] == "already_loaded"
+
+    await hass.services.async_call(DOMAIN, "unload_beq_profile", {"slots": [1]}, blocking=True)
+    await hass.async_block_till_done()
+    assert (await _load(hass))["status"] == "load_success"
+    assert mock_ezbeq_client.load_beq_profile.await_count == 3
+
+
+async def test_load_force_bypasses_already_loaded(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """force: true rewrites the slot even when the same entry is loaded."""
+    await _setup_with_catalogue(hass, mock_config_entry)
+    await _load(hass)
+
+    assert (await _load(hass, force=True))["status"] == "load_success"
+    assert mock_ezbeq_client.load_beq_profile.await_count == 2
+
+
+async def test_load_status_reports_pre_resolved(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """A load whose watched sensors settled beforehand uses the pre-resolved plan."""
+    await _setup_with_catalogue(hass, mock_config_entry)
+
+    await _load(hass)
+    assert hass.states.get("sensor.ezbeq_load_status").attributes["pre_resolved"] is False
+
+    hass.states.async_set("sensor.edition", "Extended")
+    await hass.async_block_till_done()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    await _load(hass)
+    status = hass.states.get("sensor.ezbeq_load_status").attributes
+    assert status["pre_resolved"] is True
+    assert status["edition"] == "Extended"
+
+
+async def test_load_status_reports_resolution_cache(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """A repeat of the same metadata is resolved from the cache."""
+    await _setup_with_catalogue(hass, mock_config_entry)
+
+    await _load(hass)
+    status = hass.states.get("sensor.ezbeq_load_status").attributes
+    assert (status["resolution_cache_hits"], status["resolution_cache_misses"]) == (0, 1)
+    assert status["resolution_cache_size"] == 1
+
+    await _load(hass, force=True)
+    status = hass.states.get("sensor.ezbeq_load_status").attributes
+    assert status["pre_resolved"] is False
+    assert (status["resolution_cache_hits"], status["resolution_cache_misses"]) == (1, 1)
+    assert status["resolution_cache_size"] == 1
+
+    # a new catalogue empties the cache
+    catalogue = mock_config_entry.runtime_data.catalogue
+    await catalogue._async_replace(list(catalogue.index.records), time.time(), None, None)
+    await _load(hass, force=True)
+    status = hass.states.get("sensor.ezbeq_load_status").attributes
+    assert (status["resolution_cache_hits"], status["resolution_cache_misses"]) == (1, 2)
+    assert status["resolution_cache_size"] == 1
+
+
+async def test_load_status_reports_queue_and_dropped_commands(
+    hass: HomeAssistant,
+    mock_ezbeq_client: AsyncMock,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """Back-to-back loads queue behind the running one; only the newest waiting load is sent."""
+    await _setup_with_catalogue(hass, mock_config_entry)
+    release = asyncio.Event()
+
+    async def _slow_load(request: SearchRequest) -> None:
+        await release.wait()
+
+    mock_ezbeq_client.load_beq_profile.side_effect = _slow_load
+    calls = [
+        hass.async_create_task(
+            hass.services.async_call(
+                DOMAIN, "load_beq_profile", {**LOAD_CALL, "force": True}, blocking=True, return_response=True
+            )
+        )
+        for _ in range(3)
+    ]
+    async with asyncio.timeout(5):
+        while mock_ezbeq_client.load_beq_profile.await_count == 0 or (
+            hass.states.get("sensor.ezbeq_load_status").attributes["queue_depth"] < 2
+        ):
+            await asyncio.sleep(0.01)
+    assert hass.states.get("sensor.ezbeq_load_status").attributes["queue_depth"] == 2
+
+    release.set()
+    responses = await asyncio.gather(*calls)
+
+    assert [r["status"] for r in responses] == ["load_success", "dropped", "load_success"]
+    assert mock_ezbeq_client.load_beq_profile.await_count == 2
+    status = hass.states.get("sensor.ezbeq_load_status").attributes
+    assert status["queue_depth"] == 0
+    assert status["dropped_commands"] == 1
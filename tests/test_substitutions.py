@@ -0,0 +1,207 @@
+"""Tests for local codec substitution planning."""
+
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import pytest
+from pyezbeq.models import SearchRequest
+from pyezbeq.search import Search
+
+from custom_components.ezbeq.index import CatalogueIndex
+from custom_components.ezbeq.records import CatalogueRecord
+from custom_components.ezbeq.catalogue import CatalogueStore
+from custom_components.ezbeq.const import CONF_SUBSTITUTION_RULES
+from custom_components.ezbeq.substitutions import (
+    RULES_SENSOR_ID,
+    SUBSTITUTION_RULES_FILE,
+    SubstitutionRules,
+    SubstitutionTable,
+    parse_rules,
+    plan_codec,
+    probe_codecs,
+)
+from homeassistant.core import HomeAssistant
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+pytestmark = pytest.mark.asyncio
+
+RULES = parse_rules(
+    """
+- inputs: Atmos
+  outputs: [TrueHD 7.1, TrueHD Atmos, truehd 7.1]
+- enabled: false
+  inputs: [Atmos]
+  outputs: [DD+ Atmos]
+- inputs: [atmos]
+  outputs: [TrueHD 5.1]
+"""
+)
+
+CATALOG = CatalogueIndex(
+    [
+        CatalogueRecord.from_dict(item)
+        for item in [
+            {"theMovieDB": "603", "title": "The Matrix", "year": 1999, "audioTypes": ["TrueHD 5.1"], "author": "aron7awol"},
+            {"theMovieDB": "603", "title": "The Matrix", "year": 1999, "audioTypes": ["TrueHD Atmos"], "author": "mobe1969"},
+        ]
+    ]
+)
+
+
+def _request(codec: str, author: str = "") -> SearchRequest:
+    return SearchRequest(
+        tmdb="603", year=1999, codec=codec, preferred_author=author, edition="", slots=[1], title="The Matrix"
+    )
+
+
+async def test_table_keeps_rule_priority_and_skips_duplicates() -> None:
+    """Enabled rules compile to ordered, de-duplicated outputs per input codec."""
+    table = SubstitutionTable(RULES)
+    assert table.candidates("Atmos") == ("Atmos", "truehd 7.1", "truehd atmos", "truehd 5.1")
+    assert table.candidates(" ATMOS ") == (" ATMOS ", "truehd 7.1", "truehd atmos", "truehd 5.1")
+    assert table.candidates("DTS 5.1") == ("DTS 5.1",)
+
+
+async def test_table_drops_and_reports_dead_rules() -> None:
+    """Outputs outside the catalogue vocabulary are never probed."""
+    table = SubstitutionTable(RULES, CATALOG.codecs)
+    assert table.candidates("Atmos") == ("Atmos", "truehd atmos", "truehd 5.1")
+    assert table.dead_outputs == ["truehd 7.1"]
+    assert table.dead_rules == []
+    assert SubstitutionTable([{"inputs": ["PCM"], "outputs": ["LPCM 5.1"]}], CATALOG.codecs).dead_rules == [0]
+
+
+async def test_plan_picks_best_codec_the_catalogue_has() -> None:
+    """The first candidate with a catalogue entry wins, without any probing."""
+    plan = plan_codec(CATALOG, _request("Atmos"), SubstitutionTable(RULES))
+    assert plan.codec == "truehd atmos"
+    assert plan.record.author == "mobe1969"
+    assert plan.substituted
+
+
+async def test_plan_respects_preferred_author() -> None:
+    """A preferred author skips substitutes only another author has published."""
+    plan = plan_codec(CATALOG, _request("Atmos", "aron7awol"), SubstitutionTable(RULES))
+    assert plan.codec == "truehd 5.1"
+    assert plan.record.author == "aron7awol"
+
+
+async def test_plan_without_rules_or_catalogue() -> None:
+    """No rules only confirms the requested codec; no catalogue plans nothing."""
+    assert plan_codec(CATALOG, _request("Atmos")).codec is None
+    assert plan_codec(CATALOG, _request("TrueHD 5.1")).codec == "TrueHD 5.1"
+    plan = plan_codec(None, _request("Atmos"), SubstitutionTable(RULES))
+    assert plan.codec is None and not plan.substituted
+    assert plan.candidates[0] == "Atmos"
+
+
+async def test_rules_reload_from_yaml_and_options(hass: HomeAssistant, tmp_path) -> None:
+    """Options beat the YAML file, which beats the defaults; bad input keeps the old rules."""
+    hass.config.config_dir = str(tmp_path)
+    rules = SubstitutionRules(hass, CatalogueStore(hass))
+    entry = MockConfigEntry(domain="ezbeq", options={})
+
+    await rules.async_load(entry)
+    assert rules.source == "default"
+
+    (tmp_path / SUBSTITUTION_RULES_FILE).write_text("- inputs: [DTS 5.1]\n  outputs: [DTS-HD MA 5.1]\n")
+    await rules.async_load(entry)
+    assert rules.source == "yaml"
+    assert rules.table.outputs("dts 5.1") == ("dts-hd ma 5.1",)
+
+    entry = MockConfigEntry(domain="ezbeq", options={CONF_SUBSTITUTION_RULES: "- inputs: PCM\n  outputs: LPCM 7.1\n"})
+    await rules.async_load(entry)
+    assert rules.source == "options"
+    assert rules.table.outputs("pcm") == ("lpcm 7.1",)
+
+    entry = MockConfigEntry(domain="ezbeq", options={CONF_SUBSTITUTION_RULES: "- outputs: LPCM 7.1\n"})
+    await rules.async_load(entry)
+    assert rules.table.outputs("pcm") == ("lpcm 7.1",)
+    state = hass.states.get(RULES_SENSOR_ID)
+    assert state.state == "options"
+    assert state.attributes["error"]
+
+
+async def test_probe_commits_highest_priority_and_cancels_the_rest(socket_enabled: None) -> None:
+    """A slow higher-priority hit beats a fast lower-priority one; leftovers are cancelled."""
+    hang = asyncio.Event()
+    delays = {"a": 0.05, "b": 0.15, "c": 0.0}
+    inflight = 0
+    max_inflight = 0
+    seen: list[str] = []
+
+    async def _search(request: web.Request) -> web.Response:
+        nonlocal inflight, max_inflight
+        codec = request.query["audiotypes"]
+        seen.append(codec)
+        inflight += 1
+        max_inflight = max(max_inflight, inflight)
+        try:
+            if codec == "d":
+                await hang.wait()
+            await asyncio.sleep(delays.get(codec, 0))
+            if codec == "a":
+                return web.json_response([])
+            entry = {"id": f"entry-{codec}", "theMovieDB": "603", "year": 1999, "audioTypes": [codec], "mvAdjust": -1.5}
+            return web.json_response([entry])
+        finally:
+            inflight -= 1
+
+    app = web.Application()
+    app.router.add_get("/api/1/search", _search)
+    server = TestServer(app, host="127.0.0.1")
+    await server.start_server()
+    search = Search(host="127.0.0.1", port=server.port)
+    cancelled: list[str] = []
+
+    async def _tracked(request: SearchRequest):
+        try:
+            return await search.search_catalog(request)
+        except asyncio.CancelledError:
+            cancelled.append(request.codec)
+            raise
+
+    try:
+        codec, entry = await asyncio.wait_for(
+            probe_codecs(_tracked, _request("x"), ["a", "b", "c", "d"], limit=2), timeout=5
+        )
+    finally:
+        hang.set()
+        await search.client.aclose()
+        await server.close()
+
+    assert (codec, entry.id, entry.mvAdjust) == ("b", "entry-b", -1.5)
+    assert seen[:2] == ["a", "b"]
+    assert max_inflight <= 2
+    assert cancelled == ["d"]
+
+
+async def test_probe_returns_none_when_nothing_exists() -> None:
+    """Probe failures of any kind only mean "not found"."""
+
+    async def _missing(request: SearchRequest):
+        raise RuntimeError(request.codec)
+
+    assert await probe_codecs(_missing, _request("x"), ["a", "b"]) is None
+
+
+async def test_probe_cancelled_probe_is_not_found_but_caller_cancel_propagates() -> None:
+    """A single cancelled probe is a miss; cancelling the load cancels the probing."""
+    entry = object()
+
+    async def _search(request: SearchRequest):
+        if request.codec == "a":
+            raise asyncio.CancelledError
+        if request.codec == "hang":
+            await asyncio.Event().wait()
+        return entry
+
+    assert await probe_codecs(_search, _request("x"), ["a", "b"]) == ("b", entry)
+
+    probing = asyncio.create_task(probe_codecs(_search, _request("x"), ["hang", "b"]))
+    await asyncio.sleep(0.01)
+    probing.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probing